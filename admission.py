@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+
+# 預設同時進行的 Gemini 呼叫上限；每分鐘請求數與 token 數預設不限制（0）
+DEFAULT_MAX_CONCURRENCY = 8
+
+# 速率限制允許的瞬間爆量（以幾秒的配額計）
+DEFAULT_BURST_SECONDS = 10
+
+# 沒有 session 的呼叫（命令列、背景工作）共用的佇列名稱
+DEFAULT_SESSION = "default"
+
+
+class TokenBucket:
+    """以每分鐘配額補充的權杖桶"""
+
+    def __init__(self, per_minute, burst_seconds=DEFAULT_BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def wait_time(self, amount, now):
+        """還要等幾秒才有足夠的配額（超過桶容量的請求只要求桶是滿的）"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self.rate
+
+    def take(self, amount):
+        self._tokens -= min(amount, self.capacity)
+
+
+class _Ticket:
+    __slots__ = ("session_id", "tokens")
+
+    def __init__(self, session_id, tokens):
+        self.session_id = session_id
+        self.tokens = tokens
+
+
+class AdmissionController:
+    """行程內所有 Gemini 呼叫的入場控制
+
+    - 同時進行的呼叫數不超過 max_concurrency
+    - 以權杖桶限制每分鐘請求數（rpm）與輸入 token 數（tpm），0 表示不限制
+    - 同一 session 內先到先服務，不同 session 之間輪流放行，避免單一使用者的
+      批次分析佔滿所有名額
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, rpm=0, tpm=0, burst_seconds=DEFAULT_BURST_SECONDS):
+        self.max_concurrency = max_concurrency
+        self._request_bucket = TokenBucket(rpm, burst_seconds) if rpm else None
+        self._token_bucket = TokenBucket(tpm, burst_seconds) if tpm else None
+        self._condition = threading.Condition()
+        self._queues = OrderedDict()  # session_id -> deque[_Ticket]，順序即輪流放行的順序
+        self._active = 0
+        self.admitted = 0
+
+    def _head(self):
+        """下一個應該放行的請求"""
+        for queue in self._queues.values():
+            return queue[0]
+        return None
+
+    def _position(self, ticket):
+        """ticket 前面還有幾個請求（依輪流放行的順序推算）"""
+        own_queue = self._queues[ticket.session_id]
+        rounds = own_queue.index(ticket)
+        position = rounds
+        ahead = True
+        for session_id, queue in self._queues.items():
+            if session_id == ticket.session_id:
+                ahead = False
+                continue
+            position += min(len(queue), rounds + (1 if ahead else 0))
+        return position
+
+    def _rate_wait(self, ticket, now):
+        wait = 0.0
+        if self._request_bucket is not None:
+            wait = max(wait, self._request_bucket.wait_time(1, now))
+        if self._token_bucket is not None:
+            wait = max(wait, self._token_bucket.wait_time(ticket.tokens, now))
+        return wait
+
+    def _dequeue(self, ticket):
+        queue = self._queues[ticket.session_id]
+        queue.remove(ticket)
+        # 放行後該 session 排到最後，讓其他 session 輪流
+        del self._queues[ticket.session_id]
+        if queue:
+            self._queues[ticket.session_id] = queue
+
+    @contextmanager
+    def admit(self, session_id=None, tokens=0, on_wait=None):
+        """排隊取得呼叫名額；on_wait(position) 在等待期間名次改變時呼叫，放行時以 0 呼叫"""
+        ticket = _Ticket(session_id or DEFAULT_SESSION, tokens)
+        last_position = None
+        with self._condition:
+            self._queues.setdefault(ticket.session_id, deque()).append(ticket)
+            try:
+                while True:
+                    timeout = None
+                    if self._head() is ticket and self._active < self.max_concurrency:
+                        timeout = self._rate_wait(ticket, time.monotonic())
+                        if timeout == 0:
+                            break
+                    position = self._position(ticket)
+                    if on_wait is not None and position != last_position:
+                        last_position = position
+                        # 回呼可能較慢（例如更新頁面），不持有鎖
+                        self._condition.release()
+                        try:
+                            on_wait(position)
+                        finally:
+                            self._condition.acquire()
+                        continue
+                    self._condition.wait(timeout)
+            except BaseException:
+                self._dequeue(ticket)
+                self._condition.notify_all()
+                raise
+            self._dequeue(ticket)
+            if self._request_bucket is not None:
+                self._request_bucket.take(1)
+            if self._token_bucket is not None:
+                self._token_bucket.take(ticket.tokens)
+            self._active += 1
+            self.admitted += 1
+            # 佇列順序改變，讓其他等待者更新名次
+            self._condition.notify_all()
+        try:
+            # 名額已取得，回呼丟出例外（包含 Streamlit 的重新執行）時也要歸還
+            if on_wait is not None and last_position:
+                on_wait(0)
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "active": self._active,
+                "queued": sum(len(queue) for queue in self._queues.values()),
+                "sessions_waiting": len(self._queues),
+                "admitted": self.admitted,
+                "max_concurrency": self.max_concurrency,
+            }
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    """取得行程內共用的入場控制（所有 session 共同受限於同一份配額）"""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController(
+                    max_concurrency=max(1, int(os.getenv("JOBMATCH_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))),
+                    rpm=float(os.getenv("JOBMATCH_RPM", 0)),
+                    tpm=float(os.getenv("JOBMATCH_TPM", 0)),
+                )
+    return _controller
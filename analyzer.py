@@ -0,0 +1,761 @@
+import copy
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+import gemini_client
+from cache import get_profile_cache, get_result_cache, make_cache_key
+from store import get_analysis_store
+from prompts import (
+    get_system_prompt, get_user_prompt, get_translation_prompt, get_section_prompt, get_section_system_prompt,
+    get_profile_prompt, get_advice_titles, ADVICE_KEYS,
+)
+from json_stream import IncrementalJSONParser, parse_complete_response
+from resilience import call_with_resilience, CircuitOpenError, DeadlineExceededError
+from skills import find_unsupported_items
+from resume_profile import (
+    ResumeUsageTracker, format_profile, make_profile_key, make_profile_record, normalize_profile,
+)
+from singleflight import SingleFlight
+from admission import get_admission_controller
+from compaction import compact_inputs, compact_resume, estimate_tokens, get_compaction_stats
+import metrics
+
+# 載入環境變數
+load_dotenv()
+
+# 提示詞版本（修改提示詞時請遞增版本，讓舊快取失效；模型名稱見 gemini_client）
+PROMPT_VERSION = 3
+
+# 是否以串流方式產生回應，讓分數區塊先行顯示（設定 JOBMATCH_STREAMING=0 可停用）
+STREAMING_ENABLED = os.getenv("JOBMATCH_STREAMING", "1") != "0"
+
+# 英文輸出模式："direct"（預設，一次呼叫直接產生英文）或 "translate"（先產生中文再翻譯）
+ENGLISH_MODE = os.getenv("JOBMATCH_ENGLISH_MODE", "direct")
+
+# 是否將分析拆成分數與各建議類別的並行子請求（設定 JOBMATCH_SPLIT_REQUESTS=0 可改回單一請求）
+SPLIT_REQUESTS = os.getenv("JOBMATCH_SPLIT_REQUESTS", "1") != "0"
+
+# 介面是否延遲產生建議類別：先只產生分數，展開某個類別時才產生（設定 JOBMATCH_LAZY_ADVICE=0 可停用）
+LAZY_ADVICE = os.getenv("JOBMATCH_LAZY_ADVICE", "1") != "0"
+
+# 所有分析共用的子請求執行緒數量上限
+DEFAULT_SECTION_WORKERS = 12
+
+# 結構化履歷摘要："auto"（預設，同一份履歷搭配第二份職缺起改送摘要）、"always" 或 "off"（一律送全文）
+RESUME_PROFILE_MODE = os.getenv("JOBMATCH_RESUME_PROFILE", "auto")
+
+# 估計 token 數低於此值的履歷直接送全文（摘要省不了多少，反而多一次呼叫）
+RESUME_PROFILE_MIN_TOKENS = int(os.getenv("JOBMATCH_RESUME_PROFILE_MIN_TOKENS", 300))
+
+# 背景產生履歷摘要的執行緒數量
+DEFAULT_PROFILE_WORKERS = 2
+
+
+class AnalysisError(Exception):
+    """分析失敗；message 為可直接顯示給用戶的訊息，raw_response 為模型原始回應（若有）"""
+
+    def __init__(self, message, raw_response=None):
+        super().__init__(message)
+        self.message = message
+        self.raw_response = raw_response
+
+
+class MissingAPIKeyError(AnalysisError):
+    """未設置 GOOGLE_API_KEY"""
+
+
+class GenerationCancelled(Exception):
+    """呼叫端已放棄結果（例如分數請求失敗或頁面重新執行），子請求提前結束"""
+
+
+def initialize_gemini_client():
+    """取得行程內共用的 Google Gemini 模型（只在第一次呼叫時建立）"""
+    try:
+        return gemini_client.get_model()
+    except gemini_client.MissingAPIKey as e:
+        raise MissingAPIKeyError("⚠️ 請設置 GOOGLE_API_KEY 環境變數") from e
+    except Exception as e:
+        raise AnalysisError(f"❌ Gemini 客戶端初始化失敗: {str(e)}") from e
+
+
+def translate_chinese_to_english(chinese_response):
+    """使用 Gemini API 將中文回應翻譯成英文"""
+    try:
+        # 創建翻譯提示詞（使用英文）
+        translation_prompt = get_translation_prompt(chinese_response)
+
+        # 調用 Gemini API（共用分析時的模型實例與連線，並套用重試與時限）
+        model = gemini_client.get_model()
+        response = call_with_resilience(
+            lambda timeout: model.generate_content(
+                translation_prompt,
+                request_options=make_request_options(timeout)
+            ),
+            admit=lambda: admitted(tokens=estimate_tokens(translation_prompt))
+        )
+        metrics.record_usage(response, "translation")
+
+        # 解析回應
+        translated_text = response.text.strip()
+
+        # 清理回應，移除可能的markdown格式
+        if translated_text.startswith('```json'):
+            translated_text = translated_text[7:]
+        if translated_text.endswith('```'):
+            translated_text = translated_text[:-3]
+        translated_text = translated_text.strip()
+
+        # 嘗試解析JSON以驗證格式
+        json.loads(translated_text)
+
+        return translated_text
+
+    except Exception as e:
+        metrics.ERRORS.inc(stage="translation")
+        print(f"翻譯錯誤: {e}", file=sys.stderr)
+        print(f"原始回應: {response.text if 'response' in locals() else 'No response'}", file=sys.stderr)
+        return chinese_response  # 如果翻譯失敗，返回原文
+
+
+@contextmanager
+def admitted(session_id=None, tokens=0, on_queue=None):
+    """在全域入場控制排隊取得一次呼叫名額，並記錄排隊時間（每次重試都各自排隊）"""
+    queued_at = time.perf_counter()
+    with get_admission_controller().admit(session_id, tokens, on_wait=on_queue):
+        metrics.observe_stage("queue_wait", time.perf_counter() - queued_at)
+        yield
+
+
+def make_request_options(timeout):
+    """單次呼叫的 SDK 參數：設定時限，並關閉 SDK 內建重試（由 resilience 統一處理）"""
+    return {"timeout": timeout, "retry": None}
+
+
+def generate_and_parse(model, full_prompt, generation_config, on_progress=None, timeout=None, timings=None,
+                       call="analysis", cancel_event=None):
+    """呼叫 Gemini 並同步解析 JSON；有 on_progress 時以串流產生，並在新欄位完成時回報部分結果
+
+    每次呼叫記錄 API 耗時（不含解析）、首個片段到達時間與 token 用量（依 call 分類）；
+    timings 不為 None 時將解析耗時累加到 timings["json_parse"]。回傳 (回應文字, 解析器)：
+    解析器只在有 on_progress 的串流時使用（用於部分結果），其他情況為 None，完整回應由 run_generation 一次解析。
+    cancel_event 不為 None 時也以串流產生，呼叫前與每個片段之間檢查，設定後停止讀取並拋出 GenerationCancelled。
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        raise GenerationCancelled()
+    request_options = make_request_options(timeout) if timeout else None
+    started_at = time.perf_counter()
+    parse_seconds = 0.0
+    if (on_progress is None and cancel_event is None) or not STREAMING_ENABLED:
+        response = model.generate_content(
+            full_prompt,
+            generation_config=generation_config,
+            request_options=request_options
+        )
+        response_text = response.text
+        metrics.observe_stage("api", time.perf_counter() - started_at)
+        metrics.record_usage(response, call)
+        return response_text, None
+
+    response = model.generate_content(
+        full_prompt,
+        generation_config=generation_config,
+        stream=True,
+        request_options=request_options
+    )
+    # 只為了顯示部分結果才逐段解析；只因為可取消而串流時，完整回應之後再一次解析
+    parser = IncrementalJSONParser() if on_progress is not None else None
+    text_chunks = []
+    for chunk in response:
+        if cancel_event is not None and cancel_event.is_set():
+            # 停止讀取串流，不再等待其餘輸出
+            raise GenerationCancelled()
+        try:
+            chunk_text = chunk.text
+        except ValueError:
+            # 部分串流片段（例如結束訊號）沒有文字內容
+            continue
+        if not text_chunks:
+            metrics.observe_stage("first_token", time.perf_counter() - started_at)
+        text_chunks.append(chunk_text)
+        if parser is None:
+            continue
+        parse_started_at = time.perf_counter()
+        completed = parser.feed(chunk_text)
+        parse_seconds += time.perf_counter() - parse_started_at
+        # 分數出現後才開始顯示，之後每完成一個新欄位更新一次
+        if completed and "match_score" in parser.completed_sections():
+            on_progress(parser.sections)
+    # 串流的 API 耗時扣除同步解析的時間（顯示部分結果的時間仍計入，與使用者感受一致）
+    metrics.observe_stage("api", time.perf_counter() - started_at - parse_seconds)
+    metrics.record_usage(response, call)
+    if timings is not None:
+        timings["json_parse"] = timings.get("json_parse", 0.0) + parse_seconds
+    return "".join(text_chunks), parser
+
+
+def check_priorities(result, job_description, on_warning):
+    """以本地技能比對檢查 priorities 是否出自職缺描述，有疑慮時透過 on_warning 提醒"""
+    if on_warning is None or not isinstance(result, dict):
+        return
+    unsupported = find_unsupported_items(result.get("priorities"), job_description)
+    if unsupported:
+        on_warning("⚠️ 以下重點在職缺描述中找不到對應技能，請自行確認：" + "、".join(unsupported))
+
+
+def run_generation(model, prompt, generation_config, on_progress=None, session_id=None, on_queue=None,
+                   call="analysis", cancel_event=None):
+    """呼叫 Gemini（含排隊、重試與時限）並解析 JSON；回傳 (結果, 是否截斷)，失敗時拋出 AnalysisError
+
+    每次嘗試（包括重試）前都在全域入場控制排隊（同一 session 先到先服務，session 之間輪流），
+    並計入每分鐘請求數與 token 配額；on_queue(position) 回報前面還有幾個請求。
+    cancel_event 設定後不再開始新的嘗試，進行中的串流也會停止，並拋出 GenerationCancelled。
+    """
+    timings = {}
+    tokens = estimate_tokens(prompt)
+    try:
+        # 限流與 5xx 以帶抖動的指數退避重試；上游持續失敗時由斷路器直接拒絕
+        response_text, parser = call_with_resilience(
+            lambda timeout: generate_and_parse(
+                model,
+                prompt,
+                generation_config,
+                on_progress=on_progress,
+                timeout=timeout,
+                timings=timings,
+                call=call,
+                cancel_event=cancel_event
+            ),
+            admit=lambda: admitted(session_id, tokens, on_queue)
+        )
+    except GenerationCancelled:
+        raise
+    except CircuitOpenError as e:
+        metrics.ERRORS.inc(stage="api")
+        raise AnalysisError("❌ AI 服務暫時不穩定，請稍後再試") from e
+    except DeadlineExceededError as e:
+        metrics.ERRORS.inc(stage="api")
+        raise AnalysisError("❌ AI 回應逾時，請稍後再試") from e
+    except Exception as e:
+        metrics.ERRORS.inc(stage="api")
+        raise AnalysisError(f"❌ API 調用失敗: {str(e)}") from e
+
+    # 檢查回應是否為空
+    if not response_text or response_text.strip() == "":
+        metrics.ERRORS.inc(stage="api")
+        raise AnalysisError("❌ AI 回應為空，請檢查 API 設置")
+
+    # 串流時解析器已完整解析就直接使用；否則一次解析完整回應（優先取 ```json 區塊，
+    # 合法 JSON 走標準 json 模組的快速路徑），截斷的回應會回復到最後一個完整的值
+    parse_started_at = time.perf_counter()
+    if parser is not None and parser.complete and not parser.error:
+        result, truncated = parser.finish()
+        error = None
+    else:
+        result, _, truncated, error = parse_complete_response(response_text)
+    metrics.observe_stage("json_parse", timings.get("json_parse", 0.0) + time.perf_counter() - parse_started_at)
+    if error:
+        # 格式錯誤（不是截斷）：回復出的內容可能少了欄位或數值錯誤，不當作截斷結果顯示
+        metrics.ERRORS.inc(stage="json_parse")
+        print(f"AI 回應的 JSON 格式錯誤: {error}", file=sys.stderr)
+        raise AnalysisError("❌ AI 回應的 JSON 格式錯誤，請重新分析", raw_response=response_text)
+    if not result:
+        metrics.ERRORS.inc(stage="json_parse")
+        raise AnalysisError("❌ 無法從 AI 回應中提取 JSON 內容", raw_response=response_text)
+    return result, truncated
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight():
+    """行程內共用的進行中分析登錄（用於合併重複的請求）"""
+    return _single_flight
+
+
+_section_executor = None
+_section_executor_lock = threading.Lock()
+
+
+def get_section_executor():
+    """取得行程內共用的子請求執行緒池（JOBMATCH_SECTION_WORKERS 可調整大小）"""
+    global _section_executor
+    if _section_executor is None:
+        with _section_executor_lock:
+            if _section_executor is None:
+                _section_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("JOBMATCH_SECTION_WORKERS", DEFAULT_SECTION_WORKERS)),
+                    thread_name_prefix="jobmatch-section"
+                )
+    return _section_executor
+
+
+def merge_sections(base, advice_sections, output_language):
+    """合併分數欄位與各建議類別；base 中既有的建議會保留，類別依固定順序排列"""
+    merged = dict(base)
+    advice = dict(merged["advice"]) if isinstance(merged.get("advice"), dict) else {}
+    for section in advice_sections.values():
+        advice.update(section)
+    if advice:
+        order = {title: index for index, title in enumerate(get_advice_titles(output_language).values())}
+        merged["advice"] = dict(sorted(advice.items(), key=lambda item: order.get(item[0], len(order))))
+    return merged
+
+
+def missing_advice_sections(result, output_language):
+    """結果中尚未產生的建議類別（ADVICE_KEYS 中的鍵）"""
+    advice = result.get("advice") if isinstance(result.get("advice"), dict) else {}
+    titles = get_advice_titles(output_language)
+    return [key for key in ADVICE_KEYS if titles[key] not in advice]
+
+
+def run_split_generation(model, user_prompt, output_language, generation_config,
+                         sections, base=None, on_progress=None, on_warning=None, session_id=None, on_queue=None):
+    """將分析拆成分數請求與各建議請求並行執行，合併為與單一請求相同格式的結果
+
+    sections 為要產生的部分（"score" 與 ADVICE_KEYS 中的類別），base 為已有的結果，
+    新產生的部分會併入其中。每個子請求只送出該部分的 schema 與規則（get_section_system_prompt），
+    不重送完整的系統提示詞。分數請求的輸出最短，會最先完成並串流顯示；整體時間取決於
+    最慢的一個子請求。on_progress 與 on_queue（第一個子請求的排隊名次）一律在呼叫端的
+    執行緒中呼叫。分數請求失敗時拋出 AnalysisError；建議請求失敗只會略過該類別並透過 on_warning 提醒，
+    結果中不會有該類別（missing_advice_sections 之後會列出，下次請求時補產生）。
+    呼叫端提前離開（分數請求失敗、頁面重新執行等）時，尚未開始的子請求不會送出，進行中的串流也會停止。
+    回傳 (結果, 是否截斷)。
+    """
+    events = queue.Queue()
+    first_section = sections[0]
+    cancel_event = threading.Event()
+
+    def run_section(section, stream):
+        system_prompt = get_section_system_prompt(section, output_language)
+        prompt = f"{system_prompt}\n\n{user_prompt}\n{get_section_prompt(section, output_language)}"
+        progress = (lambda sections: events.put((section, "partial", dict(sections)))) if stream else None
+        queued = None
+        if on_queue is not None and section == first_section:
+            queued = lambda position: events.put((section, "queued", position))
+        try:
+            result = run_generation(
+                model,
+                prompt,
+                generation_config,
+                on_progress=progress,
+                session_id=session_id,
+                on_queue=queued,
+                cancel_event=cancel_event
+            )
+            events.put((section, "done", result))
+        except GenerationCancelled:
+            pass
+        except Exception as e:
+            events.put((section, "error", e))
+
+    executor = get_section_executor()
+    futures = [
+        executor.submit(run_section, section, section == "score" and on_progress is not None)
+        for section in sections
+    ]
+
+    titles = get_advice_titles(output_language)
+    score_sections = dict(base or {})
+    advice_sections = {}
+    truncated = False
+    pending = set(sections)
+    try:
+        while pending:
+            section, kind, payload = events.get()
+            changed = True
+            if kind == "queued":
+                on_queue(payload)
+                continue
+            if kind == "partial":
+                score_sections = {**(base or {}), **payload}
+            elif kind == "error":
+                pending.discard(section)
+                if section == "score":
+                    raise payload
+                if on_warning is not None:
+                    on_warning(f"⚠️ 「{titles[section]}」建議產生失敗，已略過")
+                continue
+            else:
+                pending.discard(section)
+                result, section_truncated = payload
+                truncated = truncated or section_truncated
+                if section == "score":
+                    previous_keys = set(score_sections)
+                    score_sections = {**(base or {}), **{key: value for key, value in result.items() if key != "advice"}}
+                    # 串流時最後一次部分結果通常已包含全部欄位
+                    changed = set(score_sections) != previous_keys
+                else:
+                    # 只保留本請求負責的類別，模型多回的其他類別以各自的請求為準；只回一個類別但標題
+                    # 不完全相同時存回標準標題，否則 missing_advice_sections 會一直把它當成缺少的類別
+                    advice = result.get("advice") if isinstance(result.get("advice"), dict) else {}
+                    title = titles[section]
+                    if title in advice:
+                        advice_sections[section] = {title: advice[title]}
+                    elif len(advice) == 1:
+                        advice_sections[section] = {title: next(iter(advice.values()))}
+                    elif on_warning is not None:
+                        on_warning(f"⚠️ 「{title}」建議產生失敗，已略過")
+            if on_progress is not None and changed and pending and "match_score" in score_sections:
+                on_progress(merge_sections(score_sections, advice_sections, output_language))
+    finally:
+        # 正常結束、分數請求失敗或呼叫端的 BaseException（Streamlit 重新執行）都通知其餘子請求停止：
+        # future.cancel() 只能取消尚未開始的工作，已開始的由 cancel_event 在片段之間中止
+        cancel_event.set()
+        for future in futures:
+            future.cancel()
+    return merge_sections(score_sections, advice_sections, output_language), truncated
+
+
+def get_analysis_mode(ui_language):
+    """回傳 (是否經由翻譯, 是否拆分子請求, 快取用的提示詞版本)"""
+    # 英文預設直接以英文產生；設定 JOBMATCH_ENGLISH_MODE=translate 時才沿用中文產生後再翻譯
+    via_translation = ui_language == "English" and ENGLISH_MODE == "translate"
+    # 翻譯模式沿用單一請求；其他情況依設定拆成並行子請求
+    split_requests = SPLIT_REQUESTS and not via_translation
+    if via_translation:
+        prompt_version = f"{PROMPT_VERSION}-translate"
+    elif split_requests:
+        prompt_version = f"{PROMPT_VERSION}-split"
+    else:
+        prompt_version = PROMPT_VERSION
+    return via_translation, split_requests, prompt_version
+
+
+def supports_lazy_advice(ui_language):
+    """只有拆分子請求時才能延遲產生建議類別"""
+    return get_analysis_mode(ui_language)[1]
+
+
+def load_cached_result(input_hash, result_cache=None):
+    """依序查詢記憶體快取與持久化儲存，找不到時回傳 None
+
+    result_cache 預設為分析結果快取；履歷摘要使用自己的快取（get_profile_cache）。
+    """
+    # 檢查是否已有緩存結果（跨 session 共用）
+    result_cache = result_cache or get_result_cache()
+    cached_result = result_cache.get(input_hash)
+    if cached_result is not None:
+        return cached_result
+
+    # 檢查持久化儲存（重啟後仍保留）
+    analysis_store = get_analysis_store()
+    if analysis_store is not None:
+        stored_result = analysis_store.get(input_hash)
+        if stored_result is not None:
+            result_cache.set(input_hash, stored_result)
+            return stored_result
+    return None
+
+
+def save_result(input_hash, result, result_cache=None):
+    """寫入記憶體快取與持久化儲存"""
+    (result_cache or get_result_cache()).set(input_hash, result)
+    analysis_store = get_analysis_store()
+    if analysis_store is not None:
+        analysis_store.set(input_hash, result)
+
+
+def build_prompts(resume_text, job_description, output_language, via_translation, resume_profile=None,
+                  prompt_count=1):
+    """壓縮輸入後組合系統提示詞與用戶提示詞
+
+    resume_profile 為 get_resume_profile 回傳的摘要紀錄，提供時以結構化摘要取代履歷全文。
+    prompt_count 為用戶提示詞會送出的次數（拆分請求時每個子請求都帶著同一份履歷內容），用於計算省下的 token。
+    """
+    with metrics.time_stage("prompt_build"):
+        return _build_prompts(
+            resume_text, job_description, output_language, via_translation, resume_profile, prompt_count
+        )
+
+
+def _build_prompts(resume_text, job_description, output_language, via_translation, resume_profile, prompt_count):
+    if resume_profile is not None:
+        label_language = "English" if output_language == "English" and not via_translation else "中文"
+        resume_text = format_profile(resume_profile["profile"], label_language)
+        saved_tokens = resume_profile["saved_tokens"].get(label_language, 0)
+        if saved_tokens > 0:
+            metrics.RESUME_PROFILE_SAVED_TOKENS.inc(saved_tokens * prompt_count)
+
+    # 壓縮輸入：移除網頁標記、重複行與福利/EEO 等樣板段落，並套用 token 預算
+    # （每次請求節省的 token 數記錄在 jobmatch_compaction_saved_tokens 直方圖，累計值另以
+    # jobmatch_compaction_saved_tokens_total 匯出）
+    compacted_resume, compacted_job = compact_inputs(resume_text, job_description)
+    metrics.record_compaction(compacted_resume, compacted_job)
+
+    # 定義系統提示詞與用戶提示詞
+    system_prompt = get_system_prompt(output_language, via_translation)
+    user_prompt = get_user_prompt(
+        compacted_resume.text, compacted_job.text, output_language, via_translation,
+        resume_is_profile=resume_profile is not None
+    )
+    return system_prompt, user_prompt
+
+
+_resume_usage = ResumeUsageTracker()
+
+
+def get_resume_usage():
+    """行程內共用的履歷使用紀錄（每份履歷搭配過的不同職缺數）"""
+    return _resume_usage
+
+
+def get_resume_profile(resume_text, session_id=None):
+    """取得履歷的摘要紀錄（見 make_profile_record）：依履歷雜湊查快取，沒有時呼叫 Gemini 產生一次；
+    失敗時拋出 AnalysisError
+
+    摘要存在獨立的記憶體快取與共用的持久化儲存中，所有 session、批次與命令列共用；
+    同一份履歷同時有多個請求時只產生一次。
+    """
+    profile_key = make_profile_key(resume_text, gemini_client.get_model_name())
+    cached_record = load_cached_result(profile_key, get_profile_cache())
+    if cached_record is not None:
+        return cached_record
+
+    def generate():
+        model = initialize_gemini_client()
+        compacted = compact_resume(resume_text)
+        with metrics.time_stage("resume_profile"):
+            result, truncated = run_generation(
+                model,
+                get_profile_prompt(compacted.text),
+                gemini_client.get_generation_config(),
+                session_id=session_id,
+                call="resume_profile"
+            )
+        profile = normalize_profile(result)
+        if profile is None or truncated:
+            raise AnalysisError("❌ 無法整理履歷摘要", raw_response=json.dumps(result, ensure_ascii=False))
+        record = make_profile_record(profile, compacted.compacted_tokens)
+        save_result(profile_key, record, get_profile_cache())
+        return record
+
+    record, shared = get_single_flight().do(("resume_profile", profile_key), generate)
+    return copy.deepcopy(record) if shared else record
+
+
+_profile_executor = None
+_profile_executor_lock = threading.Lock()
+_pending_profiles = set()
+
+
+def get_profile_executor():
+    """取得行程內共用的背景摘要執行緒池"""
+    global _profile_executor
+    if _profile_executor is None:
+        with _profile_executor_lock:
+            if _profile_executor is None:
+                _profile_executor = ThreadPoolExecutor(
+                    max_workers=DEFAULT_PROFILE_WORKERS,
+                    thread_name_prefix="jobmatch-profile"
+                )
+    return _profile_executor
+
+
+def generate_resume_profile(resume_text, session_id=None):
+    """產生摘要並記錄結果；失敗時回傳 None（呼叫端改送履歷全文）"""
+    try:
+        record = get_resume_profile(resume_text, session_id)
+    except AnalysisError as e:
+        metrics.RESUME_PROFILES.inc(result="profile_failed")
+        metrics.ERRORS.inc(stage="resume_profile")
+        print(f"履歷摘要產生失敗，改送履歷全文: {e.message}", file=sys.stderr)
+        return None
+    metrics.RESUME_PROFILES.inc(result="profile_generated")
+    return record
+
+
+def schedule_resume_profile(profile_key, resume_text, session_id=None):
+    """在背景產生摘要（同一份履歷已在產生中時不重複排入）"""
+    with _profile_executor_lock:
+        if profile_key in _pending_profiles:
+            return
+        _pending_profiles.add(profile_key)
+
+    def run():
+        try:
+            generate_resume_profile(resume_text, session_id)
+        finally:
+            with _profile_executor_lock:
+                _pending_profiles.discard(profile_key)
+
+    get_profile_executor().submit(run)
+
+
+def resolve_resume_profile(resume_text, input_hash, session_id=None):
+    """決定這次分析送出的履歷內容：回傳摘要紀錄，或 None 表示送出全文
+
+    auto：已有摘要時直接使用；同一份履歷搭配第二份不同職缺時才在背景產生摘要（只比對一次的
+    履歷不多花一次呼叫），產生期間照常送全文，不拉長這次分析的時間，完成後的職缺只送摘要。
+    always：沒有摘要時先產生再分析，每次都使用摘要。off：一律送全文。
+    摘要產生失敗時送出全文，不影響分析。
+    """
+    if RESUME_PROFILE_MODE not in ("auto", "always") or estimate_tokens(resume_text) < RESUME_PROFILE_MIN_TOKENS:
+        metrics.RESUME_PROFILES.inc(result="full_text")
+        return None
+    profile_key = make_profile_key(resume_text, gemini_client.get_model_name())
+    uses = get_resume_usage().note(profile_key, input_hash)
+    cached_record = load_cached_result(profile_key, get_profile_cache())
+    if cached_record is not None:
+        metrics.RESUME_PROFILES.inc(result="profile_hit")
+        return cached_record
+    if RESUME_PROFILE_MODE == "always":
+        return generate_resume_profile(resume_text, session_id)
+    if uses >= 2:
+        schedule_resume_profile(profile_key, resume_text, session_id)
+    metrics.RESUME_PROFILES.inc(result="full_text")
+    return None
+
+
+def analyze_resume_job_match(resume_text, job_description, ui_language="中文", on_progress=None, on_warning=None,
+                             include_advice=True, session_id=None, on_queue=None):
+    """使用 Google Gemini API 分析履歷與職缺匹配度；失敗時拋出 AnalysisError
+
+    不依賴 Streamlit，可在命令列或背景工作中使用。on_warning(message) 用於回報
+    非致命的問題（例如回應被截斷）；priorities 的檢查只在完整分析時回報一次，
+    延遲產生單一建議類別時不會重複回報。include_advice 為 True 時產生全部建議類別，
+    False 時只產生分數部分，也可傳入 ADVICE_KEYS 的子集只產生指定類別（延遲產生模式）；
+    只有拆分子請求時才會省略建議。已產生的類別與分數一起快取，之後只補缺少的部分。
+    session_id 用於全域排隊的公平輪流，on_queue(position) 回報排隊名次（0 表示已開始）。
+    """
+
+    metrics.start_metrics_export()
+    with metrics.time_stage("total"):
+        return _analyze_resume_job_match(
+            resume_text, job_description, ui_language, on_progress, on_warning, include_advice, session_id, on_queue
+        )
+
+
+def _analyze_resume_job_match(resume_text, job_description, ui_language, on_progress, on_warning, include_advice,
+                              session_id, on_queue):
+    # 確保使用用戶選擇的 UI 語言作為輸出語言
+    output_language = ui_language
+    via_translation, split_requests, prompt_version = get_analysis_mode(output_language)
+
+    # 創建輸入的哈希值用於緩存（正規化空白，並包含輸出語言、模型與提示詞版本）
+    input_hash = make_cache_key(resume_text, job_description, output_language, gemini_client.get_model_name(), prompt_version)
+
+    # 只補產生建議類別時（延遲產生模式）不再重複檢查 priorities
+    priority_warning = on_warning if isinstance(include_advice, bool) else None
+    if include_advice is True:
+        wanted_advice = list(ADVICE_KEYS)
+    else:
+        wanted_advice = [key for key in ADVICE_KEYS if key in (include_advice or [])]
+
+    cached_result = load_cached_result(input_hash)
+    if cached_result is not None:
+        missing = missing_advice_sections(cached_result, output_language) if split_requests else []
+        sections = [key for key in wanted_advice if key in missing]
+        if not sections:
+            metrics.CACHE_LOOKUPS.inc(result="hit")
+            check_priorities(cached_result, job_description, priority_warning)
+            return cached_result
+        metrics.CACHE_LOOKUPS.inc(result="partial")
+    else:
+        metrics.CACHE_LOOKUPS.inc(result="miss")
+        sections = ["score", *wanted_advice] if split_requests else None
+
+    def generate():
+        model = initialize_gemini_client()
+        resume_profile = resolve_resume_profile(resume_text, input_hash, session_id)
+        system_prompt, user_prompt = build_prompts(
+            resume_text, job_description, output_language, via_translation, resume_profile,
+            prompt_count=len(sections) if split_requests else 1
+        )
+        generation_config = gemini_client.get_generation_config()
+
+        if split_requests:
+            # 分數與各建議類別並行產生，分數先行顯示；已快取的結果只補缺少的建議類別
+            result, truncated = run_split_generation(
+                model,
+                user_prompt,
+                output_language,
+                generation_config,
+                sections,
+                base=cached_result,
+                on_progress=on_progress,
+                on_warning=on_warning,
+                session_id=session_id,
+                on_queue=on_queue
+            )
+            if cached_result is not None:
+                # 產生期間其他請求可能已補上別的類別，寫回前再合併一次，避免互相覆蓋
+                latest = load_cached_result(input_hash)
+                if latest is not None and isinstance(latest.get("advice"), dict):
+                    result = merge_sections(result, {"latest": latest["advice"]}, output_language)
+        else:
+            # 使用 Gemini 生成回應並逐段解析 JSON（翻譯模式下中間結果為中文，不做漸進顯示）
+            full_prompt = f"{system_prompt}\n\n{user_prompt}"
+            result, truncated = run_generation(
+                model,
+                full_prompt,
+                generation_config,
+                on_progress=None if via_translation else on_progress,
+                session_id=session_id,
+                on_queue=on_queue
+            )
+        if truncated and on_warning is not None:
+            on_warning("⚠️ JSON 回應可能被截斷，已保留完整的部分")
+
+        # 英文翻譯模式（備援）：將中文回應翻譯為英文
+        if via_translation:
+            with metrics.time_stage("translation"):
+                # 將中文回應轉換為JSON字串
+                chinese_json = json.dumps(result, ensure_ascii=False, indent=2)
+                # 翻譯為英文
+                english_json = translate_chinese_to_english(chinese_json)
+            # 解析翻譯後的JSON
+            try:
+                result = json.loads(english_json)
+            except json.JSONDecodeError as e:
+                metrics.ERRORS.inc(stage="translation")
+                raise AnalysisError(f"❌ JSON 解析失敗: {str(e)}", raw_response=english_json) from e
+
+        # 將結果存入緩存（截斷的結果不緩存，下次仍會重新分析）；產生失敗的建議類別不在結果中，
+        # 只快取成功的部分，之後相同輸入的請求會由 missing_advice_sections 找出並只補產生這些類別
+        if not truncated:
+            save_result(input_hash, result)
+        return result
+
+    # 相同輸入、相同產生範圍的分析同時進行時只呼叫一次 Gemini，其餘呼叫端等待並共用結果
+    # （等待者不會收到串流中的部分結果）
+    result, shared = get_single_flight().do((input_hash, tuple(sections or ())), generate)
+    if shared:
+        # 共用的結果可能被其他 session 修改（例如補上建議類別），每個呼叫端各自一份
+        result = copy.deepcopy(result)
+    check_priorities(result, job_description, priority_warning)
+    return result
+
+
+def collect_runtime_metrics():
+    """匯出指標時一併輸出快取、排隊、請求合併與輸入壓縮的累計狀態"""
+    cache_stats = get_result_cache().stats()
+    profile_cache_stats = get_profile_cache().stats()
+    admission_stats = get_admission_controller().stats()
+    single_flight = get_single_flight()
+    return [
+        ("jobmatch_result_cache_hit_ratio", "Hit ratio of the in-memory result cache", "gauge", cache_stats["hit_rate"]),
+        ("jobmatch_result_cache_entries", "Entries in the in-memory result cache", "gauge", cache_stats["entries"]),
+        ("jobmatch_result_cache_bytes", "Bytes used by the in-memory result cache", "gauge", cache_stats["bytes"]),
+        ("jobmatch_profile_cache_hit_ratio", "Hit ratio of the in-memory resume profile cache", "gauge",
+         profile_cache_stats["hit_rate"]),
+        ("jobmatch_profile_cache_entries", "Entries in the in-memory resume profile cache", "gauge",
+         profile_cache_stats["entries"]),
+        ("jobmatch_admission_active", "Gemini calls currently running", "gauge", admission_stats["active"]),
+        ("jobmatch_admission_queued", "Gemini calls waiting for admission", "gauge", admission_stats["queued"]),
+        ("jobmatch_single_flight_coalesced_total", "Analyses that reused an identical in-flight call", "counter",
+         single_flight.coalesced),
+        ("jobmatch_single_flight_in_flight", "Distinct analyses currently running", "gauge", single_flight.in_flight()),
+        ("jobmatch_compaction_saved_tokens_total", "Estimated input tokens removed by compaction", "counter",
+         get_compaction_stats()["saved_tokens"]),
+    ]
+
+
+metrics.get_registry().register_collector(collect_runtime_metrics)
@@ -1,15 +1,24 @@
+import functools
+from collections import OrderedDict
+
 import streamlit as st
-import json
-import google.generativeai as genai
-import os
-import hashlib
-from dotenv import load_dotenv
-import time
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from ui_texts import get_ui_texts
 from styles import apply_global_styles
-
-# 載入環境變數
-load_dotenv()
+from batch import (
+    split_job_descriptions, make_job_title, run_batch, rank_results, prescore_jobs, get_prescore_top_k, find_skill_gaps
+)
+import analyzer
+import gemini_client
+import metrics
+from analyzer import AnalysisError, MissingAPIKeyError
+from cache import make_cache_key
+from ingest import SUPPORTED_EXTENSIONS, extract_files
+from prompts import get_advice_titles
+from rendering import (
+    build_results_html, build_results_html_cached, build_advice_title_html, build_advice_box_html_cached,
+    result_fingerprint
+)
 
 # 頁面配置
 st.set_page_config(
@@ -22,755 +31,330 @@ st.set_page_config(
 # 應用全域 CSS 樣式
 apply_global_styles()
 
+# 在背景預熱 Gemini 連線（每個行程只執行一次）
+gemini_client.warm_up()
 
-def initialize_gemini_client():
-    """初始化 Google Gemini 客戶端"""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        st.error("⚠️ 請設置 GOOGLE_API_KEY 環境變數")
-        st.info("請到 https://makersuite.google.com/app/apikey 申請免費 API key，然後在 .env 文件中設置")
-        return None
-    
-    try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
-        return model
-    except Exception as e:
-        st.error(f"❌ Gemini 客戶端初始化失敗: {str(e)}")
-        return None
-
-
-def translate_chinese_to_english(chinese_response):
-    """使用 Gemini API 將中文回應翻譯成英文"""
-    try:
-        # 創建翻譯提示詞（使用英文）
-        translation_prompt = f"""
-Please translate the following Chinese JSON response to English, maintaining exactly the same JSON structure and format, only translating the text content:
-
-{chinese_response}
-
-Requirements:
-1. Keep JSON structure exactly the same - especially the "advice" section structure
-2. Translate all Chinese text to English
-3. Keep numbers, percentages, and format unchanged
-4. Use standard English translations for professional terms
-5. For the "advice" section, maintain the exact same structure with proper subtitles and bullet points
-6. Ensure advice items with "name" and "items" structure are preserved exactly
-7. Return only the translated JSON, no other text
-
-CRITICAL: The "advice" section must maintain its structured format with subtitles and bullet points. Do not flatten or simplify the structure.
-
-Specific translation guidelines:
-- "面試準備建議" → "Interview Preparation"
-- "潛在問題" → "Potential Questions" 
-- "回答方向" → "Response Direction"
-- "作品集建議" → "Portfolio Suggestions"
-- "小專案題目" → "Mini Project Ideas"
-- "展示建議" → "Showcase Suggestions"
-- "技能差距分析" → "Skill Gap Analysis"
-- "缺少技能" → "Missing Skills"
-- "學習方向" → "Learning Directions"
+# 依環境變數啟動指標端點或文字檔匯出（每個行程只執行一次）
+metrics.start_metrics_export()
 
-Ensure ALL sub-items are translated and preserved, including:
-- Skill Gap Analysis: Both "Missing Skills" and "Learning Directions" sections
-- Interview Preparation: Both "Potential Questions" and "Response Direction" sections
-- Portfolio Suggestions: Both "Mini Project Ideas" and "Showcase Suggestions" sections
+# 結果區域以 fragment 隔離：展開建議、切換職缺時只重新執行該區域
+# （Streamlit 1.37 以前為 experimental_fragment，更舊的版本沒有時改為整頁重新執行）
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
 
-CRITICAL: Each advice section must have its sub-sections with proper "name" and "items" structure. Do not flatten the structure.
-"""
-        
-        # 調用 Gemini API
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
-        response = model.generate_content(translation_prompt)
-        
-        # 解析回應
-        translated_text = response.text.strip()
-        
-        # 清理回應，移除可能的markdown格式
-        if translated_text.startswith('```json'):
-            translated_text = translated_text[7:]
-        if translated_text.endswith('```'):
-            translated_text = translated_text[:-3]
-        translated_text = translated_text.strip()
-        
-        # 嘗試解析JSON以驗證格式
-        import json
-        json.loads(translated_text)
-        
-        return translated_text
-        
-    except Exception as e:
-        print(f"翻譯錯誤: {e}")
-        print(f"原始回應: {response.text if 'response' in locals() else 'No response'}")
-        return chinese_response  # 如果翻譯失敗，返回原文
-
-def analyze_resume_job_match(resume_text, job_description, ui_language="中文"):
-    """使用 Google Gemini API 分析履歷與職缺匹配度"""
-    
-    # 確保使用用戶選擇的 UI 語言作為輸出語言
-    output_language = ui_language
-    
-    # 創建輸入的哈希值用於緩存（包含輸出語言）
-    input_hash = hashlib.md5(f"{resume_text}_{job_description}_{output_language}".encode()).hexdigest()
-    
-    # 檢查是否已有緩存結果
-    if 'analysis_cache' not in st.session_state:
-        st.session_state.analysis_cache = {}
-    
-    if input_hash in st.session_state.analysis_cache:
-        return st.session_state.analysis_cache[input_hash]
-    
-    model = initialize_gemini_client()
-    if not model:
-        return None
-    
-    # 根據語言定義建議標題
-    if output_language == "中文":
-        advice_titles = {
-            "resume_optimization": "履歷優化",
-            "cover_letter": "求職信建議", 
-            "skill_gap": "技能差距分析",
-            "interview": "面試準備建議",
-            "portfolio": "作品集建議"
-        }
-    else:
-        advice_titles = {
-            "resume_optimization": "Resume Optimization",
-            "cover_letter": "Cover Letter Suggestions",
-            "skill_gap": "Skill Gap Analysis", 
-            "interview": "Interview Preparation",
-            "portfolio": "Portfolio Suggestions"
-        }
-    
-    # 定義系統提示詞（只保留中文版本）
-    system_prompt = """你是專業職涯顧問。請閱讀【履歷】與【職缺】，並 ONLY 以 JSON 回覆，符合下列 schema：
+# 每個 session 保留最近幾份單一職缺分析（以輸入雜湊為鍵值，重新分析相同輸入時直接顯示）
+SESSION_ANALYSIS_LIMIT = 5
 
-{{
-  "match_score": 整數0-100（整體匹配度，必須綜合考慮所有技能匹配情況，如果職缺是專業領域但履歷沒有相關背景，分數應該很低）,
-  "confidence": 浮點0-1,
-  "match_explanation": "請根據履歷與職缺的比對結果，撰寫一段不超過 3 段的自然語言說明，用來在 UI 呈現匹配度摘要。請使用簡單清楚、人性化的語氣",
-  "priorities": [{{"name":字串,"weight":0-1,"explanation":字串}}]（weight是匹配度分數，不是權重！如果履歷沒有相關經驗，weight應該很低0-0.2）,
-  "matched": [{{"item":"技能名稱","evidence":"一段完整的summary描述，說明履歷中如何符合此技能要求，不要列點，要寫成流暢的段落"}}],
-  "missing": [{{"item":字串,"action":字串}}],
-  "advice": {{
-    "{resume_optimization}": [
-      {{"name": "履歷優化", "items": [
-        "具體建議項目1",
-        "具體建議項目2", 
-        "具體建議項目3"
-      ]}}
-    ],
-    "{cover_letter}": [
-      {{"name": "求職信建議", "items": [
-        "開場句：具體內容",
-        "中段敘述：具體內容",
-        "結尾句：具體內容"
-      ]}}
-    ],
-    "{skill_gap}": [
-      {{"name": "缺少技能", "items": [
-        "技能項目1",
-        "技能項目2", 
-        "技能項目3"
-      ]}},
-      {{"name": "學習方向", "items": [
-        "學習建議1",
-        "學習建議2",
-        "學習建議3"
-      ]}}
-    ],
-    "{interview}": [
-      {{"name": "潛在問題", "items": [
-        "問題1",
-        "問題2",
-        "問題3"
-      ]}},
-      {{"name": "回答方向", "items": [
-        "回答策略1",
-        "回答策略2",
-        "回答策略3"
-      ]}}
-    ],
-    "{portfolio}": [
-      {{"name": "小專案題目", "items": [
-        "專案題目1",
-        "專案題目2",
-        "專案題目3"
-      ]}},
-      {{"name": "展示建議", "items": [
-        "展示建議1",
-        "展示建議2",
-        "展示建議3"
-      ]}}
-    ]
-  }}
-}}
 
-重要規則：
-- 所有回應文字必須完全使用中文，不能混合其他語言，不使用敬語（您）
-- 公司名稱、產品名稱、技術術語等專有名詞保持原文，但描述文字必須使用中文
-- match_explanation：請根據履歷與職缺的比對結果，撰寫一段不超過 3 段的自然語言說明，用來在 UI 呈現匹配度摘要。請使用簡單清楚、人性化的語氣
-- priorities：必須只從職缺內容中挑出重要關鍵技能，不能包含職缺中未提及的技能！每個技能的name和explanation都必須使用中文描述，不能出現英文。weight是匹配度分數（0-1），不是權重！如果履歷沒有相關經驗，weight應該很低（0-0.2）。explanation要說明為何得分是這樣。特別注意：如果職缺明確要求核心技能（如程式語言、技術工具、監管合規、專業認證等），而履歷中沒有相關經驗，該技能匹配度應該給0-20%，整體匹配度也會大幅降低。
-- matched：標題要是關鍵技能，使用中文描述；evidence必須是一段完整的summary描述，說明履歷中如何符合此技能要求，不要列點，要寫成流暢的段落。所有描述文字必須使用中文，不能出現英文描述。絕對不能直接複製貼上履歷內容，必須是整理過後的摘要和總結。
-- missing：不用每個都寫「建議行動：在履歷中補充相關經驗」，文字要寫的有邏輯，有頭有尾；標題要寫的是有邏輯的履歷提到的經歷、技能，要讓人看得懂，使用中文描述
-         - advice：必須包含以下五個類別，每個類別使用固定的標題結構，AI只需要填入具體內容：
-           * 履歷優化：使用固定標題「履歷優化」，items中填入3-5個具體的履歷改進建議，每個建議都要完全不同且具體，不能有任何重複的內容或相似的建議
-           * 求職信建議：使用固定標題「求職信建議」，items中必須包含「開場句：」、「中段敘述：」、「結尾句：」三個固定格式，冒號後填入具體內容，每個部分都要完全不同，不能有任何重複
-           * 技能差距分析：使用固定標題「缺少技能」和「學習方向」，每個標題的items中填入3-5個具體項目，所有項目都必須完全不同，不能有任何重複或相似的內容
-           * 面試準備建議：使用固定標題「潛在問題」和「回答方向」，每個標題的items中填入3-5個具體項目，所有項目都必須完全不同，不能有任何重複
-           * 作品集建議：使用固定標題「小專案題目」和「展示建議」，每個標題的items中填入3-5個具體項目，所有項目都必須完全不同，不能有任何重複
-           * 重要：所有標題名稱必須完全按照上述固定格式，不能改變！AI只需要在items中填入具體內容，所有內容必須完全使用中文
-           * 去重要求：履歷優化建議中，每一條都必須針對不同的細節（例如技能工具、使用方式、結果影響、具體任務），不能單純換句話說，也不能針對同一經驗做出多條類似建議。如果履歷中只有單一工作經歷，請避免重複針對同一段經歷提出建議，建議應多角度、廣泛提出，包括整體格式、成果量化、工作分類、前後脈絡等。請在每生成一條建議前，自我檢查是否與前面內容語意相近，如果是就跳過。所有advice項目都必須完全不同，不能有任何重複或相似的內容
-- 僅回 JSON，不要其他文字
-
-特別注意：
-1. priorities 中的技能必須是職缺描述中明確提及或要求的技能，不能因為履歷中有相關經驗就加入職缺關鍵技能中！
-2. weight評分範例：
-   - 履歷有相關經驗：weight = 0.7-0.9（70-90%）
-   - 履歷沒有相關經驗：weight = 0.0-0.2（0-20%）
-   - 錯誤範例：履歷沒有監管合規經驗，但給weight = 0.9（90%）❌
-   - 正確範例：履歷沒有監管合規經驗，給weight = 0.1（10%）✅
-3. 整體匹配度計算規則：
-   - 如果職缺是專業領域（法務、醫療、金融、會計、工程等）但履歷完全沒有相關背景：整體匹配度不超過30-40%
-   - 如果職缺要求多個核心技能但履歷大部分都沒有：整體匹配度不超過40-50%
-   - 如果履歷有相關背景但經驗不足：整體匹配度50-70%
-   - 如果履歷經驗充足且技能匹配：整體匹配度70-90%
-4. 經驗年數評估規則：
-   - 只有當職缺有提到此年數要求才需要考慮此規則
-   - 職缺要求 X 年經驗，履歷有 Y 年經驗：
-     * Y >= X：給 90-100%（經驗充足或超過要求）
-     * Y >= X*0.8：給 70-85%（經驗接近要求）
-     * Y >= X*0.6：給 50-70%（經驗不足但可接受）
-     * Y < X*0.6：給 30-50%（經驗嚴重不足）
-   - 必須在 explanation 中明確說明年數差距對分數的影響
-5. 技能匹配評估規則：
-   - 履歷明確提到相關經驗：給 70-90%
-   - 履歷有相關但描述較少：給 50-70%
-   - 履歷沒有明確提到：給 20-40%
-   - 如果職缺要求特定核心技能（如程式語言、技術工具、監管合規、專業認證等），而履歷完全沒有相關經驗：給 0-20%
-   - 不要過於保守，如果履歷中有相關經驗就應該給合理的高分
-   - 如果職缺是專業領域職位（如技術、法務、醫療、金融、會計等）但履歷沒有相關專業背景，整體匹配度應該顯著降低（通常不超過30-40%）
-
-一致性要求：
-- 相同的履歷和職缺描述必須產生相同的分數和評估結果
-- 使用結構化的評估標準，避免主觀判斷
-- 優先考慮客觀指標（年數、技能匹配度）而非主觀感受
-- 嚴格遵守語言一致性：所有回應必須完全使用中文，不能出現任何其他語言""".format(
-            resume_optimization=advice_titles["resume_optimization"],
-            cover_letter=advice_titles["cover_letter"],
-            skill_gap=advice_titles["skill_gap"],
-            interview=advice_titles["interview"],
-            portfolio=advice_titles["portfolio"]
-        )
-
-    # 定義用戶提示詞（只保留中文版本）
-    user_prompt = f"""
-履歷內容：
-{resume_text}
-
-職缺描述：
-{job_description}
-
-請分析匹配度並提供建議。
-"""
+def get_session_id():
+    """目前 Streamlit session 的識別碼（全域排隊時各 session 輪流放行）"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
 
+def analyze_resume_job_match(resume_text, job_description, ui_language="中文", on_progress=None, include_advice=True,
+                             on_queue=None, on_warning=st.warning):
+    """使用 Google Gemini API 分析履歷與職缺匹配度，失敗時在頁面顯示錯誤並回傳 None"""
     try:
-        # 創建完整的提示詞
-        full_prompt = f"{system_prompt}\n\n{user_prompt}"
-        
-        # 使用 Gemini 生成回應
-        response = model.generate_content(
-            full_prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.1,  # 降低溫度以提高一致性
-                max_output_tokens=4000,  # 增加 token 限制以避免截斷
-                top_p=0.8,  # 限制詞彙選擇範圍
-                top_k=20,   # 限制候選詞數量
-            )
+        return analyzer.analyze_resume_job_match(
+            resume_text,
+            job_description,
+            ui_language,
+            on_progress=on_progress,
+            on_warning=on_warning,
+            include_advice=include_advice,
+            session_id=get_session_id(),
+            on_queue=on_queue
         )
-        
-        response_text = response.text
-        
-        # 嘗試解析 JSON
-        try:
-            # 檢查回應是否為空
-            if not response_text or response_text.strip() == "":
-                st.error("❌ AI 回應為空，請檢查 API 設置")
-                return None
-            
-            # 清理回應文本，提取 JSON 部分
-            json_text = ""
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                if json_end > json_start:
-                    json_text = response_text[json_start:json_end].strip()
-            elif "{" in response_text and "}" in response_text:
-                json_start = response_text.find("{")
-                json_end = response_text.rfind("}") + 1
-                json_text = response_text[json_start:json_end]
-            else:
-                json_text = response_text.strip()
-            
-            # 清理無效的控制字符
-            import re
-            # 移除或替換無效的控制字符（除了 \n, \r, \t）
-            json_text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', json_text)
-            # 確保引號正確配對
-            json_text = json_text.replace('"', '"').replace('"', '"')
-            json_text = json_text.replace(''', "'").replace(''', "'")
-            
-            # 檢查提取的 JSON 是否為空
-            if not json_text:
-                st.error("❌ 無法從 AI 回應中提取 JSON 內容")
-                st.text("原始回應:")
-                st.text(response_text)
-                return None
-            
-            # 檢查 JSON 是否被截斷
-            if json_text.count("{") != json_text.count("}"):
-                st.warning("⚠️ JSON 回應可能被截斷，嘗試修復...")
-                # 嘗試修復截斷的 JSON
-                if json_text.count("{") > json_text.count("}"):
-                    # 缺少右括號，嘗試補全
-                    missing_braces = json_text.count("{") - json_text.count("}")
-                    # 簡單補全：添加缺失的右括號
-                    json_text += "}" * missing_braces
-                    # 如果最後一個字符不是 }，添加一個
-                    if not json_text.endswith("}"):
-                        json_text += "}"
-                else:
-                    # 多餘的右括號，移除
-                    extra_braces = json_text.count("}") - json_text.count("{")
-                    for _ in range(extra_braces):
-                        json_text = json_text.rsplit("}", 1)[0]
-            
-            # 如果 JSON 仍然不完整，嘗試添加基本的結束結構
-            if not json_text.strip().endswith("}"):
-                # 檢查是否缺少基本的結束結構
-                if '"advice"' in json_text and not json_text.strip().endswith("}"):
-                    # 嘗試添加基本的結束結構
-                    json_text = json_text.rstrip() + '}}'
-                elif '"missing"' in json_text and not json_text.strip().endswith("}"):
-                    json_text = json_text.rstrip() + '}'
-                elif '"matched"' in json_text and not json_text.strip().endswith("}"):
-                    json_text = json_text.rstrip() + '}'
-                elif '"priorities"' in json_text and not json_text.strip().endswith("}"):
-                    # 如果截斷在 priorities 部分，嘗試補全
-                    if json_text.count("[") > json_text.count("]"):
-                        json_text = json_text.rstrip() + ']'
-                    json_text = json_text.rstrip() + '}'
-            
-            result = json.loads(json_text)
-            
-            # 如果是英文版本，需要翻譯中文回應
-            if output_language == "English":
-                print("開始翻譯中文回應為英文...")
-                # 將中文回應轉換為JSON字串
-                chinese_json = json.dumps(result, ensure_ascii=False, indent=2)
-                print(f"中文JSON長度: {len(chinese_json)}")
-                # 翻譯為英文
-                english_json = translate_chinese_to_english(chinese_json)
-                print(f"英文JSON長度: {len(english_json)}")
-                # 解析翻譯後的JSON
-                result = json.loads(english_json)
-                print("翻譯完成！")
-            
-            # 將結果存入緩存
-            st.session_state.analysis_cache[input_hash] = result
-            return result
-            
-        except json.JSONDecodeError as e:
-            st.error(f"❌ JSON 解析失敗: {str(e)}")
-            st.text("提取的 JSON 文本:")
-            st.text(json_text)
+    except MissingAPIKeyError as e:
+        st.error(e.message)
+        st.info("請到 https://makersuite.google.com/app/apikey 申請免費 API key，然後在 .env 文件中設置")
+        return None
+    except AnalysisError as e:
+        st.error(e.message)
+        if e.raw_response:
             st.text("原始回應:")
-            st.text(response_text)
-            return None
-            
-    except Exception as e:
-        st.error(f"❌ API 調用失敗: {str(e)}")
+            st.text(e.raw_response)
         return None
 
-def render_score_block(result, texts, language):
-    """渲染匹配度分數區塊"""
-    match_score = result.get('match_score', 0)
-    match_explanation = result.get('match_explanation', '')
-    
-    # 統一匹配度說明的字體大小
-    font_size = "0.9rem"
-    
-    # 處理匹配度說明，確保所有段落都有統一樣式
-    if match_explanation:
-        # 將說明文字分割成段落
-        paragraphs = match_explanation.split('\n\n')
-        explanation_html = ""
-        for paragraph in paragraphs:
-            if paragraph.strip():
-                explanation_html += f'<p style="font-size: {font_size}; margin: 0.5rem 0; opacity: 0.8; line-height: 1.6;">{paragraph.strip()}</p>'
-    else:
-        explanation_html = ""
-    
-    st.markdown(f"""
-    <div class="score-container">
-        <h1 class="score-number">{match_score}%</h1>
-        <p class="score-label">{texts['match_score_label']}</p>
-        {explanation_html}
-    </div>
-    """, unsafe_allow_html=True)
-    
-def render_priorities(result, texts, language):
-    """渲染職缺關鍵技能區塊"""
-    if 'priorities' not in result or not result['priorities']:
+def render_lazy_advice(result, texts, language, advice_loader, key_prefix):
+    """延遲產生模式：每個建議類別先顯示為收合的標題，打開時才產生內容並併入 result"""
+    st.markdown(build_advice_title_html(texts), unsafe_allow_html=True)
+    
+    for key, title in get_advice_titles(language).items():
+        if not st.toggle(texts[f'advice_{key}'], key=f"{key_prefix}_advice_{key}"):
+            continue
+        advice = result.get('advice') if isinstance(result.get('advice'), dict) else {}
+        if title not in advice:
+            with st.spinner(texts['advice_generating']):
+                updated = advice_loader(key)
+            if not updated or not isinstance(updated.get('advice'), dict):
+                continue
+            # 直接更新 session 中的結果，下次重新執行時不必再產生
+            result['advice'] = updated['advice']
+            advice = updated['advice']
+        if advice.get(title):
+            st.markdown(build_advice_box_html_cached({title: advice[title]}, texts, language), unsafe_allow_html=True)
+
+def display_results(result, language="中文", partial=False, advice_loader=None, key_prefix="result", result_hash=None):
+    """顯示分析結果（partial 為串流中的部分結果，只渲染已完成的區塊）
+
+    分數、重點技能、符合/缺少與建議組合成單一 HTML 文件，以一次 st.markdown 送出。
+    advice_loader(key) 不為 None 時以延遲產生模式顯示建議，回傳補上該類別後的結果。
+    result_hash 為完整結果的雜湊，提供時重新執行頁面直接取用已組合的 HTML。
+    """
+    if not result:
         return
+    if partial:
+        render_result_blocks(result, language, partial, advice_loader, key_prefix, result_hash)
+        return
+    # 串流中的部分結果會重複渲染多次，只記錄完整結果的渲染時間
+    with metrics.time_stage("render"):
+        render_result_blocks(result, language, partial, advice_loader, key_prefix, result_hash)
+
+def render_result_blocks(result, language, partial, advice_loader, key_prefix, result_hash):
+    # 根據語言設置文字
+    texts = get_ui_texts(language)
     
-    st.markdown(f"### {texts['priorities_title']}")
-    
-    # 顯示技能分數解釋
-    if 'score_explanation' in result and result['score_explanation']:
-        explanation_font_size = "1.0rem" if language == "English" else "0.9rem"
-        st.markdown(f"<p style='font-size: {explanation_font_size}; color: #666; margin-bottom: 1rem;'>{result['score_explanation']}</p>", unsafe_allow_html=True)
-    
-    # 顯示技能和權重
-    for i, priority in enumerate(result['priorities'], 1):
-        if isinstance(priority, dict):
-            name = priority.get('name', '')
-            weight = priority.get('weight', 0)
-            explanation = priority.get('explanation', '')
-            weight_percent = int(weight * 100)
-            color = "#28a745" if weight >= 0.7 else "#ffc107" if weight >= 0.5 else "#dc3545"
-            
-            st.markdown(f"""
-            <div style="background: #f8f9fa; padding: 0.8rem; margin: 0.3rem 0; border-radius: 6px; 
-                       border-left: 3px solid {color};">
-                <div style="margin-bottom: 0.3rem;">
-                    <span style="font-weight: 500;">{i}. {name}</span>
-                    <span style="font-weight: bold; color: {color}; float: right;">{weight_percent}%</span>
-                    <div style="clear: both;"></div>
-                </div>
-                <small style="color: #666; font-size: {'0.9rem' if language == 'English' else '0.85rem'};">{explanation}</small>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            # 兼容舊格式
-            st.markdown(f"<div class='priority-item'>{i}. {priority}</div>", unsafe_allow_html=True)
-    
-def render_matched_missing(result, texts):
-    """渲染符合和缺少的經驗區塊"""
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown(f"### {texts['matched_title']}")
-        if 'matched' in result and result['matched']:
-            for item in result['matched']:
-                # 處理新格式（有item和evidence）或舊格式
-                if isinstance(item, dict) and 'item' in item and 'evidence' in item:
-                    evidence = item['evidence']
-                    # 檢查evidence是字串還是列表
-                    if isinstance(evidence, list):
-                        # 如果是列表，合併成一個段落
-                        evidence_text = " ".join(evidence)
-                    else:
-                        # 如果是字串，直接使用
-                        evidence_text = evidence
-                    
-                    st.markdown(f'''
-                    <div class="matched-item">
-                        <strong>{item["item"]}</strong><br>
-                        <span style="color: #666; font-size: 0.9rem; line-height: 1.5;">{evidence_text}</span>
-                    </div>
-                    ''', unsafe_allow_html=True)
-                elif isinstance(item, dict) and 'title' in item and 'description' in item:
-                    st.markdown(f'<div class="matched-item"><strong>{item["title"]}</strong><br>{item["description"]}</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown(f'<div class="matched-item">{item}</div>', unsafe_allow_html=True)
+    include_advice = advice_loader is None
+    if partial or result_hash is None:
+        results_html = build_results_html(result, texts, language, partial, include_advice=include_advice)
+    else:
+        results_html = build_results_html_cached(result, texts, language, result_hash, include_advice=include_advice)
+    st.markdown(results_html, unsafe_allow_html=True)
+    if advice_loader is not None and not partial:
+        render_lazy_advice(result, texts, language, advice_loader, key_prefix)
+
+def read_uploaded_files(uploaded_files, texts):
+    """擷取上傳檔案（PDF、DOCX、HTML、TXT）的文字，回傳 [(檔名, 文字)]
+
+    擷取在背景行程中進行，內容相同的檔案（跨 session、跨批次）直接使用快取；
+    無法擷取或沒有文字的檔案顯示提示後略過。
+    """
+    if not uploaded_files:
+        return []
+    with st.spinner(texts['extracting_files']):
+        extracted = extract_files([(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files])
+    files = []
+    for item in extracted:
+        if item.error:
+            st.error(texts['file_extract_failed'].format(name=item.name, error=item.error))
+        elif not item.text:
+            st.warning(texts['file_empty'].format(name=item.name))
         else:
-            st.info(texts['no_matched'])
-    
-    with col2:
-        st.markdown(f"### {texts['missing_title']}")
-        if 'missing' in result and result['missing']:
-            for item in result['missing']:
-                # 處理新格式（有item和action）或舊格式
-                if isinstance(item, dict) and 'item' in item and 'action' in item:
-                    st.markdown(f'''
-                    <div class="missing-item">
-                        <strong>{item["item"]}</strong><br>
-                        <span style="color: #666;">{item["action"]}</span>
-                    </div>
-                    ''', unsafe_allow_html=True)
-                elif isinstance(item, dict) and 'title' in item and 'description' in item:
-                    st.markdown(f'<div class="missing-item"><strong>{item["title"]}</strong><br>{item["description"]}</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown(f'<div class="missing-item">{item}</div>', unsafe_allow_html=True)
+            files.append((item.name, item.text))
+    return files
+
+def use_uploaded_text(pasted_text, uploaded_file, texts):
+    """有上傳檔案時以擷取的文字取代貼上的內容，擷取失敗時沿用貼上的內容"""
+    files = read_uploaded_files([uploaded_file] if uploaded_file else [], texts)
+    return files[0][1] if files else pasted_text
+
+def collect_batch_jobs(batch_text, uploaded_files, texts):
+    """整理批次模式的職缺列表：貼上的文字與上傳的檔案"""
+    jobs = [(make_job_title(job), job) for job in split_job_descriptions(batch_text)]
+    jobs.extend(read_uploaded_files(uploaded_files, texts))
+    return jobs
+
+def render_batch_table(jobs, results, finished, texts, placeholder, prescores, selected, skill_gaps):
+    """渲染依匹配度排序的批次結果表格（未送 AI 分析的職缺只顯示估計分數與缺少的技能）"""
+    rows = []
+    for rank, (index, title, score) in enumerate(rank_results(jobs, results, prescores), 1):
+        if index not in selected:
+            status = texts['batch_status_skipped']
+        elif index not in finished:
+            status = texts['batch_status_pending']
+        elif score is None:
+            status = texts['batch_status_failed']
         else:
-            st.success(texts['all_skills_met'])
+            status = texts['batch_status_done']
+        rows.append({
+            texts['batch_column_rank']: rank,
+            texts['batch_column_job']: title,
+            texts['batch_column_score']: score,
+            texts['batch_column_prescore']: prescores[index],
+            texts['batch_column_missing_skills']: ", ".join(skill_gaps[index]),
+            texts['batch_column_status']: status,
+        })
+    placeholder.dataframe(rows, use_container_width=True, hide_index=True)
+
+def use_lazy_advice(language):
+    """是否以延遲產生模式顯示建議（需要拆分子請求，JOBMATCH_LAZY_ADVICE=0 可停用）"""
+    return analyzer.LAZY_ADVICE and analyzer.supports_lazy_advice(language)
+
+def make_advice_loader(resume_text, job_description, language):
+    """建立延遲產生建議類別用的函式"""
+    def load(key):
+        return analyze_resume_job_match(resume_text, job_description, language, include_advice=[key])
+    return load
+
+def run_batch_analysis(resume_text, jobs, language, texts, top_k):
+    """先以本地演算法初步排序，只將前 top_k 份送 AI 同時分析，即時更新排名表，完成後存入 session"""
+    prescores, selected_indices = prescore_jobs(resume_text, jobs, top_k)
+    skill_gaps = find_skill_gaps(resume_text, jobs)
+    selected = set(selected_indices)
+    results = [None] * len(jobs)
+    finished = set()
+    table_placeholder = st.empty()
+    progress_bar = st.progress(0.0)
+    render_batch_table(jobs, results, finished, texts, table_placeholder, prescores, selected, skill_gaps)
+    
+    def on_result(index, result):
+        results[index] = result
+        finished.add(index)
+        render_batch_table(jobs, results, finished, texts, table_placeholder, prescores, selected, skill_gaps)
+        progress_bar.progress(len(finished) / len(selected))
+    
+    # 背景執行緒不能操作頁面元素，直接使用分析核心，失敗的職缺在表格中標示
+    lazy = use_lazy_advice(language)
+    run_batch(
+        functools.partial(analyzer.analyze_resume_job_match, include_advice=not lazy, session_id=get_session_id()),
+        resume_text,
+        jobs,
+        language,
+        on_result=on_result,
+        indices=selected_indices
+    )
+    table_placeholder.empty()
+    progress_bar.empty()
+    st.session_state.batch_analysis = {
+        "jobs": jobs,
+        "results": results,
+        "result_hashes": [result_fingerprint(result) if result else None for result in results],
+        "language": language,
+        "prescores": prescores,
+        "skill_gaps": skill_gaps,
+        "selected": selected,
+        "resume_text": resume_text,
+        "lazy": lazy,
+    }
+
+@fragment
+def render_batch_results(texts):
+    """顯示批次排名，並可選擇單一職缺查看完整分析"""
+    batch = st.session_state.get('batch_analysis')
+    if not batch:
+        return
+    jobs, results, language = batch["jobs"], batch["results"], batch["language"]
+    prescores, selected = batch["prescores"], batch["selected"]
     
-def parse_advice_item(item, color, seen_items):
-    """智能解析單個建議項目，返回HTML"""
-    html = ""
+    st.markdown(f"### {texts['batch_ranking_title']}")
+    render_batch_table(jobs, results, selected, texts, st.empty(), prescores, selected, batch["skill_gaps"])
     
-    # 字典格式（包含 name 與 items）
-    if isinstance(item, dict) and 'name' in item and 'items' in item:
-        subtitle_name = item['name']
-        subtitle_items = item.get('items') or []
-        html = (
-            f"<div style='font-weight: 600; margin: 1.2rem 0 0.8rem 0; color: #333; "
-            f"font-size: 1rem; border-left: 3px solid {color}; padding-left: 0.8rem;'>{subtitle_name}</div>"
-        )
-        for sub_item in subtitle_items:
-            clean = str(sub_item).strip()
-            if not clean or len(clean) < 5 or clean in seen_items:
-                continue
-            seen_items.add(clean)
-            
-            # 智能判斷是否為標題：只有當冒號前的文字很短（通常是標題）且冒號後有內容時才當作標題
-            is_title = False
-            if "：" in clean:
-                t, c = clean.split("：", 1)
-                # 只有當冒號前的文字長度小於等於10個字符且冒號後有內容時才當作標題
-                if len(t.strip()) <= 10 and c.strip():
-                    is_title = True
-            elif ":" in clean:
-                t, c = clean.split(":", 1)
-                # 檢查是否為常見的英文標題
-                title_text = t.strip().lower()
-                common_titles = [
-                    "opening", "middle paragraph", "middle paragraphs", "closing", 
-                    "potential questions", "response direction", "mini project ideas", 
-                    "showcase suggestions", "missing skills", "learning directions",
-                    "opening statement", "body paragraph", "closing statement"
-                ]
-                if title_text in common_titles and c.strip():
-                    is_title = True
-                elif len(t.strip()) <= 12 and c.strip():
-                    is_title = True
-            
-            if is_title:
-                t, c = clean.split("：" if "：" in clean else ":", 1)
-                # 檢查是否已經處理過這個標題，避免重複
-                title_key = f"{t.strip()}:"
-                if title_key not in seen_items:
-                    seen_items.add(title_key)
-                html += (
-                    f"<div style='font-weight: 600; margin: 1rem 0 0.5rem 0; color: #333; "
-                    f"font-size: 0.95rem; border-left: 2px solid {color}; padding-left: 0.6rem;'>{t.strip()}：</div>"
-                )
-                if c.strip():
-                    html += (
-                        f"<div style='margin: 0.3rem 0; padding-left: 1.5rem; line-height: 1.6; font-size: 0.9rem;'>"
-                        f"<span style='color: {color}; font-weight: bold; margin-right: 0.5rem;'>•</span>{c.strip()}</div>"
-                    )
-            else:
-                # 當作普通 bullet 點處理
-                html += (
-                    f"<div style='margin: 0.3rem 0; padding-left: 1.5rem; line-height: 1.6; font-size: 0.9rem;'>"
-                    f"<span style='color: {color}; font-weight: bold; margin-right: 0.5rem;'>•</span>{clean}</div>"
-                )
-        return html
+    ranked = [row for row in rank_results(jobs, results, prescores) if row[2] is not None]
+    if not ranked:
+        return
+    selected = st.selectbox(
+        texts['batch_detail_label'],
+        ranked,
+        format_func=lambda row: f"{row[1]}（{row[2]}%）"
+    )
+    index = selected[0]
+    advice_loader = make_advice_loader(batch["resume_text"], jobs[index][1], language) if batch["lazy"] else None
+    display_results(
+        results[index], language, advice_loader=advice_loader, key_prefix=f"batch_{index}",
+        result_hash=batch["result_hashes"][index]
+    )
 
-    # 非字典格式，當作一般條目處理
-    clean = str(item).strip()
-    if not clean or len(clean) < 5 or clean in seen_items:
-        return ""
-    seen_items.add(clean)
-    
-    # 智能判斷是否為標題：只有當冒號前的文字很短（通常是標題）且冒號後有內容時才當作標題
-    is_title = False
-    if "：" in clean:
-        t, c = clean.split("：", 1)
-        # 只有當冒號前的文字長度小於等於8個字符且冒號後有內容時才當作標題
-        # 包含常見的標題詞，如 "開場句", "結尾句", "潛在問題", "回答方向" 等
-        if len(t.strip()) <= 8 and c.strip():
-            is_title = True
-    elif ":" in clean:
-        t, c = clean.split(":", 1)
-        # 檢查是否為常見的英文標題
-        title_text = t.strip().lower()
-        common_titles = [
-            "opening", "middle paragraph", "middle paragraphs", "closing", 
-            "potential questions", "response direction", "mini project ideas", 
-            "showcase suggestions", "missing skills", "learning directions",
-            "opening statement", "body paragraph", "closing statement"
-        ]
-        if title_text in common_titles and c.strip():
-            is_title = True
-        elif len(t.strip()) <= 15 and c.strip():
-            is_title = True
-    
-    if is_title:
-        t, c = clean.split("：" if "：" in clean else ":", 1)
-        # 檢查是否已經處理過這個標題，避免重複
-        title_key = f"{t.strip()}:"
-        if title_key not in seen_items:
-            seen_items.add(title_key)
-        section = (
-            f"<div style='font-weight: 600; margin: 1.2rem 0 0.5rem 0; color: #333; "
-            f"font-size: 1rem; border-left: 3px solid {color}; padding-left: 0.8rem;'>{t.strip()}：</div>"
-        )
-        if c.strip():
-            section += (
-                f"<div style='margin: 0.3rem 0; padding-left: 1.5rem; line-height: 1.6; font-size: 0.9rem;'>"
-                f"<span style='color: {color}; font-weight: bold; margin-right: 0.5rem;'>•</span>{c.strip()}</div>"
-            )
-            return section
+def make_input_key(resume_text, job_description, language):
+    """單一職缺分析的輸入雜湊（與結果快取相同的正規化、模型與提示詞版本）"""
+    prompt_version = analyzer.get_analysis_mode(language)[2]
+    return make_cache_key(resume_text, job_description, language, gemini_client.get_model_name(), prompt_version)
+
+def get_session_analyses():
+    """目前 session 保存的單一職缺分析：輸入雜湊 → 分析紀錄（最近使用的在最後）"""
+    if 'analyses' not in st.session_state:
+        st.session_state.analyses = OrderedDict()
+    return st.session_state.analyses
+
+def store_single_analysis(input_key, analysis):
+    """保存分析紀錄並設為目前顯示的結果，超過上限時移除最久未使用的紀錄"""
+    analyses = get_session_analyses()
+    analyses[input_key] = analysis
+    analyses.move_to_end(input_key)
+    while len(analyses) > SESSION_ANALYSIS_LIMIT:
+        analyses.popitem(last=False)
+    st.session_state.current_analysis = input_key
+
+def run_single_analysis(resume_text, job_description, language, texts, input_key):
+    """分析單一職缺並將結果存入 session"""
+    # 預留狀態與結果區域，串流時先顯示已完成的區塊
+    status_placeholder = st.empty()
+    results_placeholder = st.empty()
+    
+    def show_partial_results(partial_result):
+        with results_placeholder.container():
+            display_results(partial_result, language, partial=True)
+    
+    def show_queue_position(position):
+        # 全域排隊中顯示前面還有幾個請求，輪到時改回分析中
+        if position > 0:
+            status_placeholder.info(texts['queue_position'].format(position=position))
         else:
-            # 如果標題已存在，只返回內容部分
-            if c.strip():
-                return (
-                    f"<div style='margin: 0.3rem 0; padding-left: 1.5rem; line-height: 1.6; font-size: 0.9rem;'>"
-                    f"<span style='color: {color}; font-weight: bold; margin-right: 0.5rem;'>•</span>{c.strip()}</div>"
-                )
-            return ""
-    
-    return (
-        f"<div style='margin: 0.3rem 0; padding-left: 1.5rem; line-height: 1.6; font-size: 0.9rem;'>"
-        f"<span style='color: {color}; font-weight: bold; margin-right: 0.5rem;'>•</span>{clean}</div>"
+            status_placeholder.info(f"⏳ {texts['analyzing']}")
+    
+    lazy = use_lazy_advice(language)
+    # 警告與結果一起保存，重新執行頁面或展開建議時仍會顯示，且不會重複
+    warnings = []
+    status_placeholder.info(f"⏳ {texts['analyzing']}")
+    result = analyze_resume_job_match(
+        resume_text,
+        job_description,
+        language,
+        on_progress=show_partial_results,
+        include_advice=not lazy,
+        on_queue=show_queue_position,
+        on_warning=warnings.append
     )
-
-def get_advice_config(language):
-    """獲取建議配置"""
-    if language == "中文":
-        config = {
-            "履歷優化": {"color": "#dc3545", "key": "advice_resume_optimization"},
-            "求職信建議": {"color": "#007bff", "key": "advice_cover_letter"},
-            "技能差距分析": {"color": "#28a745", "key": "advice_skill_gap"},
-            "面試準備建議": {"color": "#6f42c1", "key": "advice_interview"},
-            "作品集建議": {"color": "#fd7e14", "key": "advice_portfolio"}
-        }
-    else:
-        config = {
-                    "Resume Optimization": {"color": "#dc3545", "key": "advice_resume_optimization"},
-                    "Cover Letter Suggestions": {"color": "#007bff", "key": "advice_cover_letter"},
-                    "Skill Gap Analysis": {"color": "#28a745", "key": "advice_skill_gap"},
-                    "Interview Preparation": {"color": "#6f42c1", "key": "advice_interview"},
-                    "Portfolio Suggestions": {"color": "#fd7e14", "key": "advice_portfolio"}
-                }
-            
-    # 為英文版本添加更多可能的標題變體
-    if language == "English":
-        additional_config = {
-            "Resume": {"color": "#dc3545", "key": "advice_resume_optimization"},
-            "Cover Letter": {"color": "#007bff", "key": "advice_cover_letter"},
-            "Skills": {"color": "#28a745", "key": "advice_skill_gap"},
-            "Interview": {"color": "#6f42c1", "key": "advice_interview"},
-            "Portfolio": {"color": "#fd7e14", "key": "advice_portfolio"},
-            # 添加更多可能的翻譯變體
-            "Skill Gap": {"color": "#28a745", "key": "advice_skill_gap"},
-            "Interview Prep": {"color": "#6f42c1", "key": "advice_interview"},
-            "Portfolio Tips": {"color": "#fd7e14", "key": "advice_portfolio"},
-            "Resume Tips": {"color": "#dc3545", "key": "advice_resume_optimization"},
-            "Cover Letter Tips": {"color": "#007bff", "key": "advice_cover_letter"},
-            # 添加翻譯後的具體子標題
-            "Missing Skills": {"color": "#28a745", "key": "advice_skill_gap"},
-            "Learning Directions": {"color": "#28a745", "key": "advice_skill_gap"},
-            "Potential Questions": {"color": "#6f42c1", "key": "advice_interview"},
-            "Response Direction": {"color": "#6f42c1", "key": "advice_interview"},
-            "Mini Project Ideas": {"color": "#fd7e14", "key": "advice_portfolio"},
-            "Showcase Suggestions": {"color": "#fd7e14", "key": "advice_portfolio"},
-            # 添加求職信建議的子標題
-            "Opening Statement": {"color": "#007bff", "key": "advice_cover_letter"},
-            "Body Paragraph": {"color": "#007bff", "key": "advice_cover_letter"},
-            "Closing Statement": {"color": "#007bff", "key": "advice_cover_letter"}
-        }
-        config.update(additional_config)
-    
-    return config
-
-def find_advice_config(title, advice_config):
-    """智能匹配建議配置"""
-    config = advice_config.get(title, {"color": "#666"})
-    
-    # 如果沒有找到完全匹配，嘗試部分匹配
-    if config == {"color": "#666"}:
-        for config_title, config_data in advice_config.items():
-            # 更寬鬆的匹配規則，支援翻譯後的標題變體
-            if (config_title.lower() in title.lower() or 
-                title.lower() in config_title.lower() or
-                any(word in title.lower() for word in config_title.lower().split()) or
-                # 支援常見的英文標題變體
-                title.lower() in ["skill gap", "interview prep", "portfolio", "resume opt", "cover letter"] or
-                any(word in title.lower() for word in ["skill", "gap", "analysis", "interview", "preparation", "portfolio", "suggestions", "resume", "optimization", "cover", "letter"])):
-                config = config_data
-                break
-    
-    return config
-
-def process_advice_dict(advice_content, texts, language):
-    """處理字典格式的建議內容"""
-    advice_html = ""
-    advice_config = get_advice_config(language)
-    global_seen_items = set()
-    
-    for title, items in advice_content.items():
-        if items and len(items) > 0:
-            config = find_advice_config(title, advice_config)
-            color = config["color"]
-            display_title = texts.get(config.get("key", ""), title)
-            
-            advice_html += f"<div style='color: {color}; margin-top: 0.8rem; margin-bottom: 0.5rem; font-size: 1.5rem; font-weight: 600;'>{display_title}</div>"
-            
-            # 處理每個建議項目
-            for i, item in enumerate(items):
-                # 如果是第一個項目且是主標題，跳過（避免重複）
-                if i == 0:
-                    clean_item = str(item).strip()
-                    # 只跳過完全匹配主標題的情況，避免過度過濾
-                    if clean_item == display_title:
-                        continue
-                
-                # 單一渲染：統一交由 parse_advice_item 處理，避免重複
-                advice_html += parse_advice_item(item, color, global_seen_items)
-    
-    return advice_html
-
-
-def process_advice_string(advice_content):
-    """處理字符串格式的建議內容"""
-    return advice_content
-
-def process_advice_list(advice_content):
-    """處理列表格式的建議內容"""
-    advice_html = "<ul>"
-    for item in advice_content:
-        advice_html += f"<li>{item}</li>"
-    advice_html += "</ul>"
-    return advice_html
-
-def render_advice(result, texts, language):
-    """渲染AI建議區塊"""
-    if 'advice' not in result or not result['advice']:
-        return
-    
-    st.markdown(f"<div style='font-size: 1.5rem; font-weight: 600; margin: 1.5rem 0 1rem 0; color: #1a1a1a;'>{texts['advice_title']}</div>", unsafe_allow_html=True)
-    
-    advice_content = result['advice']
     
-    # 根據內容類型選擇處理方式
-    if isinstance(advice_content, dict):
-        advice_html = process_advice_dict(advice_content, texts, language)
-    elif isinstance(advice_content, str):
-        advice_html = process_advice_string(advice_content)
-    elif isinstance(advice_content, list):
-        advice_html = process_advice_list(advice_content)
-    else:
-        advice_html = str(advice_content)
-    
-    st.markdown(f'<div class="advice-box">{advice_html}</div>', unsafe_allow_html=True)
-
-def display_results(result, language="中文"):
-    """顯示分析結果"""
+    # 清除串流中的部分結果，改由下方顯示完整結果
+    status_placeholder.empty()
+    results_placeholder.empty()
     if not result:
+        for warning in warnings:
+            st.warning(warning)
+        st.session_state.pop('current_analysis', None)
+        st.error(texts['analysis_failed'])
         return
     
-    # 根據語言設置文字
-    texts = get_ui_texts(language)
+    # 保存結果，讓展開建議等操作重新執行頁面時仍能顯示
+    store_single_analysis(input_key, {
+        "result": result,
+        "result_hash": result_fingerprint(result),
+        "language": language,
+        "resume_text": resume_text,
+        "job_description": job_description,
+        "lazy": lazy,
+        "warnings": warnings,
+    })
+
+@fragment
+def render_single_result(texts):
+    """顯示保存在 session 中的單一職缺分析結果"""
+    analysis = get_session_analyses().get(st.session_state.get('current_analysis'))
+    if not analysis:
+        return
+    language = analysis["language"]
+    
+    # 固定使用中文顯示結果
+    st.success(texts['analysis_complete'])
+    for warning in analysis.get("warnings", ()):
+        st.warning(warning)
+    advice_loader = None
+    if analysis["lazy"]:
+        advice_loader = make_advice_loader(analysis["resume_text"], analysis["job_description"], language)
+    display_results(
+        analysis["result"], language, advice_loader=advice_loader, key_prefix="single",
+        result_hash=analysis["result_hash"]
+    )
     
-    # 渲染各個區塊
-    render_score_block(result, texts, language)
-    render_priorities(result, texts, language)
-    render_matched_missing(result, texts)
-    render_advice(result, texts, language)
+    # 重新分析按鈕
+    st.markdown("<br>", unsafe_allow_html=True)
+    col_new1, col_new2, col_new3 = st.columns([1, 2, 1])
+    with col_new2:
+        if st.button(texts['analyze_another'], use_container_width=True):
+            # 只清除目前顯示的結果，保存的分析仍可在重新送出相同輸入時直接使用；
+            # 在 fragment 中也要整頁重新執行，才會清掉結果並回到輸入區
+            st.session_state.pop('current_analysis', None)
+            st.rerun()
 
 def main():
     # 固定使用中文
@@ -783,58 +367,101 @@ def main():
     st.markdown(f'<h1 class="main-header">{texts["app_title"]}</h1>', unsafe_allow_html=True)
     st.markdown(f'<p class="subtitle">{texts["app_subtitle"]}</p>', unsafe_allow_html=True)
     
-    # 主要輸入區域
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown(f"### {texts['resume_title']}")
-        resume_text = st.text_area(
-            texts['resume_placeholder'],
-            height=300,
-            placeholder=texts['resume_example']
-        )
-    
-    with col2:
-        st.markdown(f"### {texts['job_title']}")
-        job_description = st.text_area(
-            texts['job_placeholder'],
-            height=300,
-            placeholder=texts['job_example']
-        )
+    # 分析模式：單一職缺或批次比較
+    mode = st.radio(
+        texts['mode_label'],
+        [texts['mode_single'], texts['mode_batch']],
+        horizontal=True
+    )
+    batch_mode = mode == texts['mode_batch']
     
-    # 分析按鈕
-    st.markdown("<br>", unsafe_allow_html=True)
-    col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
+    # 主要輸入區域：放在表單中，輸入時不重新執行頁面，按下分析才送出
+    with st.form("analysis_inputs"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown(f"### {texts['resume_title']}")
+            resume_text = st.text_area(
+                texts['resume_placeholder'],
+                height=300,
+                placeholder=texts['resume_example']
+            )
+            resume_file = st.file_uploader(
+                texts['resume_upload_label'],
+                type=list(SUPPORTED_EXTENSIONS)
+            )
+        
+        with col2:
+            if batch_mode:
+                st.markdown(f"### {texts['batch_jobs_title']}")
+                batch_text = st.text_area(
+                    texts['batch_jobs_placeholder'],
+                    height=300,
+                    placeholder=texts['batch_jobs_example']
+                )
+                uploaded_jobs = st.file_uploader(
+                    texts['batch_upload_label'],
+                    type=list(SUPPORTED_EXTENSIONS),
+                    accept_multiple_files=True
+                )
+                top_k = st.number_input(
+                    texts['batch_top_k_label'],
+                    min_value=1,
+                    value=get_prescore_top_k(),
+                    step=1
+                )
+            else:
+                st.markdown(f"### {texts['job_title']}")
+                job_description = st.text_area(
+                    texts['job_placeholder'],
+                    height=300,
+                    placeholder=texts['job_example']
+                )
+                job_file = st.file_uploader(
+                    texts['job_upload_label'],
+                    type=list(SUPPORTED_EXTENSIONS)
+                )
+        
+        # 分析按鈕
+        st.markdown("<br>", unsafe_allow_html=True)
+        col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
+        
+        with col_btn2:
+            analyze_button = st.form_submit_button(
+                texts['batch_analyze_button'] if batch_mode else texts['analyze_button'],
+                type="primary",
+                use_container_width=True
+            )
     
-    with col_btn2:
-        analyze_button = st.button(
-            texts['analyze_button'],
-            type="primary",
-            use_container_width=True
-        )
+    # 批次模式：同時分析多份職缺並排名
+    if batch_mode:
+        if analyze_button:
+            resume_text = use_uploaded_text(resume_text, resume_file, texts)
+            jobs = collect_batch_jobs(batch_text, uploaded_jobs, texts)
+            if not resume_text.strip() or not jobs:
+                st.error(texts['batch_fill_required'])
+                return
+            run_batch_analysis(resume_text, jobs, language, texts, int(top_k))
+        render_batch_results(texts)
+        return
     
     # 執行分析
     if analyze_button:
+        resume_text = use_uploaded_text(resume_text, resume_file, texts)
+        job_description = use_uploaded_text(job_description, job_file, texts)
         if not resume_text.strip() or not job_description.strip():
             st.error(texts['fill_required'])
             return
         
-        with st.spinner(texts['analyzing']):
-            result = analyze_resume_job_match(resume_text, job_description, language)
-        
-        if result:
-            # 固定使用中文顯示結果
-            st.success(texts['analysis_complete'])
-            display_results(result, language)
-            
-            # 重新分析按鈕
-            st.markdown("<br>", unsafe_allow_html=True)
-            col_new1, col_new2, col_new3 = st.columns([1, 2, 1])
-            with col_new2:
-                if st.button(texts['analyze_another'], use_container_width=True):
-                    st.rerun()
+        # 相同輸入已在本 session 分析過：直接顯示保存的結果，不再呼叫模型
+        input_key = make_input_key(resume_text, job_description, language)
+        if input_key in get_session_analyses():
+            get_session_analyses().move_to_end(input_key)
+            st.session_state.current_analysis = input_key
         else:
-            st.error(texts['analysis_failed'])
+            run_single_analysis(resume_text, job_description, language, texts, input_key)
+    
+    render_single_result(texts)
 
 if __name__ == "__main__":
     main()
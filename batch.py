@@ -0,0 +1,101 @@
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metrics
+from prescore import prescore
+from skills import skill_overlap
+
+
+# 同時進行的分析數量上限
+DEFAULT_BATCH_WORKERS = 5
+
+# 預先評分後只送前 K 份職缺給 AI 分析
+DEFAULT_PRESCORE_TOP_K = 10
+
+# 職缺之間以一行 --- 或 === 分隔
+_JOB_SEPARATOR_RE = re.compile(r"^\s*(?:-{3,}|={3,})\s*$", re.MULTILINE)
+
+
+def get_batch_workers():
+    """從環境變數讀取批次並行數"""
+    return max(1, int(os.getenv("JOBMATCH_BATCH_WORKERS", DEFAULT_BATCH_WORKERS)))
+
+
+def get_prescore_top_k():
+    """從環境變數讀取預設送 AI 分析的職缺數量"""
+    return max(1, int(os.getenv("JOBMATCH_PRESCORE_TOP_K", DEFAULT_PRESCORE_TOP_K)))
+
+
+def split_job_descriptions(text):
+    """將貼上的多份職缺描述依分隔線切開"""
+    return [part.strip() for part in _JOB_SEPARATOR_RE.split(text) if part.strip()]
+
+
+def make_job_title(job_description, max_length=40):
+    """以職缺描述第一行作為顯示名稱"""
+    first_line = next((line.strip() for line in job_description.splitlines() if line.strip()), "")
+    if len(first_line) > max_length:
+        return first_line[:max_length] + "…"
+    return first_line
+
+
+def prescore_jobs(resume_text, jobs, top_k=None):
+    """以本地演算法估計每份職缺的匹配度，回傳 (估計分數列表, 要送 AI 分析的索引列表)
+
+    top_k 為 None 時全部送出；否則只選估計分數最高的 top_k 份。
+    """
+    scores = prescore(resume_text, [job_description for _, job_description in jobs])
+    selected = sorted(range(len(jobs)), key=lambda index: -scores[index])
+    if top_k is not None:
+        selected = selected[:top_k]
+    return scores, selected
+
+
+def find_skill_gaps(resume_text, jobs):
+    """以技能分類比對每份職缺要求、但履歷沒有提到的技能（不呼叫 AI，所有職缺都能立即顯示）"""
+    return [skill_overlap(resume_text, job_description)["missing"] for _, job_description in jobs]
+
+
+def run_batch(analyze, resume_text, jobs, language, max_workers=None, on_result=None, indices=None):
+    """以有限的執行緒池同時分析多份職缺
+
+    jobs 為 (職缺名稱, 職缺描述) 的列表；每完成一份就呼叫 on_result(index, result)，
+    失敗時 result 為 None。indices 指定只分析其中幾份（依序送出），未分析的結果為 None。
+    回傳依輸入順序排列的結果列表。
+    """
+    results = [None] * len(jobs)
+    indices = list(range(len(jobs))) if indices is None else list(indices)
+    if not indices:
+        return results
+    max_workers = min(max_workers or get_batch_workers(), len(indices))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jobmatch-batch") as executor:
+        futures = {
+            executor.submit(analyze, resume_text, jobs[index][1], language): index
+            for index in indices
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                metrics.ERRORS.inc(stage="batch")
+                print(f"批次分析失敗（第 {index + 1} 份）: {e}", file=sys.stderr)
+                results[index] = None
+            if on_result is not None:
+                on_result(index, results[index])
+    return results
+
+
+def rank_results(jobs, results, prescores=None):
+    """依匹配度由高到低排序，回傳 (原始索引, 職缺名稱, 分數或 None) 列表
+
+    沒有 AI 分數的職缺排在後面，並依估計分數（若有）排序。
+    """
+    prescores = prescores or [0] * len(jobs)
+    rows = []
+    for index, ((title, _), result) in enumerate(zip(jobs, results)):
+        score = result.get("match_score") if isinstance(result, dict) else None
+        rows.append((index, title, score))
+    return sorted(rows, key=lambda row: (row[2] is None, -(row[2] or 0), -prescores[row[0]]))
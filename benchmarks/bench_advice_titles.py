@@ -0,0 +1,140 @@
+"""建議類別標題分類的基準測試
+
+比較舊版 get_advice_config + find_advice_config（每次呼叫重建設定、逐一比對）與
+rendering.classify_advice_title（每種語言建立一次索引，依標題快取）：
+- 效能：每次查詢的平均時間（新版分別測量快取命中與未快取的索引查詢）
+- 一致性：列出兩者分類結果不同的標題（舊版的部分比對與設定順序有關，
+  例如只含「suggestions」的標題會被歸到第一個類別）
+
+用法：python benchmarks/bench_advice_titles.py [--repeat 2000] [--output bench_advice_titles.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rendering import AdviceTitleIndex, classify_advice_title  # noqa: E402
+
+LANGUAGES = ["中文", "English"]
+
+# 正式標題、翻譯變體與模型常見的改寫
+TITLES = [
+    "履歷優化", "求職信建議", "技能差距分析", "面試準備建議", "作品集建議",
+    "Resume Optimization", "Cover Letter Suggestions", "Skill Gap Analysis",
+    "Interview Preparation", "Portfolio Suggestions",
+    "Resume", "Cover Letter", "Skills", "Interview", "Portfolio", "Skill Gap",
+    "Interview Prep", "Portfolio Tips", "Resume Tips", "Cover Letter Tips",
+    "Missing Skills", "Learning Directions", "Potential Questions", "Response Direction",
+    "Mini Project Ideas", "Showcase Suggestions", "Opening Statement", "Body Paragraph", "Closing Statement",
+    "履歷優化建議", "面試準備", "作品集", "技能差距", "求職信",
+    "resume optimization", "Interview Preparation:", "💡 Portfolio Suggestions", "Skill-Gap Analysis",
+    "Interview Tips", "Skills to Develop", "CV Optimization", "Project Suggestions",
+    "Other Suggestions", "General Suggestions", "Networking", "其他建議",
+]
+
+
+def legacy_get_advice_config(language):
+    """舊版 get_advice_config（僅供比較）"""
+    if language == "中文":
+        config = {
+            "履歷優化": {"key": "advice_resume_optimization"},
+            "求職信建議": {"key": "advice_cover_letter"},
+            "技能差距分析": {"key": "advice_skill_gap"},
+            "面試準備建議": {"key": "advice_interview"},
+            "作品集建議": {"key": "advice_portfolio"}
+        }
+    else:
+        config = {
+            "Resume Optimization": {"key": "advice_resume_optimization"},
+            "Cover Letter Suggestions": {"key": "advice_cover_letter"},
+            "Skill Gap Analysis": {"key": "advice_skill_gap"},
+            "Interview Preparation": {"key": "advice_interview"},
+            "Portfolio Suggestions": {"key": "advice_portfolio"}
+        }
+    if language == "English":
+        config.update({
+            "Resume": {"key": "advice_resume_optimization"},
+            "Cover Letter": {"key": "advice_cover_letter"},
+            "Skills": {"key": "advice_skill_gap"},
+            "Interview": {"key": "advice_interview"},
+            "Portfolio": {"key": "advice_portfolio"},
+            "Skill Gap": {"key": "advice_skill_gap"},
+            "Interview Prep": {"key": "advice_interview"},
+            "Portfolio Tips": {"key": "advice_portfolio"},
+            "Resume Tips": {"key": "advice_resume_optimization"},
+            "Cover Letter Tips": {"key": "advice_cover_letter"},
+            "Missing Skills": {"key": "advice_skill_gap"},
+            "Learning Directions": {"key": "advice_skill_gap"},
+            "Potential Questions": {"key": "advice_interview"},
+            "Response Direction": {"key": "advice_interview"},
+            "Mini Project Ideas": {"key": "advice_portfolio"},
+            "Showcase Suggestions": {"key": "advice_portfolio"},
+            "Opening Statement": {"key": "advice_cover_letter"},
+            "Body Paragraph": {"key": "advice_cover_letter"},
+            "Closing Statement": {"key": "advice_cover_letter"}
+        })
+    return config
+
+
+def legacy_find_advice_config(title, advice_config):
+    """舊版 find_advice_config（僅供比較）"""
+    config = advice_config.get(title)
+    if config is None:
+        for config_title, config_data in advice_config.items():
+            if (config_title.lower() in title.lower() or
+                title.lower() in config_title.lower() or
+                any(word in title.lower() for word in config_title.lower().split()) or
+                title.lower() in ["skill gap", "interview prep", "portfolio", "resume opt", "cover letter"] or
+                any(word in title.lower() for word in ["skill", "gap", "analysis", "interview", "preparation", "portfolio", "suggestions", "resume", "optimization", "cover", "letter"])):
+                return config_data
+    return config or {}
+
+
+def legacy_classify(title, language):
+    """舊版 process_advice_dict 中每個類別的查詢方式，回傳與新版相同格式的類別鍵值"""
+    key = legacy_find_advice_config(title, legacy_get_advice_config(language)).get("key")
+    return key[len("advice_"):] if key else None
+
+
+def per_lookup_us(fn, titles, language, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for title in titles:
+            fn(title, language)
+    return round((time.perf_counter() - start) / (repeat * len(titles)) * 1e6, 3)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--repeat", type=int, default=2000, help="每個標題的查詢次數")
+    arg_parser.add_argument("--output", help="輸出 JSON 結果的檔案路徑")
+    args = arg_parser.parse_args()
+
+    report = {}
+    for language in LANGUAGES:
+        index = AdviceTitleIndex(language)
+        differences = {}
+        for title in TITLES:
+            old, new = legacy_classify(title, language), classify_advice_title(title, language)
+            if old != new:
+                differences[title] = {"legacy": old, "indexed": new}
+        report[language] = {
+            "titles": len(TITLES),
+            "legacy_us": per_lookup_us(legacy_classify, TITLES, language, args.repeat),
+            "indexed_us": per_lookup_us(lambda title, language: index.classify(title), TITLES, language, args.repeat),
+            "cached_us": per_lookup_us(classify_advice_title, TITLES, language, args.repeat),
+            "differences": differences,
+        }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
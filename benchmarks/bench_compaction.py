@@ -0,0 +1,109 @@
+"""輸入壓縮的正確性與效能基準測試
+
+- 回歸案例：職稱、開頭幾行與職缺條件必須保留，福利、EEO 等樣板段落必須移除
+  （例如「Privacy Engineer」「Benefits Analyst」這類職稱不能被當成樣板段落標題）
+- 效能：compact_text 處理每份職缺的平均時間與節省的估計 token 數
+
+用法：python benchmarks/bench_compaction.py [--repeat 200] [--output bench_compaction.json]
+有回歸案例失敗時以非零狀態結束。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compaction import compact_text  # noqa: E402
+
+# 名稱 → (職缺原文, 必須保留的片段, 必須移除的片段)
+CASES = {
+    "privacy_engineer": (
+        "Privacy Engineer\nAcme Corp\nWe build privacy tooling for our data platform.\n"
+        "Requirements:\n- 5 years backend experience\n- GDPR knowledge\n"
+        "Benefits:\n- Free lunch\n- Gym membership",
+        ["Privacy Engineer", "We build privacy tooling", "5 years backend experience"],
+        ["Free lunch", "Gym membership"],
+    ),
+    "benefits_analyst": (
+        "Benefits Analyst\nYou will analyze benefit plan costs and enrollment trends.\n"
+        "Qualifications:\n- 3 years HR analytics\n\nAbout us\nWe are a fast-growing company.\n\n"
+        "Equal Opportunity Employer",
+        ["Benefits Analyst", "analyze benefit plan costs", "3 years HR analytics"],
+        ["fast-growing company", "Equal Opportunity Employer"],
+    ),
+    "diversity_recruiter_mid_document": (
+        "Talent Team\nHiring now\nDiversity Recruiter\nSource and engage candidates from underrepresented groups.\n"
+        "Requirements:\n- 2 years recruiting experience\n"
+        "Diversity & Inclusion\nWe welcome applicants of all backgrounds.",
+        ["Diversity Recruiter", "Source and engage candidates", "2 years recruiting experience"],
+        ["We welcome applicants"],
+    ),
+    "perks_heading_first_line": (
+        "Perks\nSenior Data Engineer\nBuild batch and streaming pipelines.\nRequirements:\n- Spark, Kafka",
+        ["Perks", "Senior Data Engineer", "Build batch and streaming pipelines", "Spark, Kafka"],
+        [],
+    ),
+    "chinese_benefits_specialist": (
+        "福利專員\n台北市\n負責員工福利規劃與執行\n條件要求：\n- 3 年以上人資經驗\n【公司福利】\n- 年終獎金\n- 員工旅遊",
+        ["福利專員", "負責員工福利規劃與執行", "3 年以上人資經驗"],
+        ["年終獎金", "員工旅遊"],
+    ),
+    "markdown_headings": (
+        "Backend Engineer\nRemote\n## Responsibilities\n- Design REST APIs\n## Benefits\n- Stock options\n"
+        "## Privacy Notice\nWe process your data per our policy.",
+        ["Backend Engineer", "Design REST APIs"],
+        ["Stock options", "We process your data"],
+    ),
+    "generic_type_parameters": (
+        "Java Developer\nRemote\nRequirements:\n- Experience with List<String> and Map<K, V> collections\n"
+        "- Comfortable with Optional<T>",
+        ["List<String>", "Map<K, V>", "Optional<T>"],
+        [],
+    ),
+    "html_posting": (
+        "<html><body><h1>Go Developer</h1><p>Acme</p><h2>Requirements:</h2><ul><li>3 years Go</li></ul>"
+        "<h2>Benefits:</h2><ul><li>Free lunch</li></ul></body></html>",
+        ["Go Developer", "3 years Go"],
+        ["<li>", "Free lunch"],
+    ),
+}
+
+
+def check_case(text, keep, drop):
+    compacted = compact_text(text).text
+    return {
+        "missing": [fragment for fragment in keep if fragment not in compacted],
+        "leaked": [fragment for fragment in drop if fragment in compacted],
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--repeat", type=int, default=200, help="效能測試重複次數")
+    arg_parser.add_argument("--output", help="輸出 JSON 結果的檔案路徑")
+    args = arg_parser.parse_args()
+
+    report = {}
+    failed = False
+    for name, (text, keep, drop) in CASES.items():
+        outcome = check_case(text, keep, drop)
+        failed = failed or bool(outcome["missing"] or outcome["leaked"])
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            result = compact_text(text)
+        outcome["compact_us"] = round((time.perf_counter() - start) / args.repeat * 1e6, 2)
+        outcome["saved_tokens"] = result.saved_tokens
+        report[name] = outcome
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""JSON 解析容錯與效能基準測試
+
+比較舊版「數括號補全」修復邏輯與 IncrementalJSONParser：
+- 截斷測試：在每個（或每隔 --step 個）字元位置截斷範例回應，統計可回復的比例
+- 模糊測試：隨機切塊、插入原始換行/控制字元、多餘逗號，確認結果與完整解析一致
+- 前言測試：JSON 前的說明文字含有 {role} 這類大括號時，仍以 ```json 區塊為準
+- 效能測試：完整回應的最終解析（parse_json_response，合法 JSON 走快速路徑）與逐字元容錯解析的時間
+
+用法：python benchmarks/bench_json_stream.py [--step 1] [--fuzz 500] [--output bench_output.json]
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import IncrementalJSONParser, parse_json_response  # noqa: E402
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples")
+
+
+def legacy_parse(response_text):
+    """舊版 analyze_resume_job_match 的 JSON 提取與修復邏輯（僅供比較）"""
+    json_text = ""
+    if "```json" in response_text:
+        json_start = response_text.find("```json") + 7
+        json_end = response_text.find("```", json_start)
+        if json_end > json_start:
+            json_text = response_text[json_start:json_end].strip()
+    elif "{" in response_text and "}" in response_text:
+        json_start = response_text.find("{")
+        json_end = response_text.rfind("}") + 1
+        json_text = response_text[json_start:json_end]
+    else:
+        json_text = response_text.strip()
+    json_text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', json_text)
+    if not json_text:
+        return None
+    if json_text.count("{") != json_text.count("}"):
+        if json_text.count("{") > json_text.count("}"):
+            json_text += "}" * (json_text.count("{") - json_text.count("}"))
+            if not json_text.endswith("}"):
+                json_text += "}"
+        else:
+            for _ in range(json_text.count("}") - json_text.count("{")):
+                json_text = json_text.rsplit("}", 1)[0]
+    if not json_text.strip().endswith("}"):
+        if '"advice"' in json_text:
+            json_text = json_text.rstrip() + '}}'
+        elif '"missing"' in json_text or '"matched"' in json_text:
+            json_text = json_text.rstrip() + '}'
+        elif '"priorities"' in json_text:
+            if json_text.count("[") > json_text.count("]"):
+                json_text = json_text.rstrip() + ']'
+            json_text = json_text.rstrip() + '}'
+    try:
+        return json.loads(json_text)
+    except ValueError:
+        return None
+
+
+def load_samples():
+    samples = {}
+    for path in sorted(glob.glob(os.path.join(SAMPLES_DIR, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            samples[os.path.basename(path)] = f.read()
+    return samples
+
+
+def usable(result):
+    """可顯示的結果：至少要有匹配分數"""
+    return isinstance(result, dict) and "match_score" in result
+
+
+def truncation_report(text, step):
+    """在不同位置截斷回應，統計兩種解析方式的回復情況"""
+    expected, _, _ = parse_json_response(text)
+    positions = range(1, len(text), step)
+    legacy_ok = parser_ok = 0
+    legacy_sections = parser_sections = 0
+    for n in positions:
+        truncated = text[:n]
+        legacy = legacy_parse(truncated)
+        if usable(legacy):
+            legacy_ok += 1
+            legacy_sections += sum(1 for k in expected if legacy.get(k) == expected[k])
+        result, completed, _ = parse_json_response(truncated)
+        if usable(result):
+            parser_ok += 1
+            parser_sections += len(completed)
+            # 已標記完成的欄位必須與完整解析一致
+            for key in completed:
+                assert result[key] == expected[key], f"section {key} differs at offset {n}"
+    total = len(positions)
+    return {
+        "positions": total,
+        "legacy_usable_rate": legacy_ok / total,
+        "parser_usable_rate": parser_ok / total,
+        "legacy_avg_complete_sections": legacy_sections / total,
+        "parser_avg_complete_sections": parser_sections / total,
+    }
+
+
+def mutate(text, rng):
+    """產生模型常見的不合法輸出：字串內原始換行、控制字元、多餘逗號"""
+    out = []
+    in_string = escape = False
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+                if ch == "n" and rng.random() < 0.5:
+                    out[-1] = "\n"  # 把 \\n 換成原始換行
+                    continue
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            elif rng.random() < 0.01:
+                out.append("\x07")
+        elif ch == '"':
+            in_string = True
+        elif ch in "}]" and rng.random() < 0.2:
+            stripped = "".join(out).rstrip()
+            if stripped and stripped[-1] not in "[{,":
+                out.append(",")
+        out.append(ch)
+    return "".join(out)
+
+
+def fuzz_report(text, iterations, rng):
+    """隨機切塊與變形後，逐段餵入解析器，結果需與完整解析一致"""
+    expected, _, _ = parse_json_response(text)
+    legacy_failures = parser_failures = final_failures = 0
+    for _ in range(iterations):
+        mutated = mutate(text, rng)
+        parser = IncrementalJSONParser()
+        pos = 0
+        while pos < len(mutated):
+            size = rng.randint(1, 64)
+            parser.feed(mutated[pos:pos + size])
+            pos += size
+        result, truncated = parser.finish()
+        if truncated or result != expected:
+            parser_failures += 1
+        final_result, _, final_truncated = parse_json_response(mutated)
+        if final_truncated or final_result != expected:
+            final_failures += 1
+        if legacy_parse(mutated) != expected:
+            legacy_failures += 1
+    return {
+        "iterations": iterations,
+        "legacy_failure_rate": legacy_failures / iterations,
+        "parser_failure_rate": parser_failures / iterations,
+        "final_failure_rate": final_failures / iterations,
+    }
+
+
+def preamble_report(text):
+    """回應前有含大括號的說明文字時，串流解析與最終解析都必須得到完整結果"""
+    expected, _, _ = parse_json_response(text)
+    prefixed = "Here is the analysis for the {role} you asked about:\n" + text
+    parser = IncrementalJSONParser()
+    for pos in range(0, len(prefixed), 40):
+        parser.feed(prefixed[pos:pos + 40])
+    return {
+        "streaming_ok": parser.finish() == (expected, False),
+        "final_ok": parse_json_response(prefixed)[0] == expected,
+    }
+
+
+def timing_report(text, repeat):
+    """完整回應的平均解析時間（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        legacy_parse(text)
+    legacy_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse_json_response(text)
+    parser_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        IncrementalJSONParser().feed(text)
+    incremental_ms = (time.perf_counter() - start) * 1000 / repeat
+    return {"legacy_ms": legacy_ms, "parser_ms": parser_ms, "incremental_ms": incremental_ms}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--step", type=int, default=1, help="截斷位置間隔")
+    arg_parser.add_argument("--fuzz", type=int, default=300, help="每個範例的模糊測試次數")
+    arg_parser.add_argument("--repeat", type=int, default=50, help="效能測試重複次數")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", help="輸出 JSON 結果的檔案路徑")
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    report = {}
+    for name, text in load_samples().items():
+        report[name] = {
+            "truncation": truncation_report(text, args.step),
+            "fuzz": fuzz_report(text, args.fuzz, rng),
+            "preamble": preamble_report(text),
+            "timing": timing_report(text, args.repeat),
+        }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+    failed = any(
+        r["fuzz"]["parser_failure_rate"] > 0 or r["fuzz"]["final_failure_rate"] > 0
+        or not all(r["preamble"].values())
+        for r in report.values()
+    )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""分析流程端到端基準測試（以假 Gemini 後端離線執行）
+
+- 端到端：單一請求與拆分子請求模式下，分析完成時間與分數首次顯示的時間
+- 截斷：回應被截斷時的完成時間與可回復的欄位
+- 解析：IncrementalJSONParser 一次餵入、逐段餵入與截斷回復的時間
+- 渲染：process_advice_dict 組合建議 HTML 與整個結果頁面的時間，以及重新執行時取用快取的時間
+- 快取：相同輸入重複分析時的命中率與延遲
+- 履歷摘要：同一份較長的履歷比對多份不同職缺時，送全文（off）與改送結構化摘要（auto）的
+  每份職缺輸入 token、延遲與呼叫次數
+
+結果為扁平的 {指標名稱: 數值}，可用 --compare 與其他 commit 的輸出比較。
+
+用法：python benchmarks/bench_pipeline.py [--iterations 10] [--latency 0.05] [--output bench_pipeline.json]
+      python benchmarks/bench_pipeline.py --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_gemini  # noqa: E402
+from fake_gemini import FakeBackend  # noqa: E402
+
+LANGUAGES = ["中文", "English"]
+SAMPLE_FILES = {"中文": "response_zh.txt", "English": "response_en.txt"}
+
+RESUME = """王小明
+軟體工程師，兩年 React 與 JavaScript 前端開發經驗。
+2020-2022 擔任軟體工程師，負責電商網站前端，與設計師及後端工程師合作完成產品上線。
+技能：React、JavaScript、HTML/CSS、Git
+"""
+
+JOB_DESCRIPTION = """前端工程師
+工作內容：
+- 開發與維護公司產品的網頁前端
+- 與產品及設計團隊合作
+條件要求：
+- 3 年以上 React 開發經驗
+- 熟悉 TypeScript 與前端測試
+"""
+
+
+# 履歷摘要測試用的較長履歷（超過 RESUME_PROFILE_MIN_TOKENS，才會改送摘要）
+LONG_RESUME = RESUME + """
+工作經歷
+2020-2022 電商公司 軟體工程師
+- 負責電商網站前端改版，以 React 與 Redux 重寫商品頁、購物車與結帳流程，轉換率提升 12%
+- 導入共用元件庫與 Storybook，縮短新頁面開發時間約 30%
+- 與後端工程師定義 REST API 規格，處理快取、分頁與錯誤重試
+- 撰寫 Jest 與 React Testing Library 單元測試，測試涵蓋率由 20% 提升到 65%
+- 參與每週 code review 與新人導引，整理前端開發規範文件
+2019 新創公司 前端實習生
+- 以 JavaScript 與 jQuery 維護行銷活動頁面，配合設計師調整 RWD 版面
+- 協助建立 GitHub Actions 自動化部署流程
+
+學歷
+國立大學 資訊工程學系 學士（2015-2019）
+畢業專題：以 WebSocket 實作多人即時白板
+
+證照與語言
+TOEIC 850、JLPT N3
+
+其他
+- 個人部落格撰寫前端效能調校文章，累計 40 篇
+- 參與開源專案，貢獻 UI 元件與文件翻譯
+"""
+
+
+def make_job_description(index):
+    """產生內容不同的職缺（每份都是新的分析，不會命中結果快取）"""
+    return f"{JOB_DESCRIPTION}- 職缺編號 {index}：熟悉 Next.js 或 Vue 者佳\n"
+
+
+def summarize(samples_seconds, prefix):
+    """把一組秒數轉成毫秒的 p50 / p95 / mean"""
+    values = sorted(value * 1000 for value in samples_seconds)
+    if not values:
+        return {}
+    p95_index = min(len(values) - 1, int(round(0.95 * (len(values) - 1))))
+    return {
+        f"{prefix}.p50_ms": round(statistics.median(values), 3),
+        f"{prefix}.p95_ms": round(values[p95_index], 3),
+        f"{prefix}.mean_ms": round(statistics.fmean(values), 3),
+    }
+
+
+def time_call(fn, repeat):
+    """重複執行 fn，回傳每次的耗時（秒）"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def bench_end_to_end(analyzer, backend, iterations):
+    """單一請求與拆分子請求模式的端到端延遲（每次使用不同輸入，不命中快取）"""
+    report = {}
+    for split in (False, True):
+        mode = "split" if split else "single"
+        analyzer.SPLIT_REQUESTS = split
+        for language in LANGUAGES:
+            backend.reset()
+            totals = []
+            first_scores = []
+            for iteration in range(iterations):
+                first_score = []
+                start = time.perf_counter()
+
+                def on_progress(sections, start=start, first_score=first_score):
+                    if not first_score and "match_score" in sections:
+                        first_score.append(time.perf_counter() - start)
+
+                result = analyzer.analyze_resume_job_match(
+                    f"{RESUME}\n#{mode}-{iteration}",
+                    JOB_DESCRIPTION,
+                    language,
+                    on_progress=on_progress,
+                )
+                totals.append(time.perf_counter() - start)
+                first_scores.append(first_score[0] if first_score else totals[-1])
+                assert "match_score" in result and result.get("advice"), f"{mode}/{language}: incomplete result"
+            prefix = f"end_to_end.{mode}.{language}"
+            report.update(summarize(totals, f"{prefix}.total"))
+            report.update(summarize(first_scores, f"{prefix}.first_score"))
+            report[f"{prefix}.calls_per_analysis"] = backend.calls / iterations
+    analyzer.SPLIT_REQUESTS = True
+    return report
+
+
+def bench_truncated(analyzer, backend, iterations, truncate_at):
+    """回應在 truncate_at 比例處被截斷時，單一請求模式仍能完整回復多少欄位"""
+    report = {}
+    analyzer.SPLIT_REQUESTS = False
+    backend.truncate_at = truncate_at
+    try:
+        for language in LANGUAGES:
+            totals = []
+            sections = []
+            for iteration in range(iterations):
+                start = time.perf_counter()
+                result = analyzer.analyze_resume_job_match(
+                    f"{RESUME}\n#truncated-{iteration}",
+                    JOB_DESCRIPTION,
+                    language,
+                )
+                totals.append(time.perf_counter() - start)
+                expected = backend.expected_result(language)
+                sections.append(sum(1 for key, value in result.items() if expected.get(key) == value))
+            prefix = f"truncated.{language}"
+            report.update(summarize(totals, f"{prefix}.total"))
+            report[f"{prefix}.complete_fields"] = statistics.fmean(sections)
+    finally:
+        backend.truncate_at = None
+        analyzer.SPLIT_REQUESTS = True
+    return report
+
+
+def bench_parse(repeat):
+    """完整回應一次解析、以 40 字元為單位逐段解析，以及在 60% 處截斷後回復的時間"""
+    from json_stream import IncrementalJSONParser
+
+    report = {}
+    for language, name in SAMPLE_FILES.items():
+        text = fake_gemini.load_sample(name)
+        truncated = text[:int(len(text) * 0.6)]
+
+        def parse_whole(text=text):
+            parser = IncrementalJSONParser()
+            parser.feed(text)
+            return parser.finish()
+
+        def parse_chunked(text=text):
+            parser = IncrementalJSONParser()
+            for start in range(0, len(text), 40):
+                parser.feed(text[start:start + 40])
+            return parser.finish()
+
+        def parse_truncated(text=truncated):
+            parser = IncrementalJSONParser()
+            parser.feed(text)
+            return parser.finish()
+
+        report.update(summarize(time_call(parse_whole, repeat), f"parse.{language}.whole"))
+        report.update(summarize(time_call(parse_chunked, repeat), f"parse.{language}.chunked"))
+        report.update(summarize(time_call(parse_truncated, repeat), f"parse.{language}.truncated"))
+    return report
+
+
+def bench_render(repeat):
+    """process_advice_dict 組合建議 HTML、build_results_html 組合整個結果頁面，以及重新執行時取用快取的時間"""
+    from json_stream import parse_json_response
+    from rendering import build_results_html, build_results_html_cached, process_advice_dict, result_fingerprint
+    from ui_texts import get_ui_texts
+
+    report = {}
+    for language, name in SAMPLE_FILES.items():
+        result = parse_json_response(fake_gemini.load_sample(name))[0]
+        advice = result["advice"]
+        texts = get_ui_texts(language)
+        html = process_advice_dict(advice, texts, language)
+        report.update(summarize(
+            time_call(lambda: process_advice_dict(advice, texts, language), repeat),
+            f"render.{language}.process_advice_dict",
+        ))
+        report[f"render.{language}.html_bytes"] = len(html.encode("utf-8"))
+        page = build_results_html(result, texts, language)
+        report.update(summarize(
+            time_call(lambda: build_results_html(result, texts, language), repeat),
+            f"render.{language}.results_page",
+        ))
+        report[f"render.{language}.results_page_bytes"] = len(page.encode("utf-8"))
+        result_hash = result_fingerprint(result)
+        report.update(summarize(
+            time_call(lambda: build_results_html_cached(result, texts, language, result_hash), repeat),
+            f"render.{language}.results_page_cached",
+        ))
+    return report
+
+
+def bench_cache(analyzer, backend, iterations):
+    """相同輸入重複分析：第一次未命中，之後應全部命中且不再呼叫模型"""
+    from cache import get_result_cache
+
+    report = {}
+    cache = get_result_cache()
+    cache.clear()
+    hits_before, misses_before = cache.hits, cache.misses
+    for language in LANGUAGES:
+        backend.reset()
+        start = time.perf_counter()
+        analyzer.analyze_resume_job_match(f"{RESUME}\n#cache", JOB_DESCRIPTION, language)
+        miss = time.perf_counter() - start
+        hits = time_call(
+            lambda language=language: analyzer.analyze_resume_job_match(f"{RESUME}\n#cache", JOB_DESCRIPTION, language),
+            iterations,
+        )
+        prefix = f"cache.{language}"
+        report[f"{prefix}.miss_ms"] = round(miss * 1000, 3)
+        report.update(summarize(hits, f"{prefix}.hit"))
+        report[f"{prefix}.calls"] = backend.calls
+    lookups = (cache.hits - hits_before) + (cache.misses - misses_before)
+    report["cache.hit_rate"] = round((cache.hits - hits_before) / lookups, 4) if lookups else 0.0
+    return report
+
+
+def bench_profile(analyzer, backend, iterations):
+    """同一份較長的履歷依序比對多份不同職缺：off 每次送全文，auto 在第二份職缺時於背景產生摘要，
+    完成後的職缺改送摘要
+
+    第一份職缺在兩種模式下都送全文；之後的每份職缺分別統計送出的輸入 token（含背景產生摘要的
+    那次呼叫）與延遲。auto 的呼叫次數包含產生摘要的那一次。prompt_tokens_last_posting 為最後一份
+    職缺的輸入 token（摘要已就緒後的穩定狀態，不含產生摘要的成本）。
+    """
+    from cache import get_profile_cache, get_result_cache
+
+    report = {}
+    postings = max(iterations, 3)
+    for mode in ("off", "auto"):
+        get_result_cache().clear()
+        get_profile_cache().clear()
+        analyzer.get_resume_usage().clear()
+        analyzer.RESUME_PROFILE_MODE = mode
+        backend.reset()
+        resume = f"{LONG_RESUME}\n#profile-{mode}"
+        analyzer.analyze_resume_job_match(resume, make_job_description(0), "中文")
+        first_tokens = backend.prompt_tokens
+        samples = []
+        last_tokens = 0
+        for index in range(1, postings):
+            posting_tokens = backend.prompt_tokens
+            start = time.perf_counter()
+            analyzer.analyze_resume_job_match(resume, make_job_description(index), "中文")
+            samples.append(time.perf_counter() - start)
+            last_tokens = backend.prompt_tokens - posting_tokens
+        prefix = f"profile.{mode}"
+        report[f"{prefix}.prompt_tokens_per_posting"] = round(
+            (backend.prompt_tokens - first_tokens) / (postings - 1), 1
+        )
+        report[f"{prefix}.prompt_tokens_last_posting"] = last_tokens
+        report.update(summarize(samples, f"{prefix}.posting"))
+        report[f"{prefix}.calls"] = backend.calls
+        report[f"{prefix}.profile_calls"] = backend.profile_calls
+    analyzer.RESUME_PROFILE_MODE = os.getenv("JOBMATCH_RESUME_PROFILE", "auto")
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path):
+    """列出與基準檔相比的變化（只比較兩邊都有的數值指標）"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"比較基準：{baseline.get('meta', {}).get('commit')} → {current['meta'].get('commit')}", file=sys.stderr)
+    for name, value in current["metrics"].items():
+        old = baseline.get("metrics", {}).get(name)
+        if not isinstance(old, (int, float)) or not isinstance(value, (int, float)):
+            continue
+        change = f"{(value - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{name:60} {old:>12} → {value:>12} ({change})", file=sys.stderr)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--iterations", type=int, default=10, help="端到端與快取測試的重複次數")
+    arg_parser.add_argument("--repeat", type=int, default=200, help="解析與渲染測試的重複次數")
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="假後端第一個片段前的延遲（秒）")
+    arg_parser.add_argument("--tokens-per-second", type=float, default=4000, help="假後端的 token 產生速度")
+    arg_parser.add_argument("--chunk-chars", type=int, default=40, help="串流片段的字元數")
+    arg_parser.add_argument("--truncate-at", type=float, default=0.6, help="截斷測試中保留的回應比例")
+    arg_parser.add_argument("--output", help="輸出 JSON 結果的檔案路徑")
+    arg_parser.add_argument("--compare", help="與先前輸出的 JSON 比較")
+    args = arg_parser.parse_args()
+
+    backend = fake_gemini.install(FakeBackend(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        chunk_chars=args.chunk_chars,
+    ))
+    import analyzer
+
+    metrics = {}
+    metrics.update(bench_end_to_end(analyzer, backend, args.iterations))
+    metrics.update(bench_truncated(analyzer, backend, args.iterations, args.truncate_at))
+    metrics.update(bench_parse(args.repeat))
+    metrics.update(bench_render(args.repeat))
+    metrics.update(bench_cache(analyzer, backend, args.iterations))
+    metrics.update(bench_profile(analyzer, backend, args.iterations))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "metrics": metrics,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
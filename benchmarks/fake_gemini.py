@@ -0,0 +1,190 @@
+"""離線基準測試用的假 Gemini 後端
+
+以固定的延遲與 token 產生速度回放範例回應，不需要網路與 API 金鑰：
+- 依提示詞語言選擇 samples/response_zh.txt 或 response_en.txt
+- 拆分子請求時只回覆該子請求要求的欄位（分數或單一建議類別）
+- 履歷摘要請求回覆固定的結構化摘要（SAMPLE_PROFILE）
+- 可設定在某個比例截斷回應，模擬輸出被截斷的情況
+
+用法：
+    backend = FakeBackend(latency=0.05, tokens_per_second=4000)
+    install(backend)   # 之後 analyzer 建立的模型都會使用 backend
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compaction import estimate_tokens  # noqa: E402
+from json_stream import parse_json_response  # noqa: E402
+from prompts import PROFILE_PROMPT, SCORE_FIELDS, SYSTEM_PROMPT_EN, TRANSLATION_PROMPT  # noqa: E402
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples")
+
+# 用來辨識提示詞語言與用途的片段
+_ENGLISH_MARKER = SYSTEM_PROMPT_EN.strip().split("\n")[0][:60]
+_TRANSLATION_MARKER = TRANSLATION_PROMPT.strip().split("\n")[0][:60]
+_PROFILE_MARKER = PROFILE_PROMPT.strip().split("\n")[0][:30]
+
+SAMPLE_PROFILE = {
+    "summary": "具兩年經驗的前端工程師，熟悉 React 與電商網站開發",
+    "roles": [
+        {"title": "軟體工程師", "organization": "電商公司", "period": "2020-2022", "years": 2},
+        {"title": "前端實習生", "organization": "新創公司", "period": "2019", "years": 0.5},
+    ],
+    "experience_years": {"前端開發": 2.5, "React": 2, "JavaScript": 2.5},
+    "skills": ["React", "JavaScript", "HTML/CSS", "Git", "REST API", "Jest"],
+    "education": ["資訊工程學士"],
+    "certifications": ["TOEIC 850"],
+    "highlights": ["負責電商網站前端改版並完成上線", "導入元件庫，縮短新頁面開發時間"],
+}
+
+
+def load_sample(name):
+    with open(os.path.join(SAMPLES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class FakeUsageMetadata:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeResponse:
+    """模擬 GenerateContentResponse：非串流時直接有 text，串流時逐段產生"""
+
+    def __init__(self, backend, text, usage_metadata, stream):
+        self._backend = backend
+        self._full_text = text
+        self.usage_metadata = usage_metadata
+        self._stream = stream
+
+    @property
+    def text(self):
+        return self._full_text
+
+    def __iter__(self):
+        backend = self._backend
+        size = backend.chunk_chars
+        for start in range(0, len(self._full_text), size):
+            chunk = self._full_text[start:start + size]
+            backend.sleep(estimate_tokens(chunk) / backend.tokens_per_second)
+            yield FakeChunk(chunk)
+
+
+class FakeBackend:
+    """可設定延遲、產生速度與截斷位置的假後端
+
+    latency：第一個片段前的等待秒數；tokens_per_second：之後每個片段依 token 數等待；
+    truncate_at：0-1 之間時只回傳該比例的回應；responses 可覆寫語言對應的範例回應。
+    """
+
+    def __init__(self, latency=0.05, tokens_per_second=4000.0, chunk_chars=40, truncate_at=None, responses=None):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.chunk_chars = chunk_chars
+        self.truncate_at = truncate_at
+        self.responses = responses or {
+            "中文": load_sample("response_zh.txt"),
+            "English": load_sample("response_en.txt"),
+        }
+        self._parsed = {language: parse_json_response(text)[0] for language, text in self.responses.items()}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.stream_calls = 0
+        self.profile_calls = 0
+        self.prompt_tokens = 0
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.stream_calls = 0
+            self.profile_calls = 0
+            self.prompt_tokens = 0
+
+    def expected_result(self, language):
+        """該語言範例回應完整解析後的結果"""
+        return self._parsed[language]
+
+    def response_text(self, prompt):
+        """依提示詞決定回覆內容：語言、拆分子請求的欄位範圍與截斷位置"""
+        if _PROFILE_MARKER in prompt:
+            return self._to_text(SAMPLE_PROFILE)
+        english = _ENGLISH_MARKER in prompt or _TRANSLATION_MARKER in prompt
+        language = "English" if english else "中文"
+        parsed = self._parsed[language]
+        text = self.responses[language]
+
+        advice = parsed.get("advice") or {}
+        requested = [title for title in advice if f"advice.{title}" in prompt]
+        if requested:
+            text = self._to_text({"advice": {title: advice[title] for title in requested}})
+        elif ", ".join(SCORE_FIELDS) in prompt:
+            text = self._to_text({key: parsed[key] for key in SCORE_FIELDS if key in parsed})
+
+        if self.truncate_at is not None:
+            text = text[:int(len(text) * self.truncate_at)]
+        return text
+
+    @staticmethod
+    def _to_text(value):
+        return "```json\n" + json.dumps(value, ensure_ascii=False, indent=2) + "\n```"
+
+    def generate(self, prompt, stream):
+        usage_prompt_tokens = estimate_tokens(prompt)
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += usage_prompt_tokens
+            if stream:
+                self.stream_calls += 1
+            if _PROFILE_MARKER in prompt:
+                self.profile_calls += 1
+        text = self.response_text(prompt)
+        usage = FakeUsageMetadata(usage_prompt_tokens, estimate_tokens(text))
+        self.sleep(self.latency)
+        if not stream:
+            self.sleep(estimate_tokens(text) / self.tokens_per_second)
+        return FakeResponse(self, text, usage, stream)
+
+
+class FakeGenerativeModel:
+    """取代 genai.GenerativeModel；所有實例共用 install() 指定的後端"""
+
+    backend = None
+
+    def __init__(self, model_name=None, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, contents, generation_config=None, stream=False, request_options=None, **kwargs):
+        return self.backend.generate(str(contents), stream)
+
+    def count_tokens(self, contents, **kwargs):
+        return FakeUsageMetadata(estimate_tokens(str(contents)), 0)
+
+
+def install(backend):
+    """以假後端取代 google.generativeai 的模型與設定（必須在第一次分析前呼叫）"""
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+    os.environ["JOBMATCH_WARMUP"] = "0"
+    os.environ.pop("JOBMATCH_STORE_PATH", None)
+
+    import google.generativeai as genai
+
+    FakeGenerativeModel.backend = backend
+    genai.GenerativeModel = FakeGenerativeModel
+    genai.configure = lambda **kwargs: None
+    return backend
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+# 預設上限：64 MB、24 小時
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+# 履歷摘要快取的預設上限（摘要很小，與分析結果分開計量命中率）
+DEFAULT_PROFILE_MAX_BYTES = 8 * 1024 * 1024
+
+_HORIZONTAL_SPACE_RE = re.compile(r"[ \t\u3000\xa0]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def normalize_text(text):
+    """正規化換行與空白，讓格式略有不同的貼上內容得到相同的鍵值"""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [_HORIZONTAL_SPACE_RE.sub(" ", line).strip() for line in text.split("\n")]
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def make_cache_key(resume_text, job_description, output_language, model_name, prompt_version):
+    """以正規化後的輸入、輸出語言、模型與提示詞版本產生快取鍵值"""
+    parts = [
+        normalize_text(resume_text),
+        normalize_text(job_description),
+        output_language,
+        model_name,
+        str(prompt_version),
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """跨 session 共用的分析結果快取（以位元組計量的 LRU + TTL）"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (payload, size, expires_at)
+        self._lock = threading.Lock()
+        self._current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """讀取快取，命中時回傳結果副本，否則回傳 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, _, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # 以序列化字串保存，每次回傳獨立副本，避免不同 session 互相修改
+        return json.loads(payload)
+
+    def set(self, key, value):
+        """寫入快取，超出容量時從最久未使用的項目開始淘汰"""
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (payload, size, expires_at)
+            self._current_bytes += size
+            while self._current_bytes > self.max_bytes and self._entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._current_bytes -= size
+
+    def clear(self):
+        """清空快取（計數器保留）"""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self):
+        """回傳命中、未命中、淘汰等統計數據"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """取得行程內唯一的結果快取（所有 session 共用）"""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache(
+                    max_bytes=int(os.getenv("JOBMATCH_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                    ttl_seconds=float(os.getenv("JOBMATCH_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+                )
+    return _result_cache
+
+
+_profile_cache = None
+
+
+def get_profile_cache():
+    """取得行程內唯一的履歷摘要快取（與分析結果分開，命中率不會互相混雜）"""
+    global _profile_cache
+    if _profile_cache is None:
+        with _result_cache_lock:
+            if _profile_cache is None:
+                _profile_cache = ResultCache(
+                    max_bytes=int(os.getenv("JOBMATCH_PROFILE_CACHE_MAX_BYTES", DEFAULT_PROFILE_MAX_BYTES)),
+                    ttl_seconds=float(os.getenv("JOBMATCH_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+                )
+    return _profile_cache
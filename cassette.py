@@ -0,0 +1,259 @@
+import dataclasses
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+
+# 預設的錄製檔位置（JSONL，每行一筆回應）
+DEFAULT_CASSETTE_PATH = os.path.join("cassettes", "gemini.jsonl")
+
+CASSETTE_MODES = ("record", "replay")
+
+
+class CassetteMissError(Exception):
+    """回放模式下找不到相同請求的錄製內容"""
+
+
+def _config_to_dict(generation_config):
+    if generation_config is None:
+        return None
+    if dataclasses.is_dataclass(generation_config):
+        generation_config = dataclasses.asdict(generation_config)
+    if isinstance(generation_config, dict):
+        return {key: value for key, value in sorted(generation_config.items()) if value is not None}
+    return repr(generation_config)
+
+
+def make_fingerprint(model_name, contents, generation_config=None):
+    """以模型名稱、提示詞與生成參數產生請求指紋（是否串流不影響，兩種呼叫可互相回放）"""
+    payload = json.dumps(
+        [model_name, str(contents), _config_to_dict(generation_config)],
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """錄製的 Gemini 回應：指紋 → 依錄製順序排列的回應列表
+
+    同一指紋錄到多筆時，回放依序輪流使用，重現模型輸出不一致的情況。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._replay_positions = {}
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        print(f"錄製檔第 {line_number} 行不是有效的 JSON，已略過: {e}", file=sys.stderr)
+                        continue
+                    self._entries.setdefault(entry["fingerprint"], []).append(entry)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(entries) for entries in self._entries.values())
+
+    def record(self, entry):
+        """寫入一筆回應（立即附加到檔案，中途結束也不會遺失已錄製的內容）"""
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._entries.setdefault(entry["fingerprint"], []).append(entry)
+            self.recorded += 1
+
+    def next_entry(self, fingerprint):
+        with self._lock:
+            entries = self._entries.get(fingerprint)
+            if not entries:
+                self.misses += 1
+                raise CassetteMissError(f"錄製檔中沒有這個請求（指紋 {fingerprint[:12]}）")
+            position = self._replay_positions.get(fingerprint, 0)
+            self._replay_positions[fingerprint] = position + 1
+            self.replayed += 1
+            return entries[position % len(entries)]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": sum(len(entries) for entries in self._entries.values()),
+                "requests": len(self._entries),
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "misses": self.misses,
+            }
+
+
+def _usage_to_dict(usage):
+    if usage is None:
+        return None
+    return {
+        "prompt_token_count": getattr(usage, "prompt_token_count", 0) or 0,
+        "candidates_token_count": getattr(usage, "candidates_token_count", 0) or 0,
+    }
+
+
+class _RecordingStream:
+    """包住串流回應：照常逐段產生，同時記錄每段相對於請求開始的時間，完整結束後寫入錄製檔"""
+
+    def __init__(self, response, on_complete, started_at):
+        self._response = response
+        self._on_complete = on_complete
+        self._started_at = started_at
+
+    def __iter__(self):
+        chunks = []
+        for chunk in self._response:
+            try:
+                chunks.append([time.perf_counter() - self._started_at, chunk.text])
+            except ValueError:
+                # 沒有文字內容的片段（例如結束訊號）不錄製
+                pass
+            yield chunk
+        self._on_complete(chunks, getattr(self._response, "usage_metadata", None))
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+class RecordingModel:
+    """錄製模式：呼叫真正的模型，並把回應與片段時間寫入錄製檔（只錄製成功的回應）"""
+
+    def __init__(self, model, model_name, cassette):
+        self._model = model
+        self._model_name = model_name
+        self._cassette = cassette
+
+    def generate_content(self, contents, generation_config=None, stream=False, **kwargs):
+        fingerprint = make_fingerprint(self._model_name, contents, generation_config)
+        started_at = time.perf_counter()
+
+        def save(chunks, usage):
+            self._cassette.record({
+                "fingerprint": fingerprint,
+                "model": self._model_name,
+                "stream": stream,
+                "recorded_at": time.time(),
+                "chunks": [[round(offset, 4), text] for offset, text in chunks],
+                "usage": _usage_to_dict(usage),
+            })
+
+        response = self._model.generate_content(contents, generation_config=generation_config, stream=stream, **kwargs)
+        if stream:
+            return _RecordingStream(response, save, started_at)
+        save([[time.perf_counter() - started_at, response.text]], getattr(response, "usage_metadata", None))
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+class ReplayUsageMetadata:
+    def __init__(self, usage):
+        usage = usage or {}
+        self.prompt_token_count = usage.get("prompt_token_count", 0)
+        self.candidates_token_count = usage.get("candidates_token_count", 0)
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+
+class ReplayChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class ReplayResponse:
+    """回放的回應：非串流時等到最後一段的時間才回傳，串流時依錄製的時間逐段產生"""
+
+    def __init__(self, entry, started_at, time_scale):
+        self._chunks = entry["chunks"]
+        self._started_at = started_at
+        self._time_scale = time_scale
+        self.text = "".join(text for _, text in self._chunks)
+        self.usage_metadata = ReplayUsageMetadata(entry.get("usage"))
+
+    def _wait_until(self, offset):
+        delay = offset * self._time_scale - (time.perf_counter() - self._started_at)
+        if delay > 0:
+            time.sleep(delay)
+
+    def __iter__(self):
+        for offset, text in self._chunks:
+            self._wait_until(offset)
+            yield ReplayChunk(text)
+
+    def wait_until_complete(self):
+        if self._chunks:
+            self._wait_until(self._chunks[-1][0])
+
+
+class ReplayModel:
+    """回放模式：不連網、不需要 API 金鑰，依請求指紋回傳錄製的回應
+
+    time_scale 為時間倍率：1 依原始時間，0.5 快一倍，0 立即回傳。
+    """
+
+    def __init__(self, model_name, cassette, time_scale=1.0):
+        self._model_name = model_name
+        self._cassette = cassette
+        self._time_scale = time_scale
+
+    def generate_content(self, contents, generation_config=None, stream=False, **kwargs):
+        started_at = time.perf_counter()
+        entry = self._cassette.next_entry(make_fingerprint(self._model_name, contents, generation_config))
+        response = ReplayResponse(entry, started_at, self._time_scale)
+        if not stream:
+            response.wait_until_complete()
+        return response
+
+    def count_tokens(self, contents, **kwargs):
+        return ReplayUsageMetadata({"prompt_token_count": len(str(contents)) // 4})
+
+
+def get_cassette_mode():
+    """JOBMATCH_CASSETTE_MODE：record（錄製）、replay（回放）或未設定（直接呼叫 API）"""
+    mode = os.getenv("JOBMATCH_CASSETTE_MODE", "").strip().lower()
+    return mode if mode in CASSETTE_MODES else None
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette():
+    """取得行程內共用的錄製檔（JOBMATCH_CASSETTE_PATH 可指定位置）"""
+    global _cassette
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette(os.getenv("JOBMATCH_CASSETTE_PATH", DEFAULT_CASSETTE_PATH))
+    return _cassette
+
+
+def wrap_model(model, model_name):
+    """錄製模式下包住真正的模型；其他模式原樣回傳"""
+    if get_cassette_mode() == "record":
+        return RecordingModel(model, model_name, get_cassette())
+    return model
+
+
+def make_replay_model(model_name):
+    """建立回放模型（JOBMATCH_CASSETTE_TIME_SCALE 設定時間倍率，預設 1）"""
+    return ReplayModel(model_name, get_cassette(), float(os.getenv("JOBMATCH_CASSETTE_TIME_SCALE", 1.0)))
@@ -0,0 +1,287 @@
+import html
+import math
+import os
+import re
+import threading
+from html.parser import HTMLParser
+
+from cache import normalize_text
+
+
+# 預設輸入 token 預算（0 表示不限制）
+DEFAULT_RESUME_TOKEN_BUDGET = 4000
+DEFAULT_JOB_TOKEN_BUDGET = 3000
+
+# 履歷只移除至少這麼長的重複行（各段經歷底下重複的「職責」等短標題與條列是正常內容）
+DEFAULT_RESUME_DEDUPE_MIN_TOKENS = 20
+
+# 只有出現常見的網頁標籤時才當成 HTML 處理，避免把「List<String>」「Map<K, V>」這類技術內容當成標籤移除
+_HTML_MARKER_RE = re.compile(
+    r"<!doctype html|<(?:html|head|body|div|p|br|span|a|ul|ol|li|table|tr|td|th|h[1-6]|strong|em|b|i|"
+    r"section|article|header|footer|nav|script|style)\b[^<>]*>",
+    re.IGNORECASE,
+)
+_CJK_RE = re.compile(r"[一-鿿㐀-䶿぀-ヿ가-힯　-〿＀-￯]")
+_MARKDOWN_HEADER_RE = re.compile(r"^#{1,6}\s+")
+_MARKDOWN_EMPHASIS_RE = re.compile(r"(\*\*|__)(.+?)\1")
+_BULLET_RE = re.compile(r"^(?:[-*•●▪■◆・]|\d+[.)、])\s*")
+
+# 網頁常見的區塊標籤：轉成換行；這些標籤內的文字整段略過
+_BLOCK_TAGS = frozenset({
+    "p", "div", "br", "li", "ul", "ol", "tr", "table", "section", "article",
+    "h1", "h2", "h3", "h4", "h5", "h6", "dt", "dd",
+})
+_SKIPPED_TAGS = frozenset({"script", "style", "nav", "header", "footer", "noscript", "svg", "form", "button"})
+
+# 職缺中與能力評估無關的段落標題（整段略過，直到下一個標題）
+# 關鍵字只在明確的標題行（以冒號結尾或以【】括起）中有效；
+# 沒有標題標記的行必須整行就是段落名稱，避免「Privacy Engineer」這類職稱被當成標題
+_BOILERPLATE_HEADING_RE = re.compile(
+    r"(?:equal (?:employment )?opportunit|\beeo\b|diversity|benefits|perks|what we offer|"
+    r"about (?:us|the company)|privacy|how to apply|福利|待遇|關於我們|公司介紹|公司簡介|隱私|應徵方式)",
+    re.IGNORECASE,
+)
+_BOILERPLATE_TITLE_RE = re.compile(
+    r"(?:our |the )?(?:benefits|perks|(?:benefits|perks) (?:and|&) (?:benefits|perks)|what we offer|"
+    r"about (?:us|the company)|privacy(?: notice| policy| statement)?|how to apply|"
+    r"equal (?:employment )?opportunity(?: employer| statement)?|eeo(?: statement)?|"
+    r"diversity(?:,? equity)?(?:,? (?:and|&) inclusion)?(?: statement)?|"
+    r"(?:員工|公司)?福利(?:待遇)?|(?:薪資)?待遇(?:福利)?|薪資福利|關於我們|公司介紹|公司簡介|"
+    r"隱私權?(?:聲明|政策)?|應徵方式)",
+    re.IGNORECASE,
+)
+
+# 文件開頭的幾行通常是職稱與公司名稱，一律保留
+_PROTECTED_LEADING_LINES = 2
+
+# 單獨出現時可直接略過的一行（網頁導覽、分享按鈕等）
+_BOILERPLATE_LINE_RE = re.compile(
+    r"^(?:apply now|apply|save|share|share this job|sign in|log in|login|report this job|"
+    r"back to (?:search|jobs)|show more|show less|see more|立即應徵|我要應徵|應徵|收藏|分享|登入|回到列表|顯示更多)$|"
+    r"equal opportunity employer|without regard to (?:race|sex|age)|we use cookies",
+    re.IGNORECASE,
+)
+
+# 與能力評估最相關的段落，超出預算時最後才截斷
+_PRIORITY_HEADING_RE = re.compile(
+    r"(?:requirement|qualification|responsibilit|skill|must have|you will|what you|experience|"
+    r"條件|要求|資格|工作內容|職責|技能|必備|加分|專長|經歷|經驗|工作項目)",
+    re.IGNORECASE,
+)
+
+
+class _TextExtractor(HTMLParser):
+    """把 HTML 轉成純文字，區塊標籤轉為換行"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+class CompactionResult:
+    """壓縮後的文字與估計節省的 token 數"""
+
+    def __init__(self, text, original_tokens, compacted_tokens):
+        self.text = text
+        self.original_tokens = original_tokens
+        self.compacted_tokens = compacted_tokens
+
+    @property
+    def saved_tokens(self):
+        return self.original_tokens - self.compacted_tokens
+
+
+def estimate_tokens(text):
+    """粗估 token 數：中日韓文字約一字一個 token，其他文字約四個字元一個 token"""
+    cjk_count = len(_CJK_RE.findall(text))
+    return cjk_count + math.ceil((len(text) - cjk_count) / 4)
+
+
+def strip_markup(text):
+    """移除 HTML 標籤與 Markdown 標記，保留文字內容與段落結構（只在文字看起來是網頁時才解析標籤）"""
+    if _HTML_MARKER_RE.search(text):
+        extractor = _TextExtractor()
+        extractor.feed(text)
+        extractor.close()
+        # 區塊標籤前後都會產生換行，網頁轉出的空行不具段落意義
+        text = "\n".join(line for line in "".join(extractor.parts).split("\n") if line.strip())
+    else:
+        text = html.unescape(text)
+    lines = []
+    for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        line = _MARKDOWN_HEADER_RE.sub("", line.strip())
+        lines.append(_MARKDOWN_EMPHASIS_RE.sub(r"\2", line))
+    return "\n".join(lines)
+
+
+def dedupe_lines(lines, min_tokens=0):
+    """移除重複出現的行（忽略大小寫與項目符號），保留第一次出現的位置與空行
+
+    min_tokens 大於 0 時只移除估計 token 數至少為此值的重複行，較短的行一律保留。
+    """
+    seen = set()
+    result = []
+    for line in lines:
+        key = _BULLET_RE.sub("", line).lower()
+        if key and estimate_tokens(key) >= min_tokens:
+            if key in seen:
+                continue
+            seen.add(key)
+        result.append(line)
+    return result
+
+
+def _has_heading_marker(line):
+    return line.endswith((":", "：")) or (line.startswith(("【", "[")) and line.endswith(("】", "]")))
+
+
+def _heading_title(line):
+    """去掉標題標記（冒號、【】）後的段落名稱"""
+    return line.strip("【】[] ").rstrip(":：").strip()
+
+
+def _is_heading(line):
+    """以冒號結尾、以【】括起，或整行就是常見段落名稱的短行視為段落標題"""
+    if not line or len(line) > 40 or _BULLET_RE.match(line):
+        return False
+    if _has_heading_marker(line):
+        return True
+    return len(line) <= 25 and bool(
+        _BOILERPLATE_TITLE_RE.fullmatch(_heading_title(line)) or _PRIORITY_HEADING_RE.search(line)
+    )
+
+
+def _is_boilerplate_heading(line):
+    """福利、EEO、公司介紹等段落的標題：有標題標記且提到段落名稱，或整行就是段落名稱"""
+    if _PRIORITY_HEADING_RE.search(line):
+        return False
+    if _BOILERPLATE_TITLE_RE.fullmatch(_heading_title(line)):
+        return True
+    return _has_heading_marker(line) and bool(_BOILERPLATE_HEADING_RE.search(line))
+
+
+def drop_boilerplate(lines):
+    """略過福利、EEO 聲明、公司介紹等段落，以及網頁導覽文字（開頭的職稱與公司名稱一律保留）"""
+    result = []
+    skipping = False
+    leading = 0
+    for line in lines:
+        if leading < _PROTECTED_LEADING_LINES:
+            if line.strip():
+                leading += 1
+            result.append(line)
+            continue
+        if _is_heading(line):
+            skipping = _is_boilerplate_heading(line)
+            if skipping:
+                continue
+        if skipping or _BOILERPLATE_LINE_RE.search(line):
+            continue
+        result.append(line)
+    return result
+
+
+def split_sections(lines):
+    """依段落標題切分，回傳 [(是否為重點段落, 行列表)]"""
+    sections = []
+    for line in lines:
+        heading = _is_heading(line)
+        if heading or not sections:
+            sections.append((heading and bool(_PRIORITY_HEADING_RE.search(line)), []))
+        sections[-1][1].append(line)
+    return sections
+
+
+def enforce_budget(lines, budget):
+    """超出 token 預算時，從最不重要的段落末尾開始截斷
+
+    重點段落（條件、職責、技能等）最後才截；同等重要時先截後面的段落。
+    每個段落至少保留標題行，讓模型知道原文有該段落。
+    """
+    if not budget or estimate_tokens("\n".join(lines)) <= budget:
+        return lines
+    sections = split_sections(lines)
+    costs = [[estimate_tokens(line) + 1 for line in section_lines] for _, section_lines in sections]
+    total = sum(sum(section_costs) for section_costs in costs)
+    # 截斷順序：一般段落（由後往前）→ 重點段落（由後往前）
+    order = sorted(range(len(sections)), key=lambda index: (sections[index][0], -index))
+    for index in order:
+        section_lines = sections[index][1]
+        while total > budget and len(section_lines) > 1:
+            section_lines.pop()
+            total -= costs[index].pop()
+        if total <= budget:
+            break
+    return [line for _, section_lines in sections for line in section_lines]
+
+
+def compact_text(text, budget=None, drop_boilerplate_blocks=True, dedupe_min_tokens=0):
+    """送入提示詞前的壓縮：移除標記、重複行與樣板段落，並套用 token 預算"""
+    original_tokens = estimate_tokens(text)
+    lines = normalize_text(strip_markup(text)).split("\n")
+    lines = dedupe_lines(lines, dedupe_min_tokens)
+    if drop_boilerplate_blocks:
+        lines = drop_boilerplate(lines)
+    lines = enforce_budget(lines, budget)
+    compacted = normalize_text("\n".join(lines))
+    # 壓縮後反而更長（理論上不會發生）或被清空時，保留原文
+    if not compacted or estimate_tokens(compacted) > original_tokens:
+        return CompactionResult(text, original_tokens, original_tokens)
+    return CompactionResult(compacted, original_tokens, estimate_tokens(compacted))
+
+
+def compact_resume(resume_text):
+    """壓縮履歷（履歷中的「關於我」等段落是本人資訊，不當成樣板略過；各段經歷重複的短標題與條列保留）；
+    JOBMATCH_COMPACTION=0 時不做任何處理"""
+    if os.getenv("JOBMATCH_COMPACTION", "1") == "0":
+        resume_tokens = estimate_tokens(resume_text)
+        return CompactionResult(resume_text, resume_tokens, resume_tokens)
+    resume_budget = int(os.getenv("JOBMATCH_RESUME_TOKEN_BUDGET", DEFAULT_RESUME_TOKEN_BUDGET))
+    return compact_text(
+        resume_text, resume_budget, drop_boilerplate_blocks=False, dedupe_min_tokens=DEFAULT_RESUME_DEDUPE_MIN_TOKENS
+    )
+
+
+def compact_inputs(resume_text, job_description):
+    """壓縮履歷與職缺描述；回傳 (履歷結果, 職缺結果)，JOBMATCH_COMPACTION=0 時不做任何處理"""
+    if os.getenv("JOBMATCH_COMPACTION", "1") == "0":
+        job_tokens = estimate_tokens(job_description)
+        return compact_resume(resume_text), CompactionResult(job_description, job_tokens, job_tokens)
+    job_budget = int(os.getenv("JOBMATCH_JOB_TOKEN_BUDGET", DEFAULT_JOB_TOKEN_BUDGET))
+    resume = compact_resume(resume_text)
+    job = compact_text(job_description, job_budget)
+    record_saved_tokens(resume.saved_tokens + job.saved_tokens)
+    return resume, job
+
+
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "saved_tokens": 0}
+
+
+def record_saved_tokens(saved_tokens):
+    with _stats_lock:
+        _stats["requests"] += 1
+        _stats["saved_tokens"] += saved_tokens
+
+
+def get_compaction_stats():
+    """行程內累計的壓縮次數與節省的 token 數"""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,154 @@
+import os
+import sys
+import threading
+
+import google.generativeai as genai
+from dotenv import load_dotenv
+
+import cassette
+import metrics
+
+# 載入環境變數
+load_dotenv()
+
+DEFAULT_MODEL_NAME = 'gemini-2.5-flash-lite'
+
+# 分析用的預設生成參數（可由環境變數覆寫）
+DEFAULT_GENERATION_CONFIG = {
+    "temperature": 0.1,         # 降低溫度以提高一致性
+    "max_output_tokens": 4000,  # 增加 token 限制以避免截斷
+    "top_p": 0.8,               # 限制詞彙選擇範圍
+    "top_k": 20,                # 限制候選詞數量
+}
+
+_GENERATION_CONFIG_ENV = {
+    "temperature": ("JOBMATCH_TEMPERATURE", float),
+    "max_output_tokens": ("JOBMATCH_MAX_OUTPUT_TOKENS", int),
+    "top_p": ("JOBMATCH_TOP_P", float),
+    "top_k": ("JOBMATCH_TOP_K", int),
+}
+
+
+class MissingAPIKey(Exception):
+    """未設置 GOOGLE_API_KEY"""
+
+
+class GeminiClientRegistry:
+    """行程內共用的 Gemini 客戶端
+
+    genai.configure 每次呼叫都會清空 SDK 內部的連線，因此整個行程只設定一次，
+    之後所有 session 與呼叫共用同一組底層連線與 GenerativeModel 實例。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._configured = False
+        self._models = {}
+        self._warmed_up = False
+        self._warm_up_started = False
+
+    def configure(self):
+        """設定 API 金鑰與傳輸方式（只執行一次）"""
+        if self._configured:
+            return
+        with self._lock:
+            if self._configured:
+                return
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                raise MissingAPIKey("GOOGLE_API_KEY is not set")
+            options = {"api_key": api_key}
+            transport = os.getenv("JOBMATCH_TRANSPORT")
+            if transport:
+                options["transport"] = transport
+            genai.configure(**options)
+            self._configured = True
+
+    def get_model(self, model_name=None):
+        """取得（必要時建立）指定名稱的模型實例"""
+        model_name = model_name or get_model_name()
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+        # 回放模式不連網，也不需要 API 金鑰
+        replay = cassette.get_cassette_mode() == "replay"
+        if not replay:
+            self.configure()
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                if replay:
+                    model = cassette.make_replay_model(model_name)
+                else:
+                    model = cassette.wrap_model(genai.GenerativeModel(model_name), model_name)
+                self._models[model_name] = model
+        return model
+
+    def warm_up(self, model_name=None):
+        """預先建立連線，讓第一個請求不必負擔連線與設定成本"""
+        if self._warmed_up:
+            return
+        model = self.get_model(model_name)
+        try:
+            # count_tokens 不產生內容，只用來建立與 API 的連線
+            model.count_tokens("ping")
+        except Exception as e:
+            metrics.ERRORS.inc(stage="warmup")
+            print(f"Gemini 預熱失敗: {e}", file=sys.stderr)
+            return
+        self._warmed_up = True
+
+    def warm_up_in_background(self, model_name=None):
+        """在背景執行緒預熱，不阻塞頁面載入（每個行程只啟動一次）"""
+        with self._lock:
+            if self._warm_up_started:
+                return
+            self._warm_up_started = True
+        threading.Thread(target=self.warm_up, args=(model_name,), name="gemini-warm-up", daemon=True).start()
+
+    def reset(self):
+        """清除已建立的模型（測試或更換金鑰時使用）"""
+        with self._lock:
+            self._configured = False
+            self._models.clear()
+            self._warmed_up = False
+            self._warm_up_started = False
+
+
+def get_model_name():
+    """目前使用的模型名稱（JOBMATCH_MODEL 可覆寫）"""
+    return os.getenv("JOBMATCH_MODEL", DEFAULT_MODEL_NAME)
+
+
+def get_generation_config(**overrides):
+    """建立生成參數：預設值 < 環境變數 < 呼叫端指定"""
+    config = dict(DEFAULT_GENERATION_CONFIG)
+    for key, (env_name, cast) in _GENERATION_CONFIG_ENV.items():
+        value = os.getenv(env_name)
+        if value:
+            config[key] = cast(value)
+    config.update(overrides)
+    return genai.types.GenerationConfig(**config)
+
+
+_registry = GeminiClientRegistry()
+
+
+def get_registry():
+    """取得行程內唯一的客戶端登錄"""
+    return _registry
+
+
+def get_model(model_name=None):
+    """取得共用的模型實例"""
+    return _registry.get_model(model_name)
+
+
+def warm_up(model_name=None, background=True):
+    """在啟動時預熱連線（JOBMATCH_WARMUP=0 可停用）"""
+    if os.getenv("JOBMATCH_WARMUP", "1") == "0" or not os.getenv("GOOGLE_API_KEY"):
+        return
+    if background:
+        _registry.warm_up_in_background(model_name)
+    else:
+        _registry.warm_up(model_name)
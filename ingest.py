@@ -0,0 +1,375 @@
+import hashlib
+import io
+import multiprocessing
+import multiprocessing.connection
+import os
+import re
+import threading
+import time
+import zipfile
+from html.parser import HTMLParser
+from xml.etree import ElementTree
+
+import metrics
+from cache import ResultCache, normalize_text
+
+
+# 可上傳的檔案類型（.txt 直接解碼，其他格式在背景行程中擷取文字）
+SUPPORTED_EXTENSIONS = ("txt", "pdf", "docx", "html", "htm")
+
+# 擷取邏輯改變時遞增，讓舊的快取內容失效
+EXTRACTOR_VERSION = 1
+
+DEFAULT_EXTRACT_WORKERS = 2
+DEFAULT_EXTRACT_TIMEOUT = 60
+DEFAULT_EXTRACT_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# 等待擷取名額時檢查其他 session 是否已釋出名額的間隔；子行程結束後等待回收的時間
+_SLOT_POLL_SECONDS = 0.05
+_JOIN_SECONDS = 1
+_TIMEOUT_MESSAGE = "擷取文字逾時，檔案可能過大，請改貼上文字"
+
+_TEXT_ENCODINGS = ("utf-8-sig", "cp950", "gb18030")
+_HYPHENATED_BREAK_RE = re.compile(r"([A-Za-z])-\n([a-z])")
+_WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# HTML 中不屬於內容的標籤（整段略過）與區塊標籤（轉為換行）
+_SKIPPED_TAGS = frozenset({"script", "style", "noscript", "svg", "head"})
+_BLOCK_TAGS = frozenset({
+    "p", "div", "br", "li", "ul", "ol", "tr", "table", "section", "article", "header", "footer",
+    "h1", "h2", "h3", "h4", "h5", "h6", "dt", "dd", "td", "th",
+})
+
+
+class ExtractionError(Exception):
+    """無法從檔案擷取文字；message 為可直接顯示給用戶的訊息"""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class ExtractedFile:
+    """一個上傳檔案的擷取結果：成功時 text 為文字，失敗時 error 為訊息"""
+
+    def __init__(self, name, text=None, error=None, cached=False):
+        self.name = name
+        self.text = text
+        self.error = error
+        self.cached = cached
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """把 HTML 轉成純文字，區塊標籤轉為換行"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def get_extension(name):
+    return os.path.splitext(name or "")[1].lower().lstrip(".")
+
+
+def decode_text(data):
+    """依序嘗試常見編碼解碼純文字檔（繁中 Windows 匯出的檔案常為 cp950）"""
+    for encoding in _TEXT_ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("utf-8", errors="ignore")
+
+
+def extract_html(data):
+    extractor = _HTMLTextExtractor()
+    extractor.feed(decode_text(data))
+    extractor.close()
+    return "".join(extractor.parts)
+
+
+def extract_docx(data):
+    """直接讀取 word/document.xml（不需要額外套件）：段落、表格儲存格、定位字元與換行"""
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            root = ElementTree.fromstring(archive.read("word/document.xml"))
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+        raise ExtractionError(f"不是有效的 .docx 檔案：{e}") from e
+
+    paragraphs = []
+    for paragraph in root.iter(f"{_WORD_NAMESPACE}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_WORD_NAMESPACE}t" and node.text:
+                parts.append(node.text)
+            elif node.tag == f"{_WORD_NAMESPACE}tab":
+                parts.append("\t")
+            elif node.tag in (f"{_WORD_NAMESPACE}br", f"{_WORD_NAMESPACE}cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs)
+
+
+def extract_pdf(data):
+    """以 pypdf 擷取每頁文字（選用套件，未安裝時回報錯誤）"""
+    try:
+        from pypdf import PdfReader
+        from pypdf.errors import PdfReadError
+    except ImportError as e:
+        raise ExtractionError("伺服器未安裝 pypdf，無法讀取 PDF，請改貼上文字") from e
+
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        if reader.is_encrypted:
+            reader.decrypt("")
+        pages = [page.extract_text() or "" for page in reader.pages]
+    except (PdfReadError, ValueError, KeyError) as e:
+        raise ExtractionError(f"無法讀取 PDF：{e}") from e
+    # PDF 常在行尾以連字號斷字，接回同一個字
+    return _HYPHENATED_BREAK_RE.sub(r"\1\2", "\n\n".join(pages))
+
+
+_EXTRACTORS = {
+    "txt": decode_text,
+    "pdf": extract_pdf,
+    "docx": extract_docx,
+    "html": extract_html,
+    "htm": extract_html,
+}
+
+
+def extract_text(name, data):
+    """依副檔名擷取文字並正規化空白（在背景行程中執行，只使用可序列化的參數）"""
+    extractor = _EXTRACTORS.get(get_extension(name))
+    if extractor is None:
+        raise ExtractionError(_unsupported_message(name))
+    return normalize_text(extractor(data))
+
+
+def make_content_key(name, data):
+    """以擷取方式、檔案內容與擷取版本產生快取鍵值
+
+    檔名不同但內容與格式相同的檔案共用結果；同樣的內容以不同副檔名上傳時會用不同的
+    擷取方式（例如 .html 與 .txt），各自快取。.htm 與 .html 使用相同的擷取方式，共用結果。
+    """
+    extractor = _EXTRACTORS.get(get_extension(name))
+    kind = extractor.__name__ if extractor is not None else get_extension(name)
+    return hashlib.sha256(f"v{EXTRACTOR_VERSION}\x1f{kind}\x1f".encode("utf-8") + data).hexdigest()
+
+
+_extraction_slots = None
+_extraction_slots_lock = threading.Lock()
+_extraction_context = None
+
+
+def get_extraction_slots():
+    """取得行程內共用的擷取名額（JOBMATCH_EXTRACT_WORKERS 可調整數量），限制同時執行的擷取子行程"""
+    global _extraction_slots
+    if _extraction_slots is None:
+        with _extraction_slots_lock:
+            if _extraction_slots is None:
+                _extraction_slots = threading.BoundedSemaphore(
+                    int(os.getenv("JOBMATCH_EXTRACT_WORKERS", DEFAULT_EXTRACT_WORKERS))
+                )
+    return _extraction_slots
+
+
+def get_extraction_context():
+    """取得建立擷取子行程的 multiprocessing context
+
+    Streamlit 伺服器有多個執行緒，直接 fork 可能複製到被鎖住的鎖；改由 forkserver
+    （Windows 沒有時用 spawn）建立子行程，且不會重新執行主程式。forkserver 預先載入本模組，
+    每個檔案各開一個子行程時只需要 fork，不必重新 import。
+    """
+    global _extraction_context
+    if _extraction_context is None:
+        with _extraction_slots_lock:
+            if _extraction_context is None:
+                if "forkserver" in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context("forkserver")
+                    context.set_forkserver_preload([__name__])
+                else:
+                    context = multiprocessing.get_context("spawn")
+                _extraction_context = context
+    return _extraction_context
+
+
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache():
+    """取得行程內唯一的擷取結果快取（所有 session 與批次共用，不設有效期限）"""
+    global _extraction_cache
+    if _extraction_cache is None:
+        with _extraction_cache_lock:
+            if _extraction_cache is None:
+                _extraction_cache = ResultCache(
+                    max_bytes=int(os.getenv("JOBMATCH_EXTRACT_CACHE_MAX_BYTES", DEFAULT_EXTRACT_CACHE_MAX_BYTES)),
+                    ttl_seconds=0,
+                )
+    return _extraction_cache
+
+
+def _unsupported_message(name):
+    return f"不支援的檔案類型：{name}（支援 {', '.join(SUPPORTED_EXTENSIONS)}）"
+
+
+def _run_extraction(connection, name, data):
+    """在子行程（或備用的背景執行緒）中擷取文字，以 (成功與否, 文字或錯誤訊息) 經由 connection 傳回"""
+    try:
+        outcome = (True, extract_text(name, data))
+    except ExtractionError as e:
+        outcome = (False, e.message)
+    except Exception as e:
+        outcome = (False, f"擷取文字失敗：{e}")
+    try:
+        connection.send(outcome)
+    except OSError:
+        # 呼叫端已因逾時放棄等待
+        pass
+    finally:
+        connection.close()
+
+
+class _ExtractionJob:
+    """一個檔案的擷取工作：每個檔案各用一個子行程，逾時時只結束自己的子行程
+
+    無法建立子行程時改用背景執行緒，仍受同一個時限限制（逾時後放棄等待，不會卡住呼叫端）。
+    """
+
+    def __init__(self, name, data, context):
+        self.connection, child_connection = context.Pipe(duplex=False)
+        try:
+            self.worker = context.Process(target=_run_extraction, args=(child_connection, name, data), daemon=True)
+            self.worker.start()
+        except Exception:
+            self.worker = threading.Thread(target=_run_extraction, args=(child_connection, name, data), daemon=True)
+            self.worker.start()
+        else:
+            child_connection.close()
+
+    def receive(self):
+        """讀取已完成的結果；子行程沒有回傳就結束時（例如記憶體不足被終止）回報錯誤"""
+        try:
+            outcome = self.connection.recv()
+        except (EOFError, OSError):
+            outcome = (False, "擷取文字失敗：擷取行程異常結束")
+        if isinstance(self.worker, multiprocessing.process.BaseProcess):
+            self.worker.join(_JOIN_SECONDS)
+        self.stop()
+        return outcome
+
+    def stop(self):
+        """結束仍在執行的子行程並回收；背景執行緒無法中止，只關閉連線"""
+        if isinstance(self.worker, multiprocessing.process.BaseProcess) and self.worker.is_alive():
+            self.worker.terminate()
+            self.worker.join(_JOIN_SECONDS)
+        self.connection.close()
+
+
+def _extract_in_processes(pending, results, cache, timeout):
+    """把 pending（索引 → (鍵值, 檔名, 內容)）分別交給獨立的子行程擷取，結果寫回 results
+
+    所有檔案共用一個整體時限（不是每個檔案各等 timeout），等待擷取名額的時間也計入；
+    逾時只結束這次請求自己的子行程，不影響其他 session 正在進行的擷取。
+    """
+    slots = get_extraction_slots()
+    context = get_extraction_context()
+    deadline = time.monotonic() + timeout
+    queued = list(pending)
+    running = {}
+
+    def finish(index, outcome):
+        key, name, _ = pending[index]
+        succeeded, value = outcome
+        if succeeded:
+            cache.set(key, value)
+            results[index] = ExtractedFile(name, value)
+        else:
+            metrics.ERRORS.inc(stage="extraction")
+            results[index] = ExtractedFile(name, error=value)
+
+    try:
+        while queued or running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            while queued:
+                # 自己沒有執行中的工作時才阻塞等名額，否則先處理已完成的結果
+                acquired = slots.acquire(blocking=False) if running else slots.acquire(timeout=remaining)
+                if not acquired:
+                    break
+                index = queued.pop(0)
+                _, name, data = pending[index]
+                try:
+                    job = _ExtractionJob(name, data, context)
+                except BaseException:
+                    slots.release()
+                    raise
+                running[job.connection] = (index, job)
+            if not running:
+                continue
+            # 還有檔案在等名額時定期醒來，其他 session 釋出的名額也能用上
+            wait_seconds = min(remaining, _SLOT_POLL_SECONDS) if queued else remaining
+            for connection in multiprocessing.connection.wait(list(running), timeout=wait_seconds):
+                index, job = running.pop(connection)
+                slots.release()
+                finish(index, job.receive())
+    finally:
+        for index, job in running.values():
+            job.stop()
+            slots.release()
+    for index in [*queued, *(index for index, _ in running.values())]:
+        finish(index, (False, _TIMEOUT_MESSAGE))
+
+
+def extract_files(files):
+    """擷取多個上傳檔案的文字，回傳與輸入順序相同的 ExtractedFile 列表
+
+    files 為 (檔名, 內容位元組) 的序列。內容相同的檔案直接使用快取；.txt 在目前的
+    執行緒解碼，其他格式各自在子行程中同時擷取，不佔用 Streamlit 的執行緒與 GIL。
+    """
+    cache = get_extraction_cache()
+    results = [None] * len(files)
+    pending = {}
+
+    for index, (name, data) in enumerate(files):
+        extension = get_extension(name)
+        if extension not in _EXTRACTORS:
+            results[index] = ExtractedFile(name, error=_unsupported_message(name))
+            continue
+        key = make_content_key(name, data)
+        cached_text = cache.get(key)
+        if cached_text is not None:
+            results[index] = ExtractedFile(name, cached_text, cached=True)
+        elif extension == "txt":
+            text = extract_text(name, data)
+            cache.set(key, text)
+            results[index] = ExtractedFile(name, text)
+        else:
+            pending[index] = (key, name, data)
+
+    if pending:
+        with metrics.time_stage("extraction"):
+            timeout = float(os.getenv("JOBMATCH_EXTRACT_TIMEOUT", DEFAULT_EXTRACT_TIMEOUT))
+            _extract_in_processes(pending, results, cache, timeout)
+    return results
+
@@ -0,0 +1,170 @@
+"""JobMatch.AI 命令列工具（不需要瀏覽器或 Streamlit 伺服器）
+
+批次評分：
+    python -m jobmatch score --input pairs.jsonl --output results.jsonl --workers 4
+
+輸入檔每行一個 JSON 物件：
+    {"id": "a1", "resume": "...", "job_description": "...", "language": "中文"}
+id 與 language 可省略（id 預設為行號，language 預設為 --language）。
+
+結果在完成時立即逐行寫入輸出檔；輸出檔已存在時會略過已成功的 id 並接續處理，
+失敗的項目會重新嘗試（同一 id 以最後一筆為準）。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from analyzer import analyze_resume_job_match, AnalysisError
+from batch import get_batch_workers
+from metrics import write_metrics_file
+
+# 支援的輸出語言
+OUTPUT_LANGUAGES = ("中文", "English")
+
+
+def iter_pairs(input_file, default_language):
+    """逐行讀取輸入檔，產生 (id, 履歷, 職缺, 語言, 錯誤訊息)
+
+    格式不符的行（不是有效的 JSON 物件、欄位不是字串、不支援的語言）不會中斷批次，錯誤訊息不為 None，由 score_pair 寫成失敗紀錄。
+    """
+    for line_number, line in enumerate(input_file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            yield str(line_number), "", "", default_language, "輸入行不是有效的 JSON"
+            continue
+        if not isinstance(record, dict):
+            yield str(line_number), "", "", default_language, "輸入行必須是 JSON 物件"
+            continue
+        pair_id = str(record.get("id", line_number))
+        resume_text = record.get("resume") or record.get("resume_text") or ""
+        job_description = record.get("job_description") or record.get("jd") or ""
+        language = record.get("language") or default_language
+        if not isinstance(resume_text, str) or not isinstance(job_description, str) or not isinstance(language, str):
+            yield pair_id, "", "", default_language, "resume、job_description 與 language 必須是字串"
+            continue
+        if language not in OUTPUT_LANGUAGES:
+            yield pair_id, "", "", default_language, f"language 必須是 {' 或 '.join(OUTPUT_LANGUAGES)}"
+            continue
+        yield pair_id, resume_text, job_description, language, None
+
+
+def load_completed_ids(output_path):
+    """讀取既有輸出檔中已成功的 id（忽略寫到一半的最後一行）"""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                completed.add(str(record.get("id")))
+            else:
+                completed.discard(str(record.get("id")))
+    return completed
+
+
+def score_pair(pair_id, resume_text, job_description, language, error=None):
+    """分析單一組履歷與職缺，回傳輸出紀錄；error 不為 None 時（輸入格式不符）直接回傳失敗紀錄"""
+    start = time.perf_counter()
+    record = {"id": pair_id, "language": language}
+    if error is not None:
+        record.update(status="error", error=error)
+    elif not resume_text.strip() or not job_description.strip():
+        record.update(status="error", error="resume 或 job_description 為空")
+    else:
+        try:
+            result = analyze_resume_job_match(resume_text, job_description, language)
+            record.update(status="ok", match_score=result.get("match_score"), result=result)
+        except AnalysisError as e:
+            record.update(status="error", error=e.message)
+        except Exception as e:
+            record.update(status="error", error=str(e))
+    record["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def score_file(input_path, output_path, workers=None, language="中文", resume=True):
+    """批次評分：以有限並行數處理輸入檔，結果完成即寫入輸出檔；回傳 (成功數, 失敗數)"""
+    workers = workers or get_batch_workers()
+    completed_ids = load_completed_ids(output_path) if resume else set()
+    mode = "a" if resume else "w"
+
+    # 上次中斷時最後一行可能沒有換行，先補上避免與新紀錄黏在一起
+    if resume and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        with open(output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+        if needs_newline:
+            with open(output_path, "a", encoding="utf-8") as f:
+                f.write("\n")
+
+    ok_count = error_count = 0
+    with open(input_path, encoding="utf-8") as input_file, \
+            open(output_path, mode, encoding="utf-8") as output_file, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jobmatch-score") as executor:
+        pending = set()
+
+        def drain(return_when):
+            nonlocal ok_count, error_count, pending
+            done, pending = wait(pending, return_when=return_when)
+            for future in done:
+                record = future.result()
+                output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output_file.flush()
+                if record["status"] == "ok":
+                    ok_count += 1
+                else:
+                    error_count += 1
+                print(f"[{record['status']}] {record['id']} ({record['elapsed_seconds']}s)", file=sys.stderr)
+
+        for pair_id, resume_text, job_description, pair_language, error in iter_pairs(input_file, language):
+            if pair_id in completed_ids:
+                continue
+            # 控制同時在途的工作數量，避免一次讀入整個大檔
+            if len(pending) >= workers * 2:
+                drain(FIRST_COMPLETED)
+            pending.add(executor.submit(score_pair, pair_id, resume_text, job_description, pair_language, error))
+        while pending:
+            drain(FIRST_COMPLETED)
+    return ok_count, error_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m jobmatch", description="JobMatch.AI 命令列工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    score_parser = subparsers.add_parser("score", help="批次評分 JSONL 中的履歷與職缺")
+    score_parser.add_argument("--input", "-i", required=True, help="輸入 JSONL 檔案")
+    score_parser.add_argument("--output", "-o", required=True, help="輸出 JSONL 檔案")
+    score_parser.add_argument("--workers", "-w", type=int, default=None, help="並行數（預設 JOBMATCH_BATCH_WORKERS 或 5）")
+    score_parser.add_argument("--language", "-l", default="中文", choices=OUTPUT_LANGUAGES, help="預設輸出語言")
+    score_parser.add_argument("--no-resume", action="store_true", help="覆寫輸出檔，不接續上次的進度")
+
+    args = parser.parse_args(argv)
+    if args.command == "score":
+        ok_count, error_count = score_file(
+            args.input,
+            args.output,
+            workers=args.workers,
+            language=args.language,
+            resume=not args.no_resume,
+        )
+        print(f"完成：成功 {ok_count}，失敗 {error_count}", file=sys.stderr)
+        # 命令列執行時間可能短於匯出間隔，結束前寫出最終的指標
+        write_metrics_file()
+        return 1 if error_count else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+import json
+import re
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+_STRING_CONTROL_REPLACEMENTS = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_LITERALS = {"t": "true", "f": "false", "n": "null"}
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+_STRING_SPECIAL_RE = re.compile(r'["\\\x00-\x1f]')
+_WHITESPACE_RE = re.compile(r"[ \n\r\t]+")
+_DECODER = json.JSONDecoder()
+_NON_WHITESPACE_RE = re.compile(r"[^ \n\r\t]")
+# ```json 區塊的開頭標記
+_FENCE_OPEN_RE = re.compile(r"```(?:json)?[ \t]*\r?\n", re.IGNORECASE)
+# JSON 物件的開頭：{ 之後（略過空白）是鍵的引號或 }，說明文字中的「{role}」不算
+_OBJECT_START_RE = re.compile(r"\{[ \n\r\t]*[\"}]")
+
+
+class IncrementalJSONParser:
+    """逐段接收模型輸出的容錯 JSON 解析器
+
+    - 略過 JSON 前後的 ```json 標記與說明文字（{ 之後必須是鍵的引號或 }，說明文字中的 {role} 不會被當成開頭）
+    - 字串中的換行、tab 轉為合法跳脫字元，其他控制字元直接移除
+    - 容許 `,}` / `,]` 這類多餘逗號
+    - 每個頂層欄位完成時立即解析，可查詢哪些區塊已完整
+    - 輸出被截斷時，回復到最後一個完整值所在的最深位置
+    """
+
+    def __init__(self):
+        self._buf = []            # 清理後的 JSON 文字片段
+        self._stack = []          # [容器符號, 期待的下一個元素]
+        self._closers = ""        # 目前堆疊對應的補齊字元
+        self._started = False
+        self._pending_open = False  # 已看到 {，還在等下一個非空白字元確認是否為 JSON 開頭
+        self.complete = False
+        self.error = None
+
+        # 字串與純量狀態
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._string_chars = []
+        self._scalar = None       # 正在讀取的數字或 true/false/null
+
+        # 最後一個可安全補齊的位置與對應的補齊字元
+        self._safe_len = 0
+        self._safe_closers = ""
+        self._safe_depth = 0
+        self._last_comma = None
+
+        # 頂層欄位
+        self._sections = {}
+        self._current_key = None
+        self._section_key = None
+        self._section_start = None
+
+    # ---- 對外介面 ----
+
+    def feed(self, chunk):
+        """接收一段文字，回傳此段中新完成的頂層欄位名稱"""
+        completed = []
+        if self.complete or self.error:
+            return completed
+        pos = 0
+        length = len(chunk)
+        while pos < length:
+            if not self._started:
+                pos = self._find_start(chunk, pos)
+                if pos == -1:
+                    break
+                continue
+            if self._in_string and not self._escape:
+                # 字串內容整段複製，只在引號、反斜線與控制字元處逐字處理
+                match = _STRING_SPECIAL_RE.search(chunk, pos)
+                end = match.start() if match else length
+                if end > pos:
+                    run = chunk[pos:end]
+                    self._buf.append(run)
+                    self._string_chars.append(run)
+                    pos = end
+                    continue
+            elif self._scalar is None and not self._in_string:
+                match = _WHITESPACE_RE.match(chunk, pos)
+                if match:
+                    self._buf.append(match.group())
+                    pos = match.end()
+                    continue
+            self._consume(chunk[pos], completed)
+            pos += 1
+            if self.complete or self.error:
+                break
+        return completed
+
+    @property
+    def sections(self):
+        """已完整解析的頂層欄位"""
+        return dict(self._sections)
+
+    def completed_sections(self):
+        """已完整的頂層欄位名稱（依出現順序）"""
+        return list(self._sections)
+
+    def finish(self):
+        """結束解析，回傳 (結果, 是否被截斷)；完全無法回復時結果為 None"""
+        if not self._started:
+            return None, True
+        result = dict(self._sections)
+        if self.complete:
+            return result, False
+        partial = self._recover_partial_section()
+        if partial is not None:
+            result[self._section_key] = partial
+        return result, True
+
+    # ---- 內部狀態機 ----
+
+    def _find_start(self, chunk, pos):
+        """尋找 JSON 物件的開頭；找到時開啟最外層物件並回傳接著要處理的位置，否則回傳 -1
+
+        { 之後（略過空白）必須是 " 或 }，否則視為說明文字繼續往後找；{ 在片段結尾時等下一段再判斷。
+        """
+        while True:
+            if self._pending_open:
+                match = _NON_WHITESPACE_RE.search(chunk, pos)
+                if match is None:
+                    return -1
+                self._pending_open = False
+                if match.group() in '"}':
+                    self._started = True
+                    self._open("{")
+                    return match.start()
+                pos = match.start()
+            start = chunk.find("{", pos)
+            if start == -1:
+                return -1
+            self._pending_open = True
+            pos = start + 1
+
+    def _consume(self, ch, completed):
+        if self._in_string:
+            self._consume_string_char(ch, completed)
+            return
+
+        if self._scalar is not None:
+            if self._scalar_accepts(ch):
+                return
+            if self.error:
+                return
+            self._value_done(completed)
+            if self.error:
+                return
+
+        if ch in " \n\r\t":
+            self._buf.append(ch)
+            return
+        if ch < " ":
+            return
+
+        frame = self._stack[-1]
+        expect = frame[1]
+
+        if ch == '"':
+            if expect in ("key", "key_or_end"):
+                self._string_is_key = True
+            elif expect in ("value", "value_or_end"):
+                self._string_is_key = False
+                self._begin_value()
+            else:
+                self._fail(ch)
+                return
+            self._in_string = True
+            self._string_chars = []
+            self._buf.append(ch)
+        elif ch == ":":
+            if expect != "colon":
+                self._fail(ch)
+                return
+            frame[1] = "value"
+            self._buf.append(ch)
+        elif ch == ",":
+            if expect != "comma":
+                self._fail(ch)
+                return
+            frame[1] = "key" if frame[0] == "{" else "value"
+            self._last_comma = len(self._buf)
+            self._buf.append(ch)
+        elif ch in "{[":
+            if expect not in ("value", "value_or_end"):
+                self._fail(ch)
+                return
+            self._begin_value()
+            self._open(ch)
+        elif ch in "}]":
+            if _CLOSERS[frame[0]] != ch:
+                self._fail(ch)
+                return
+            if expect in ("key", "value") and self._last_comma is not None:
+                # 多餘的逗號：移除後再關閉容器
+                del self._buf[self._last_comma:]
+            elif expect not in ("comma", "key_or_end", "value_or_end"):
+                self._fail(ch)
+                return
+            self._buf.append(ch)
+            self._stack.pop()
+            self._closers = self._closers[1:]
+            if not self._stack:
+                self.complete = True
+                return
+            self._value_done(completed)
+        elif expect in ("value", "value_or_end") and (ch in _LITERALS or ch in _NUMBER_CHARS):
+            self._begin_value()
+            self._scalar = ch
+            self._buf.append(ch)
+            if ch in _LITERALS:
+                self._scalar_accepts("")
+        else:
+            self._fail(ch)
+
+    def _consume_string_char(self, ch, completed):
+        if self._escape:
+            self._escape = False
+            self._buf.append(ch)
+            self._string_chars.append(ch)
+            return
+        if ch == "\\":
+            self._escape = True
+            self._buf.append(ch)
+            self._string_chars.append(ch)
+            return
+        if ch == '"':
+            self._in_string = False
+            self._buf.append(ch)
+            if self._string_is_key:
+                self._current_key = "".join(self._string_chars)
+                self._stack[-1][1] = "colon"
+            else:
+                self._value_done(completed)
+            return
+        if ch < " ":
+            replacement = _STRING_CONTROL_REPLACEMENTS.get(ch)
+            if replacement:
+                self._buf.append(replacement)
+                self._string_chars.append(replacement)
+            return
+        self._buf.append(ch)
+        self._string_chars.append(ch)
+
+    def _scalar_accepts(self, ch):
+        """嘗試把字元加入目前的數字或字面值；回傳是否已接受"""
+        scalar = self._scalar
+        literal = _LITERALS.get(scalar[0])
+        if literal is not None:
+            if len(scalar) == len(literal):
+                return False
+            if ch and literal[len(scalar)] != ch:
+                self._fail(ch)
+                return False
+            if ch:
+                self._scalar = scalar + ch
+                self._buf.append(ch)
+            return True
+        if ch in _NUMBER_CHARS:
+            self._scalar = scalar + ch
+            self._buf.append(ch)
+            return True
+        return False
+
+    def _open(self, ch):
+        self._stack.append([ch, "key_or_end" if ch == "{" else "value_or_end"])
+        self._closers = _CLOSERS[ch] + self._closers
+        self._buf.append(ch)
+        self._last_comma = None
+        self._mark_safe()
+
+    def _begin_value(self):
+        """記錄頂層欄位值的起點"""
+        if len(self._stack) == 1:
+            self._section_key = self._current_key
+            self._section_start = len(self._buf)
+
+    def _value_done(self, completed):
+        self._scalar = None
+        self._stack[-1][1] = "comma"
+        self._last_comma = None
+        self._mark_safe()
+        if len(self._stack) == 1 and self._section_start is not None:
+            value_text = "".join(self._buf[self._section_start:])
+            try:
+                value = json.loads(value_text)
+            except ValueError:
+                self._fail(value_text[-1:])
+                return
+            self._sections[self._section_key] = value
+            completed.append(self._section_key)
+            self._section_key = None
+            self._section_start = None
+
+    def _mark_safe(self):
+        self._safe_len = len(self._buf)
+        self._safe_closers = self._closers
+        self._safe_depth = len(self._stack)
+
+    def _fail(self, ch):
+        self.error = f"unexpected character {ch!r} at offset {len(self._buf)}"
+
+    def _recover_partial_section(self):
+        """把尚未完成的頂層欄位補齊到最後一個完整值"""
+        if self._section_key is None or self._section_start is None:
+            return None
+        if self._safe_len <= self._section_start:
+            return None
+        # 最外層物件的 "}" 不屬於欄位值
+        text = "".join(self._buf[self._section_start:self._safe_len]) + self._safe_closers[:-1]
+        try:
+            value = json.loads(text)
+        except ValueError:
+            return None
+        # 最外層物件與欄位值本身以外，仍開啟中的容器層數
+        _drop_incomplete_records(value, self._safe_depth - 2)
+        return value
+
+
+def _drop_incomplete_records(node, open_depth):
+    """移除截斷處只剩零或一個欄位的半成品物件（例如只有 item 沒有 evidence）"""
+    if open_depth <= 0 or not node:
+        return
+    if isinstance(node, list):
+        child = node[-1]
+        _drop_incomplete_records(child, open_depth - 1)
+        if isinstance(child, dict) and len(child) <= 1:
+            node.pop()
+    elif isinstance(node, dict):
+        _drop_incomplete_records(node[next(reversed(node))], open_depth - 1)
+
+
+def extract_json_text(response_text):
+    """取出回應中的 JSON 文字：優先使用 ```json 區塊，沒有時從第一個物件開頭起算"""
+    fence = _FENCE_OPEN_RE.search(response_text)
+    if fence is not None:
+        # 截斷的回應可能沒有結尾的 ```
+        end = response_text.find("```", fence.end())
+        block = response_text[fence.end():end] if end != -1 else response_text[fence.end():]
+        if "{" in block:
+            return block
+    start = _OBJECT_START_RE.search(response_text)
+    return response_text[start.start():] if start else response_text
+
+
+def parse_complete_response(response_text):
+    """解析已接收完畢的回應，回傳 (結果, 已完整的頂層欄位, 是否被截斷, 格式錯誤訊息)
+
+    先以標準的 json 模組解析 JSON 文字（快速路徑）；含有控制字元、多餘逗號或被截斷而無法直接解析時，
+    才改用 IncrementalJSONParser 容錯解析。
+    """
+    json_text = extract_json_text(response_text)
+    try:
+        # raw_decode 容許 JSON 之後還有說明文字
+        result, _ = _DECODER.raw_decode(json_text.lstrip())
+    except ValueError:
+        result = None
+    if isinstance(result, dict):
+        return result, list(result), False, None
+    parser = IncrementalJSONParser()
+    parser.feed(json_text)
+    result, truncated = parser.finish()
+    return result, parser.completed_sections(), truncated, parser.error
+
+
+def parse_json_response(response_text):
+    """一次解析完整回應，回傳 (結果, 已完整的頂層欄位, 是否被截斷)"""
+    result, completed, truncated, _ = parse_complete_response(response_text)
+    return result, completed, truncated
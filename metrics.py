@@ -0,0 +1,353 @@
+import bisect
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# 各階段耗時的直方圖區間（秒），涵蓋本地處理的毫秒級到 API 呼叫的數十秒
+DEFAULT_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0,
+)
+
+# 每次請求省下的 token 數直方圖區間
+DEFAULT_TOKEN_BUCKETS = (0, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# 文字檔匯出的預設間隔（秒）
+DEFAULT_EXPORT_INTERVAL = 15
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """只增不減的計數器（可帶標籤）"""
+
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in sorted(values.items())]
+
+
+class Histogram:
+    """累積區間的直方圖，Prometheus 端以 histogram_quantile 計算 p50/p95/p99"""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}  # 標籤值 -> [各區間計數（非累積）, 總和, 次數]
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """記錄 with 區塊的耗時（拋出例外時也會記錄）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            return series[2] if series else 0
+
+    def quantile(self, q, **labels):
+        """依區間線性內插估計分位數（與 histogram_quantile 相同算法），沒有資料時回傳 None"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if not series or not series[2]:
+                return None
+            counts = list(series[0])
+            total = series[2]
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                if index == len(self.buckets):
+                    # 落在最後的 +Inf 區間時只能回報最大的有限上界
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def samples(self):
+        with self._lock:
+            series_items = sorted((key, (list(series[0]), series[1], series[2])) for key, series in self._series.items())
+        samples = []
+        for key, (counts, total, count) in series_items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                samples.append((f"{self.name}_bucket", labels, cumulative))
+            labels = _format_labels(self.labelnames, key)
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """行程內的指標登錄，輸出 Prometheus 文字格式
+
+    除了直接登錄的計數器與直方圖，也可以登錄 collector：匯出時呼叫，
+    回傳 [(名稱, 說明, 類型, 值)]，用於快取、排隊等已有 stats() 的元件。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """以 Prometheus 文字格式（0.0.4）輸出所有指標"""
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        for collector in collectors:
+            try:
+                collected = collector()
+            except Exception as e:
+                ERRORS.inc(stage="metrics")
+                print(f"指標收集失敗: {e}", file=sys.stderr)
+                continue
+            for name, documentation, type_name, value in collected:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {type_name}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """寫入文字檔（供 node_exporter textfile collector 讀取）；先寫暫存檔再改名，避免讀到一半的內容"""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry():
+    """取得行程內共用的指標登錄"""
+    return _registry
+
+
+# 分析流程各階段的耗時：prompt_build、queue_wait、api、first_token、json_parse、
+# translation、render、extraction、resume_profile、total
+STAGE_SECONDS = _registry.histogram(
+    "jobmatch_stage_seconds",
+    "Time spent in each stage of an analysis",
+    labelnames=("stage",),
+)
+CACHE_LOOKUPS = _registry.counter(
+    "jobmatch_cache_lookups_total",
+    "Analysis requests by cache outcome (hit, partial, miss)",
+    labelnames=("result",),
+)
+TOKENS = _registry.counter(
+    "jobmatch_tokens_total",
+    "Tokens reported by Gemini usage metadata",
+    labelnames=("call", "direction"),
+)
+ERRORS = _registry.counter(
+    "jobmatch_errors_total",
+    "Failed stages",
+    labelnames=("stage",),
+)
+COMPACTION_SAVED_TOKENS = _registry.histogram(
+    "jobmatch_compaction_saved_tokens",
+    "Estimated input tokens removed by compaction, per request",
+    labelnames=("input",),
+    buckets=DEFAULT_TOKEN_BUCKETS,
+)
+RETRIES = _registry.counter(
+    "jobmatch_retries_total",
+    "Gemini call attempts that failed with a transient error and were retried",
+)
+RESUME_PROFILES = _registry.counter(
+    "jobmatch_resume_profile_total",
+    "Analyses by resume input (profile_hit, profile_generated, full_text, profile_failed)",
+    labelnames=("result",),
+)
+RESUME_PROFILE_SAVED_TOKENS = _registry.counter(
+    "jobmatch_resume_profile_saved_tokens_total",
+    "Estimated input tokens saved by sending the resume profile instead of the full resume",
+)
+
+
+def observe_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def time_stage(stage):
+    """記錄某個階段的耗時：with time_stage("prompt_build"): ..."""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def record_compaction(resume, job):
+    """記錄這次請求的履歷與職缺各省下多少 token（compaction.CompactionResult）"""
+    COMPACTION_SAVED_TOKENS.observe(resume.saved_tokens, input="resume")
+    COMPACTION_SAVED_TOKENS.observe(job.saved_tokens, input="job")
+
+
+def record_usage(response, call):
+    """從回應的 usage_metadata 記錄輸入與輸出 token 數（沒有時略過）"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    input_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+    if input_tokens:
+        TOKENS.inc(input_tokens, call=call, direction="input")
+    if output_tokens:
+        TOKENS.inc(output_tokens, call=call, direction="output")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = _registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 抓取指標很頻繁，不輸出存取紀錄
+        pass
+
+
+_export_lock = threading.Lock()
+_export_started = False
+
+
+def start_metrics_export():
+    """依環境變數啟動指標匯出（整個行程只啟動一次）
+
+    - JOBMATCH_METRICS_PORT：在本機該埠提供 /metrics
+    - JOBMATCH_METRICS_FILE：每 JOBMATCH_METRICS_INTERVAL 秒（預設 15）寫入文字檔
+    """
+    global _export_started
+    if _export_started:
+        return
+    with _export_lock:
+        if _export_started:
+            return
+        _export_started = True
+
+        port = os.getenv("JOBMATCH_METRICS_PORT")
+        if port:
+            host = os.getenv("JOBMATCH_METRICS_HOST", "127.0.0.1")
+            try:
+                server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except OSError as e:
+                ERRORS.inc(stage="metrics")
+                print(f"指標端點啟動失敗（{host}:{port}）: {e}", file=sys.stderr)
+            else:
+                server.daemon_threads = True
+                threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+
+        path = os.getenv("JOBMATCH_METRICS_FILE")
+        if path:
+            interval = float(os.getenv("JOBMATCH_METRICS_INTERVAL", DEFAULT_EXPORT_INTERVAL))
+            threading.Thread(target=_write_periodically, args=(path, interval), name="metrics-file", daemon=True).start()
+
+
+def _write_periodically(path, interval):
+    while True:
+        write_metrics_file(path)
+        time.sleep(interval)
+
+
+def write_metrics_file(path=None):
+    """立即寫出指標文字檔（未指定路徑時使用 JOBMATCH_METRICS_FILE，兩者皆無則不處理）"""
+    path = path or os.getenv("JOBMATCH_METRICS_FILE")
+    if not path:
+        return
+    try:
+        _registry.write_textfile(path)
+    except OSError as e:
+        ERRORS.inc(stage="metrics")
+        print(f"指標檔寫入失敗（{path}）: {e}", file=sys.stderr)
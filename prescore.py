@@ -0,0 +1,155 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+from skills import extract_skills
+
+
+# BM25 參數
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 每份職缺取權重最高的關鍵詞數量，用於計算關鍵詞覆蓋率
+TOP_KEYWORDS = 15
+
+# 最終分數權重：BM25 覆蓋率與關鍵詞覆蓋率
+BM25_WEIGHT = 0.6
+KEYWORD_WEIGHT = 0.4
+
+# 職缺提到已知技能時，技能覆蓋率所佔的權重（其餘依上面比例分配）
+SKILL_WEIGHT = 0.4
+
+# 英文詞（保留 c++、c#、node.js 這類技術名稱）與中日韓文字
+_LATIN_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+_CJK_RUN_RE = re.compile(r"[一-鿿㐀-䶿]+")
+
+_ENGLISH_STOPWORDS = frozenset("""
+a an and are as at be been but by can for from has have in is it its of on or our
+that the their this to was we were will with you your years year experience work
+working ability able strong good excellent knowledge skills skill team must plus
+including etc job role position candidate responsibilities requirements preferred
+""".split())
+
+_CHINESE_STOPWORDS = frozenset("""
+經驗 能力 以上 熟悉 相關 工作 負責 我們 公司 具備 具有 優先 需要 要求 職缺 職位
+進行 以及 或是 並且 可以 良好 一定 年以 其他 擔任 團隊 協助 參與 上經
+""".split())
+
+
+def tokenize(text):
+    """中英混合分詞：英文以單字為單位，中文以相鄰兩字（bigram）為單位"""
+    text = text.lower()
+    tokens = [token for token in _LATIN_TOKEN_RE.findall(text) if token not in _ENGLISH_STOPWORDS]
+    for run in _CJK_RUN_RE.findall(text):
+        if len(run) == 1:
+            continue
+        for i in range(len(run) - 1):
+            bigram = run[i:i + 2]
+            if bigram not in _CHINESE_STOPWORDS:
+                tokens.append(bigram)
+    return tokens
+
+
+class PreScorer:
+    """不呼叫 LLM 的快速匹配度估計，用於大量職缺的初步排序
+
+    以職缺為文件建立 BM25 權重（COO 稀疏格式），履歷視為查詢，
+    一次向量化運算即可得到所有職缺的分數；職缺提到技能分類中的技能時，
+    再混合技能覆蓋率。
+    """
+
+    def __init__(self, job_descriptions):
+        self.size = len(job_descriptions)
+        self.vocabulary = {}
+        doc_ids, term_ids, term_freqs = [], [], []
+        doc_lengths = np.zeros(self.size, dtype=np.float32)
+
+        for doc_id, job_description in enumerate(job_descriptions):
+            counts = Counter(tokenize(job_description))
+            doc_lengths[doc_id] = sum(counts.values())
+            for token, count in counts.items():
+                term_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                doc_ids.append(doc_id)
+                term_ids.append(term_id)
+                term_freqs.append(count)
+
+        self._doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        self._term_ids = np.asarray(term_ids, dtype=np.int64)
+        tf = np.asarray(term_freqs, dtype=np.float32)
+
+        # IDF（BM25 版本，保證為正值）
+        doc_freq = np.bincount(self._term_ids, minlength=len(self.vocabulary)).astype(np.float32)
+        idf = np.log1p((self.size - doc_freq + 0.5) / (doc_freq + 0.5))
+
+        # 每個 (職缺, 詞) 的 BM25 權重
+        avg_length = float(doc_lengths.mean()) if self.size else 0.0
+        length_norm = 1 - BM25_B + BM25_B * doc_lengths[self._doc_ids] / max(avg_length, 1.0)
+        self._weights = idf[self._term_ids] * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+
+        # 每份職缺的權重總和（滿分），以及權重最高的關鍵詞
+        self._max_scores = np.bincount(self._doc_ids, weights=self._weights, minlength=self.size)
+        self._keyword_mask = self._top_keyword_mask()
+        self._keyword_counts = np.bincount(
+            self._doc_ids, weights=self._keyword_mask.astype(np.float32), minlength=self.size
+        )
+
+        # 每份職缺提到的技能（技能分類中的標準名稱）
+        self.job_skills = [set(extract_skills(job_description)) for job_description in job_descriptions]
+        self._skill_counts = np.array([len(skills) for skills in self.job_skills], dtype=np.float32)
+
+    def _top_keyword_mask(self):
+        """標記每份職缺中 BM25 權重最高的 TOP_KEYWORDS 個詞"""
+        mask = np.zeros(len(self._weights), dtype=bool)
+        # 先依職缺、再依權重（由高到低）排序，計算每個詞在該職缺內的名次
+        order = np.lexsort((-self._weights, self._doc_ids))
+        sorted_docs = self._doc_ids[order]
+        starts = np.searchsorted(sorted_docs, sorted_docs, side="left")
+        rank_in_doc = np.arange(len(order)) - starts
+        mask[order[rank_in_doc < TOP_KEYWORDS]] = True
+        return mask
+
+    def score(self, resume_text):
+        """回傳每份職缺的估計匹配度（0-100 的浮點數陣列）"""
+        if not self.size:
+            return np.zeros(0, dtype=np.float32)
+        present = np.zeros(len(self.vocabulary), dtype=bool)
+        resume_term_ids = [self.vocabulary[token] for token in set(tokenize(resume_text)) if token in self.vocabulary]
+        present[resume_term_ids] = True
+
+        hit = present[self._term_ids]
+        bm25 = np.bincount(self._doc_ids, weights=self._weights * hit, minlength=self.size)
+        bm25_coverage = np.divide(bm25, self._max_scores, out=np.zeros(self.size), where=self._max_scores > 0)
+
+        keyword_hits = np.bincount(self._doc_ids, weights=(hit & self._keyword_mask).astype(np.float32), minlength=self.size)
+        keyword_coverage = np.divide(
+            keyword_hits, self._keyword_counts, out=np.zeros(self.size), where=self._keyword_counts > 0
+        )
+        text_score = BM25_WEIGHT * bm25_coverage + KEYWORD_WEIGHT * keyword_coverage
+
+        resume_skills = set(extract_skills(resume_text))
+        skill_hits = np.array([len(skills & resume_skills) for skills in self.job_skills], dtype=np.float32)
+        skill_coverage = np.divide(
+            skill_hits, self._skill_counts, out=np.zeros(self.size), where=self._skill_counts > 0
+        )
+        blended = np.where(
+            self._skill_counts > 0,
+            (1 - SKILL_WEIGHT) * text_score + SKILL_WEIGHT * skill_coverage,
+            text_score
+        )
+        return 100 * blended
+
+    def rank(self, resume_text, top_k=None):
+        """依估計分數由高到低回傳 (職缺索引, 分數) 列表"""
+        scores = self.score(resume_text)
+        order = np.argsort(-scores, kind="stable")
+        if top_k is not None:
+            order = order[:top_k]
+        return [(int(index), round(float(scores[index]), 1)) for index in order]
+
+
+def prescore(resume_text, job_descriptions):
+    """快速估計履歷對每份職缺的匹配度（0-100），不呼叫 AI"""
+    scores = PreScorer(job_descriptions).score(resume_text)
+    return [round(float(score), 1) for score in scores]
+
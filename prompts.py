@@ -0,0 +1,525 @@
+# 分析提示詞（中文為主要版本；英文版本直接以英文產生，不需再翻譯）
+
+# 中文提示詞的組成片段：完整分析使用全部片段，拆分請求的子請求只使用各自需要的 schema 與規則
+_HEADER_ZH = """你是專業職涯顧問。請閱讀【履歷】與【職缺】，並 ONLY 以 JSON 回覆，符合下列 schema：
+
+{{
+"""
+
+_SCORE_SCHEMA_ZH = """  "match_score": 整數0-100（整體匹配度，必須綜合考慮所有技能匹配情況，如果職缺是專業領域但履歷沒有相關背景，分數應該很低）,
+  "confidence": 浮點0-1,
+  "match_explanation": "請根據履歷與職缺的比對結果，撰寫一段不超過 3 段的自然語言說明，用來在 UI 呈現匹配度摘要。請使用簡單清楚、人性化的語氣",
+  "priorities": [{{"name":字串,"weight":0-1,"explanation":字串}}]（weight是匹配度分數，不是權重！如果履歷沒有相關經驗，weight應該很低0-0.2）,
+  "matched": [{{"item":"技能名稱","evidence":"一段完整的summary描述，說明履歷中如何符合此技能要求，不要列點，要寫成流暢的段落"}}],
+  "missing": [{{"item":字串,"action":字串}}]"""
+
+_ADVICE_SCHEMA_ZH = {
+    "resume_optimization": """    "{resume_optimization}": [
+      {{"name": "履歷優化", "items": [
+        "具體建議項目1",
+        "具體建議項目2", 
+        "具體建議項目3"
+      ]}}
+    ]""",
+    "cover_letter": """    "{cover_letter}": [
+      {{"name": "求職信建議", "items": [
+        "開場句：具體內容",
+        "中段敘述：具體內容",
+        "結尾句：具體內容"
+      ]}}
+    ]""",
+    "skill_gap": """    "{skill_gap}": [
+      {{"name": "缺少技能", "items": [
+        "技能項目1",
+        "技能項目2", 
+        "技能項目3"
+      ]}},
+      {{"name": "學習方向", "items": [
+        "學習建議1",
+        "學習建議2",
+        "學習建議3"
+      ]}}
+    ]""",
+    "interview": """    "{interview}": [
+      {{"name": "潛在問題", "items": [
+        "問題1",
+        "問題2",
+        "問題3"
+      ]}},
+      {{"name": "回答方向", "items": [
+        "回答策略1",
+        "回答策略2",
+        "回答策略3"
+      ]}}
+    ]""",
+    "portfolio": """    "{portfolio}": [
+      {{"name": "小專案題目", "items": [
+        "專案題目1",
+        "專案題目2",
+        "專案題目3"
+      ]}},
+      {{"name": "展示建議", "items": [
+        "展示建議1",
+        "展示建議2",
+        "展示建議3"
+      ]}}
+    ]""",
+}
+
+_LANGUAGE_RULES_ZH = """- 所有回應文字必須完全使用中文，不能混合其他語言，不使用敬語（您）
+- 公司名稱、產品名稱、技術術語等專有名詞保持原文，但描述文字必須使用中文
+"""
+
+_SCORE_RULES_ZH = """- match_explanation：請根據履歷與職缺的比對結果，撰寫一段不超過 3 段的自然語言說明，用來在 UI 呈現匹配度摘要。請使用簡單清楚、人性化的語氣
+- priorities：必須只從職缺內容中挑出重要關鍵技能，不能包含職缺中未提及的技能！每個技能的name和explanation都必須使用中文描述，不能出現英文。weight是匹配度分數（0-1），不是權重！如果履歷沒有相關經驗，weight應該很低（0-0.2）。explanation要說明為何得分是這樣。特別注意：如果職缺明確要求核心技能（如程式語言、技術工具、監管合規、專業認證等），而履歷中沒有相關經驗，該技能匹配度應該給0-20%，整體匹配度也會大幅降低。
+- matched：標題要是關鍵技能，使用中文描述；evidence必須是一段完整的summary描述，說明履歷中如何符合此技能要求，不要列點，要寫成流暢的段落。所有描述文字必須使用中文，不能出現英文描述。絕對不能直接複製貼上履歷內容，必須是整理過後的摘要和總結。
+- missing：不用每個都寫「建議行動：在履歷中補充相關經驗」，文字要寫的有邏輯，有頭有尾；標題要寫的是有邏輯的履歷提到的經歷、技能，要讓人看得懂，使用中文描述
+"""
+
+_ADVICE_RULES_HEAD_ZH = """         - advice：必須包含以下五個類別，每個類別使用固定的標題結構，AI只需要填入具體內容：
+"""
+
+_ADVICE_RULES_ZH = {
+    "resume_optimization": """           * 履歷優化：使用固定標題「履歷優化」，items中填入3-5個具體的履歷改進建議，每個建議都要完全不同且具體，不能有任何重複的內容或相似的建議
+""",
+    "cover_letter": """           * 求職信建議：使用固定標題「求職信建議」，items中必須包含「開場句：」、「中段敘述：」、「結尾句：」三個固定格式，冒號後填入具體內容，每個部分都要完全不同，不能有任何重複
+""",
+    "skill_gap": """           * 技能差距分析：使用固定標題「缺少技能」和「學習方向」，每個標題的items中填入3-5個具體項目，所有項目都必須完全不同，不能有任何重複或相似的內容
+""",
+    "interview": """           * 面試準備建議：使用固定標題「潛在問題」和「回答方向」，每個標題的items中填入3-5個具體項目，所有項目都必須完全不同，不能有任何重複
+""",
+    "portfolio": """           * 作品集建議：使用固定標題「小專案題目」和「展示建議」，每個標題的items中填入3-5個具體項目，所有項目都必須完全不同，不能有任何重複
+""",
+}
+
+_ADVICE_RULES_TAIL_ZH = """           * 重要：所有標題名稱必須完全按照上述固定格式，不能改變！AI只需要在items中填入具體內容，所有內容必須完全使用中文
+"""
+
+_DEDUPE_RULE_ZH = """           * 去重要求：履歷優化建議中，每一條都必須針對不同的細節（例如技能工具、使用方式、結果影響、具體任務），不能單純換句話說，也不能針對同一經驗做出多條類似建議。如果履歷中只有單一工作經歷，請避免重複針對同一段經歷提出建議，建議應多角度、廣泛提出，包括整體格式、成果量化、工作分類、前後脈絡等。請在每生成一條建議前，自我檢查是否與前面內容語意相近，如果是就跳過。所有advice項目都必須完全不同，不能有任何重複或相似的內容
+"""
+
+_JSON_ONLY_ZH = """- 僅回 JSON，不要其他文字
+"""
+
+_SCORING_NOTES_ZH = """
+特別注意：
+1. priorities 中的技能必須是職缺描述中明確提及或要求的技能，不能因為履歷中有相關經驗就加入職缺關鍵技能中！
+2. weight評分範例：
+   - 履歷有相關經驗：weight = 0.7-0.9（70-90%）
+   - 履歷沒有相關經驗：weight = 0.0-0.2（0-20%）
+   - 錯誤範例：履歷沒有監管合規經驗，但給weight = 0.9（90%）❌
+   - 正確範例：履歷沒有監管合規經驗，給weight = 0.1（10%）✅
+3. 整體匹配度計算規則：
+   - 如果職缺是專業領域（法務、醫療、金融、會計、工程等）但履歷完全沒有相關背景：整體匹配度不超過30-40%
+   - 如果職缺要求多個核心技能但履歷大部分都沒有：整體匹配度不超過40-50%
+   - 如果履歷有相關背景但經驗不足：整體匹配度50-70%
+   - 如果履歷經驗充足且技能匹配：整體匹配度70-90%
+4. 經驗年數評估規則：
+   - 只有當職缺有提到此年數要求才需要考慮此規則
+   - 職缺要求 X 年經驗，履歷有 Y 年經驗：
+     * Y >= X：給 90-100%（經驗充足或超過要求）
+     * Y >= X*0.8：給 70-85%（經驗接近要求）
+     * Y >= X*0.6：給 50-70%（經驗不足但可接受）
+     * Y < X*0.6：給 30-50%（經驗嚴重不足）
+   - 必須在 explanation 中明確說明年數差距對分數的影響
+5. 技能匹配評估規則：
+   - 履歷明確提到相關經驗：給 70-90%
+   - 履歷有相關但描述較少：給 50-70%
+   - 履歷沒有明確提到：給 20-40%
+   - 如果職缺要求特定核心技能（如程式語言、技術工具、監管合規、專業認證等），而履歷完全沒有相關經驗：給 0-20%
+   - 不要過於保守，如果履歷中有相關經驗就應該給合理的高分
+   - 如果職缺是專業領域職位（如技術、法務、醫療、金融、會計等）但履歷沒有相關專業背景，整體匹配度應該顯著降低（通常不超過30-40%）
+
+一致性要求：
+- 相同的履歷和職缺描述必須產生相同的分數和評估結果
+- 使用結構化的評估標準，避免主觀判斷
+- 優先考慮客觀指標（年數、技能匹配度）而非主觀感受
+- 嚴格遵守語言一致性：所有回應必須完全使用中文，不能出現任何其他語言"""
+
+
+# 英文提示詞的組成片段：完整分析使用全部片段，拆分請求的子請求只使用各自需要的 schema 與規則
+_HEADER_EN = """You are a professional career consultant. Read the [Resume] and the [Job Description], and reply ONLY with JSON that follows this schema:
+
+{{
+"""
+
+_SCORE_SCHEMA_EN = """  "match_score": integer 0-100 (overall match; must take every skill match into account. If the job is in a specialized field and the resume has no related background, the score must be low),
+  "confidence": float 0-1,
+  "match_explanation": "Based on comparing the resume with the job description, write a natural-language summary of no more than 3 paragraphs to show as the match summary in the UI. Use a simple, clear and human tone",
+  "priorities": [{{"name":string,"weight":0-1,"explanation":string}}] (weight is the match score, NOT an importance weight! If the resume has no related experience, weight must be low, 0-0.2),
+  "matched": [{{"item":"skill name","evidence":"one complete summary paragraph explaining how the resume meets this requirement; no bullet points, write it as a flowing paragraph"}}],
+  "missing": [{{"item":string,"action":string}}]"""
+
+_ADVICE_SCHEMA_EN = {
+    "resume_optimization": """    "{resume_optimization}": [
+      {{"name": "Resume Optimization", "items": [
+        "Specific suggestion 1",
+        "Specific suggestion 2",
+        "Specific suggestion 3"
+      ]}}
+    ]""",
+    "cover_letter": """    "{cover_letter}": [
+      {{"name": "Cover Letter Suggestions", "items": [
+        "Opening Statement: specific content",
+        "Body Paragraph: specific content",
+        "Closing Statement: specific content"
+      ]}}
+    ]""",
+    "skill_gap": """    "{skill_gap}": [
+      {{"name": "Missing Skills", "items": [
+        "Skill 1",
+        "Skill 2",
+        "Skill 3"
+      ]}},
+      {{"name": "Learning Directions", "items": [
+        "Learning suggestion 1",
+        "Learning suggestion 2",
+        "Learning suggestion 3"
+      ]}}
+    ]""",
+    "interview": """    "{interview}": [
+      {{"name": "Potential Questions", "items": [
+        "Question 1",
+        "Question 2",
+        "Question 3"
+      ]}},
+      {{"name": "Response Direction", "items": [
+        "Response strategy 1",
+        "Response strategy 2",
+        "Response strategy 3"
+      ]}}
+    ]""",
+    "portfolio": """    "{portfolio}": [
+      {{"name": "Mini Project Ideas", "items": [
+        "Project idea 1",
+        "Project idea 2",
+        "Project idea 3"
+      ]}},
+      {{"name": "Showcase Suggestions", "items": [
+        "Showcase suggestion 1",
+        "Showcase suggestion 2",
+        "Showcase suggestion 3"
+      ]}}
+    ]""",
+}
+
+_LANGUAGE_RULES_EN = """- All response text must be written entirely in English, even when the resume or job description is written in Chinese. Do not mix languages
+- Keep proper nouns such as company names, product names and technical terms in their original form, but all descriptive text must be in English
+"""
+
+_SCORE_RULES_EN = """- match_explanation: based on comparing the resume with the job description, write a natural-language summary of no more than 3 paragraphs for the UI match summary. Use a simple, clear and human tone
+- priorities: pick ONLY key skills that appear in the job description; never include skills the job description does not mention! name and explanation must be in English. weight is the match score (0-1), NOT an importance weight! If the resume has no related experience, weight must be low (0-0.2). explanation must say why the score is what it is. Note: if the job explicitly requires a core skill (programming language, technical tool, regulatory compliance, professional certification, etc.) and the resume has no related experience, that skill must score 0-20%, and the overall match drops significantly.
+- matched: the title must be the key skill, in English; evidence must be one complete summary paragraph explaining how the resume meets the requirement, not bullet points, written as a flowing paragraph. Never copy and paste resume content verbatim; it must be an organized summary.
+- missing: do not repeat "Suggested action: add related experience to the resume" for every item; the text must be logical with a clear beginning and end; the title must describe the experience or skill in a way that is easy to understand, in English
+"""
+
+_ADVICE_RULES_HEAD_EN = """- advice: must contain the following five categories, each with a fixed heading structure; only fill in the concrete content:
+"""
+
+_ADVICE_RULES_EN = {
+    "resume_optimization": """  * Resume Optimization: use the fixed heading "Resume Optimization"; put 3-5 concrete resume improvements in items, each completely different and specific, with no repeated or similar suggestions
+""",
+    "cover_letter": """  * Cover Letter Suggestions: use the fixed heading "Cover Letter Suggestions"; items must contain the three fixed prefixes "Opening Statement:", "Body Paragraph:" and "Closing Statement:" followed by concrete content, each part completely different with no repetition
+""",
+    "skill_gap": """  * Skill Gap Analysis: use the fixed headings "Missing Skills" and "Learning Directions", each with 3-5 concrete items, all completely different with no repeated or similar content
+""",
+    "interview": """  * Interview Preparation: use the fixed headings "Potential Questions" and "Response Direction", each with 3-5 concrete items, all completely different with no repetition
+""",
+    "portfolio": """  * Portfolio Suggestions: use the fixed headings "Mini Project Ideas" and "Showcase Suggestions", each with 3-5 concrete items, all completely different with no repetition
+""",
+}
+
+_ADVICE_RULES_TAIL_EN = """  * Important: every heading must follow the fixed format above exactly and must not be changed! Only fill in items, and all content must be in English
+"""
+
+_DEDUPE_RULE_EN = """  * De-duplication: each resume optimization suggestion must target a different detail (tools, usage, impact, specific tasks); do not simply rephrase or give several similar suggestions about the same experience. If the resume has only one job, avoid repeatedly targeting the same role; cover multiple angles such as overall format, quantified results, grouping of work and context. Before writing each suggestion, check whether it is semantically close to an earlier one and skip it if so. All advice items must be completely different with no repeated or similar content
+"""
+
+_JSON_ONLY_EN = """- Reply with JSON only, no other text
+"""
+
+_SCORING_NOTES_EN = """
+Special notes:
+1. Skills in priorities must be explicitly mentioned or required in the job description; never add a skill to the key skills just because the resume has related experience!
+2. weight scoring examples:
+   - Resume has related experience: weight = 0.7-0.9 (70-90%)
+   - Resume has no related experience: weight = 0.0-0.2 (0-20%)
+   - Wrong: the resume has no regulatory compliance experience but weight = 0.9 (90%) ❌
+   - Right: the resume has no regulatory compliance experience, weight = 0.1 (10%) ✅
+3. Overall match score rules:
+   - Specialized field (legal, medical, finance, accounting, engineering, etc.) and the resume has no related background at all: overall match no higher than 30-40%
+   - The job requires several core skills and the resume lacks most of them: overall match no higher than 40-50%
+   - The resume has a related background but insufficient experience: overall match 50-70%
+   - The resume has sufficient experience and matching skills: overall match 70-90%
+4. Years-of-experience rules:
+   - Only apply this rule when the job description states a years requirement
+   - The job requires X years and the resume has Y years:
+     * Y >= X: 90-100% (meets or exceeds the requirement)
+     * Y >= X*0.8: 70-85% (close to the requirement)
+     * Y >= X*0.6: 50-70% (short but acceptable)
+     * Y < X*0.6: 30-50% (seriously short)
+   - The explanation must state how the gap in years affects the score
+5. Skill match rules:
+   - The resume clearly mentions related experience: 70-90%
+   - The resume has related but thinly described experience: 50-70%
+   - The resume does not clearly mention it: 20-40%
+   - The job requires a specific core skill (programming language, technical tool, regulatory compliance, professional certification, etc.) and the resume has no related experience at all: 0-20%
+   - Do not be overly conservative; if the resume has related experience, give a reasonably high score
+   - If the job is a specialized role (technical, legal, medical, finance, accounting, etc.) and the resume has no related professional background, the overall match must drop significantly (usually no higher than 30-40%)
+
+Consistency requirements:
+- The same resume and job description must produce the same scores and assessment
+- Use structured evaluation criteria and avoid subjective judgement
+- Prefer objective indicators (years, skill match) over subjective impressions
+- Strictly keep the language consistent: every response must be entirely in English"""
+
+
+# 拆分請求中建議子請求的規則開頭（只包含一個類別）
+_SINGLE_ADVICE_RULES_HEAD_ZH = """- advice：只包含以下類別，使用固定的標題結構，AI只需要填入具體內容：
+"""
+
+_SINGLE_ADVICE_RULES_HEAD_EN = """- advice: contain only the following category, with its fixed heading structure; only fill in the concrete content:
+"""
+
+_PROMPT_PARTS = {
+    "中文": {
+        "header": _HEADER_ZH,
+        "score_schema": _SCORE_SCHEMA_ZH,
+        "advice_schema": _ADVICE_SCHEMA_ZH,
+        "rules_title": "重要規則：\n",
+        "language_rules": _LANGUAGE_RULES_ZH,
+        "score_rules": _SCORE_RULES_ZH,
+        "advice_rules_head": _ADVICE_RULES_HEAD_ZH,
+        "single_advice_rules_head": _SINGLE_ADVICE_RULES_HEAD_ZH,
+        "advice_rules": _ADVICE_RULES_ZH,
+        "advice_rules_tail": _ADVICE_RULES_TAIL_ZH,
+        "dedupe_rule": _DEDUPE_RULE_ZH,
+        "json_only": _JSON_ONLY_ZH,
+        "scoring_notes": _SCORING_NOTES_ZH,
+    },
+    "English": {
+        "header": _HEADER_EN,
+        "score_schema": _SCORE_SCHEMA_EN,
+        "advice_schema": _ADVICE_SCHEMA_EN,
+        "rules_title": "Important rules:\n",
+        "language_rules": _LANGUAGE_RULES_EN,
+        "score_rules": _SCORE_RULES_EN,
+        "advice_rules_head": _ADVICE_RULES_HEAD_EN,
+        "single_advice_rules_head": _SINGLE_ADVICE_RULES_HEAD_EN,
+        "advice_rules": _ADVICE_RULES_EN,
+        "advice_rules_tail": _ADVICE_RULES_TAIL_EN,
+        "dedupe_rule": _DEDUPE_RULE_EN,
+        "json_only": _JSON_ONLY_EN,
+        "scoring_notes": _SCORING_NOTES_EN,
+    },
+}
+
+
+def _compose_system_prompt(parts, include_score, advice_keys):
+    """組合系統提示詞模板：include_score 時包含分數欄位與評分規則，advice_keys 為要包含的建議類別"""
+    schema = []
+    rules = parts["language_rules"]
+    if include_score:
+        schema.append(parts["score_schema"])
+        rules += parts["score_rules"]
+    if advice_keys:
+        schema.append('  "advice": {{\n' + ",\n".join(parts["advice_schema"][key] for key in advice_keys) + "\n  }}")
+        all_advice = list(advice_keys) == list(parts["advice_schema"])
+        rules += parts["advice_rules_head"] if all_advice else parts["single_advice_rules_head"]
+        rules += "".join(parts["advice_rules"][key] for key in advice_keys) + parts["advice_rules_tail"]
+        if "resume_optimization" in advice_keys:
+            rules += parts["dedupe_rule"]
+    rules += parts["json_only"]
+    prompt = parts["header"] + ",\n".join(schema) + "\n}}\n\n" + parts["rules_title"] + rules
+    if include_score:
+        prompt += parts["scoring_notes"]
+    return prompt
+
+
+# 單一請求的完整系統提示詞（分數與全部建議類別）
+SYSTEM_PROMPT_ZH = _compose_system_prompt(_PROMPT_PARTS["中文"], True, list(_ADVICE_SCHEMA_ZH))
+SYSTEM_PROMPT_EN = _compose_system_prompt(_PROMPT_PARTS["English"], True, list(_ADVICE_SCHEMA_EN))
+
+USER_PROMPT_ZH = """
+履歷內容：
+{resume_text}
+
+職缺描述：
+{job_description}
+
+請分析匹配度並提供建議。
+"""
+
+USER_PROMPT_EN = """
+Resume:
+{resume_text}
+
+Job Description:
+{job_description}
+
+Please analyze the match and provide recommendations.
+"""
+
+# 履歷以結構化摘要取代全文時使用（同一份履歷比對多份職缺，摘要只產生一次）
+USER_PROMPT_PROFILE_ZH = """
+履歷內容（由完整履歷整理出的結構化摘要，請視同履歷全文，引用證據時以摘要中的內容為準）：
+{resume_text}
+
+職缺描述：
+{job_description}
+
+請分析匹配度並提供建議。
+"""
+
+USER_PROMPT_PROFILE_EN = """
+Resume (a structured profile extracted from the full resume; treat it as the resume itself and quote evidence from it):
+{resume_text}
+
+Job Description:
+{job_description}
+
+Please analyze the match and provide recommendations.
+"""
+
+PROFILE_PROMPT = """你是履歷解析器。請閱讀以下【履歷】，整理成之後比對多份職缺時可重複使用的結構化摘要，並 ONLY 以 JSON 回覆：
+
+{{
+  "summary": "一句話概述此人的專業背景",
+  "roles": [{{"title": "職稱", "organization": "公司或組織", "period": "起訖時間（如 2020-2022）", "years": 數字}}],
+  "experience_years": {{"領域或技術": 年數}},
+  "skills": ["技能"],
+  "education": ["學歷"],
+  "certifications": ["證照或語言能力"],
+  "highlights": ["具體成果或專案（保留原文中的數字與技術名稱）"]
+}}
+
+規則：
+- 只能使用履歷中明確出現的資訊，不要推測或補充
+- 保留履歷原本的語言與用詞（技能名稱照原文）
+- experience_years 依經歷的起訖時間計算，同一領域重疊的期間不要重複計算；無法判斷時省略
+- highlights 最多 8 項，每項一句，優先保留可量化的成果
+- 沒有的欄位回傳空陣列或空物件
+- 僅回 JSON，不要其他文字
+
+【履歷】
+{resume_text}
+"""
+
+TRANSLATION_PROMPT = """
+Please translate the following Chinese JSON response to English, maintaining exactly the same JSON structure and format, only translating the text content:
+
+{chinese_response}
+
+Requirements:
+1. Keep JSON structure exactly the same - especially the "advice" section structure
+2. Translate all Chinese text to English
+3. Keep numbers, percentages, and format unchanged
+4. Use standard English translations for professional terms
+5. For the "advice" section, maintain the exact same structure with proper subtitles and bullet points
+6. Ensure advice items with "name" and "items" structure are preserved exactly
+7. Return only the translated JSON, no other text
+
+CRITICAL: The "advice" section must maintain its structured format with subtitles and bullet points. Do not flatten or simplify the structure.
+
+Specific translation guidelines:
+- "面試準備建議" → "Interview Preparation"
+- "潛在問題" → "Potential Questions" 
+- "回答方向" → "Response Direction"
+- "作品集建議" → "Portfolio Suggestions"
+- "小專案題目" → "Mini Project Ideas"
+- "展示建議" → "Showcase Suggestions"
+- "技能差距分析" → "Skill Gap Analysis"
+- "缺少技能" → "Missing Skills"
+- "學習方向" → "Learning Directions"
+
+Ensure ALL sub-items are translated and preserved, including:
+- Skill Gap Analysis: Both "Missing Skills" and "Learning Directions" sections
+- Interview Preparation: Both "Potential Questions" and "Response Direction" sections
+- Portfolio Suggestions: Both "Mini Project Ideas" and "Showcase Suggestions" sections
+
+CRITICAL: Each advice section must have its sub-sections with proper "name" and "items" structure. Do not flatten the structure.
+"""
+
+# 拆分請求：同一份 schema 與規則，每個子請求只回覆其中一部分欄位
+SCORE_FIELDS = ["match_score", "confidence", "match_explanation", "priorities", "matched", "missing"]
+ADVICE_KEYS = ["resume_optimization", "cover_letter", "skill_gap", "interview", "portfolio"]
+
+SECTION_PROMPT_ZH = """
+本次請求只需要回覆上述 schema 中的以下欄位，其餘欄位一律省略（advice 中未列出的類別也省略），仍須遵守所有規則：
+{fields}
+僅回 JSON，不要其他文字。
+"""
+
+SECTION_PROMPT_EN = """
+For this request, reply ONLY with the following fields of the schema above and omit every other field (also omit advice categories that are not listed), while still following all rules:
+{fields}
+Reply with JSON only, no other text.
+"""
+
+
+def get_advice_titles(language):
+    """根據語言返回建議類別標題"""
+    if language == "中文":
+        return {
+            "resume_optimization": "履歷優化",
+            "cover_letter": "求職信建議",
+            "skill_gap": "技能差距分析",
+            "interview": "面試準備建議",
+            "portfolio": "作品集建議"
+        }
+    return {
+        "resume_optimization": "Resume Optimization",
+        "cover_letter": "Cover Letter Suggestions",
+        "skill_gap": "Skill Gap Analysis",
+        "interview": "Interview Preparation",
+        "portfolio": "Portfolio Suggestions"
+    }
+
+
+def get_system_prompt(output_language, via_translation=False):
+    """返回系統提示詞；英文預設直接產生英文，via_translation 時沿用中文提示詞再翻譯"""
+    template = SYSTEM_PROMPT_EN if output_language == "English" and not via_translation else SYSTEM_PROMPT_ZH
+    return template.format(**get_advice_titles(output_language))
+
+
+def get_user_prompt(resume_text, job_description, output_language, via_translation=False, resume_is_profile=False):
+    """返回包含履歷與職缺內容的用戶提示詞；resume_is_profile 時 resume_text 為結構化履歷摘要"""
+    english = output_language == "English" and not via_translation
+    if resume_is_profile:
+        template = USER_PROMPT_PROFILE_EN if english else USER_PROMPT_PROFILE_ZH
+    else:
+        template = USER_PROMPT_EN if english else USER_PROMPT_ZH
+    return template.format(resume_text=resume_text, job_description=job_description)
+
+
+def get_profile_prompt(resume_text):
+    """返回將履歷整理成結構化摘要的提示詞"""
+    return PROFILE_PROMPT.format(resume_text=resume_text)
+
+
+def get_translation_prompt(chinese_response):
+    """返回將中文 JSON 翻譯成英文的提示詞"""
+    return TRANSLATION_PROMPT.format(chinese_response=chinese_response)
+
+
+def get_section_system_prompt(section, output_language):
+    """返回拆分請求子請求的系統提示詞：只包含該部分的 schema 與規則，不重送其他部分
+
+    分數請求包含分數欄位與評分規則；建議請求只包含單一類別的 schema 與撰寫規則。
+    """
+    parts = _PROMPT_PARTS["English" if output_language == "English" else "中文"]
+    if section == "score":
+        template = _compose_system_prompt(parts, True, [])
+    else:
+        template = _compose_system_prompt(parts, False, [section])
+    return template.format(**get_advice_titles(output_language))
+
+
+def get_section_prompt(section, output_language):
+    """返回拆分請求的欄位限制；section 為 "score" 或 ADVICE_KEYS 中的建議類別"""
+    if section == "score":
+        fields = ", ".join(SCORE_FIELDS)
+    else:
+        fields = f'advice.{get_advice_titles(output_language)[section]}'
+    template = SECTION_PROMPT_EN if output_language == "English" else SECTION_PROMPT_ZH
+    return template.format(fields=fields)
@@ -0,0 +1,416 @@
+"""分析結果的 HTML 組合（不依賴 Streamlit，可在基準測試或其他介面中使用）
+
+整個結果頁面以預先定義的模板一次組合成單一 HTML 文件，樣式集中在 styles.py 的
+CSS class，不再在每個項目重複內嵌 style；頁面只需要一次 st.markdown 即可顯示。
+"""
+import functools
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+
+from prompts import ADVICE_KEYS, get_advice_titles
+
+
+# ---- 模板（預先綁定 str.format，組合時不必再解析模板字串） ----
+
+_SCORE_TEMPLATE = (
+    '<div class="score-container"><h1 class="score-number">{score}%</h1>'
+    '<p class="score-label">{label}</p>{explanation}</div>'
+).format
+_PARAGRAPH_TEMPLATE = '<p class="score-explanation">{}</p>'.format
+_SECTION_TITLE_TEMPLATE = '<h3 class="results-title">{}</h3>'.format
+_PRIORITIES_NOTE_TEMPLATE = '<p class="priorities-note">{}</p>'.format
+_PRIORITY_TEMPLATE = (
+    '<div class="priority-card {level}"><div class="priority-card-header">'
+    '<span class="priority-name">{index}. {name}</span><span class="priority-weight">{weight}%</span></div>'
+    '<small class="priority-explanation">{explanation}</small></div>'
+).format
+_PRIORITY_LEGACY_TEMPLATE = '<div class="priority-item">{}. {}</div>'.format
+_COLUMNS_TEMPLATE = '<div class="results-columns"><div class="results-column">{}</div><div class="results-column">{}</div></div>'.format
+_ITEM_WITH_DETAIL_TEMPLATE = '<div class="{css}"><strong>{title}</strong><br><span class="{detail_css}">{detail}</span></div>'.format
+_ITEM_WITH_DESCRIPTION_TEMPLATE = '<div class="{css}"><strong>{title}</strong><br>{description}</div>'.format
+_ITEM_TEMPLATE = '<div class="{css}">{text}</div>'.format
+_NOTICE_TEMPLATE = '<div class="results-notice {css}">{text}</div>'.format
+_ADVICE_TITLE_TEMPLATE = '<div class="advice-title">{}</div>'.format
+_ADVICE_BOX_TEMPLATE = '<div class="advice-box">{}</div>'.format
+_ADVICE_CATEGORY_TEMPLATE = '<div class="advice-category {css}"><div class="advice-category-title">{title}</div>{body}</div>'.format
+_ADVICE_SUBTITLE_TEMPLATE = '<div class="advice-subtitle">{}</div>'.format
+_ADVICE_HEADING_TEMPLATE = '<div class="{css}">{}：</div>'.format
+_ADVICE_BULLET_TEMPLATE = '<div class="advice-bullet">{}</div>'.format
+_RESULTS_TEMPLATE = '<div class="results-view {css}">{}</div>'.format
+
+# Markdown 遇到空行會結束 HTML 區塊，模型輸出中的空行一律壓成單一換行
+_BLANK_LINES_RE = re.compile(r"\n\s*\n")
+
+# 英文冒號前是這些常見標題時，不論長度都視為小標題
+_COMMON_TITLES = frozenset({
+    "opening", "middle paragraph", "middle paragraphs", "closing",
+    "potential questions", "response direction", "mini project ideas",
+    "showcase suggestions", "missing skills", "learning directions",
+    "opening statement", "body paragraph", "closing statement",
+})
+
+# 沒有對應建議類別時使用的 CSS class
+_DEFAULT_ADVICE_CSS = "advice-other"
+
+# 建議類別標題常見的翻譯變體與子標題（正式標題由 prompts.get_advice_titles 提供）
+_ADVICE_TITLE_ALIASES = {
+    "resume_optimization": ["Resume", "Resume Tips"],
+    "cover_letter": ["Cover Letter", "Cover Letter Tips", "Opening Statement", "Body Paragraph", "Closing Statement"],
+    "skill_gap": ["Skills", "Skill Gap", "Missing Skills", "Learning Directions"],
+    "interview": ["Interview", "Interview Prep", "Potential Questions", "Response Direction"],
+    "portfolio": ["Portfolio", "Portfolio Tips", "Mini Project Ideas", "Showcase Suggestions"],
+}
+
+# 中文標題中出現即可判斷類別的關鍵字
+_ADVICE_CJK_KEYWORDS = {
+    "resume_optimization": ["履歷", "簡歷"],
+    "cover_letter": ["求職信", "自薦信", "推薦信"],
+    "skill_gap": ["技能", "差距"],
+    "interview": ["面試"],
+    "portfolio": ["作品集", "作品"],
+}
+
+# 組合好的 HTML 最多保留幾份（每份約數 KB）
+DEFAULT_HTML_CACHE_ENTRIES = 256
+
+_TITLE_SEPARATOR_RE = re.compile(r"[\W_]+")
+_LATIN_WORD_RE = re.compile(r"[a-z]+")
+
+
+def _split_title(clean, zh_limit, en_limit):
+    """「標題：內容」格式時回傳 (標題, 內容)，否則回傳 None
+
+    只有冒號前的文字夠短（通常是標題）且冒號後有內容時才當作標題。
+    """
+    if "：" in clean:
+        title, content = clean.split("：", 1)
+        if len(title.strip()) <= zh_limit and content.strip():
+            return title.strip(), content.strip()
+        return None
+    if ":" in clean:
+        title, content = clean.split(":", 1)
+        title_text = title.strip()
+        if content.strip() and (title_text.lower() in _COMMON_TITLES or len(title_text) <= en_limit):
+            return title_text, content.strip()
+    return None
+
+
+def _append_advice_line(parts, clean, seen_items, heading_css, zh_limit, en_limit):
+    split = _split_title(clean, zh_limit, en_limit)
+    if split is None:
+        parts.append(_ADVICE_BULLET_TEMPLATE(clean))
+        return
+    title, content = split
+    seen_items.add(f"{title}:")
+    parts.append(_ADVICE_HEADING_TEMPLATE(title, css=heading_css))
+    parts.append(_ADVICE_BULLET_TEMPLATE(content))
+
+
+def parse_advice_item(item, seen_items, parts=None):
+    """智能解析單個建議項目，把 HTML 片段加入 parts 並回傳 parts
+
+    重複或過短（少於 5 個字）的項目會略過；seen_items 跨類別共用以避免重複顯示。
+    """
+    if parts is None:
+        parts = []
+
+    # 字典格式（包含 name 與 items）
+    if isinstance(item, dict) and 'name' in item and 'items' in item:
+        parts.append(_ADVICE_SUBTITLE_TEMPLATE(item['name']))
+        for sub_item in item.get('items') or []:
+            clean = str(sub_item).strip()
+            if not clean or len(clean) < 5 or clean in seen_items:
+                continue
+            seen_items.add(clean)
+            _append_advice_line(parts, clean, seen_items, "advice-subheading", 10, 12)
+        return parts
+
+    # 非字典格式，當作一般條目處理
+    clean = str(item).strip()
+    if not clean or len(clean) < 5 or clean in seen_items:
+        return parts
+    seen_items.add(clean)
+    _append_advice_line(parts, clean, seen_items, "advice-heading", 8, 15)
+    return parts
+
+def _normalize_title(title):
+    """小寫並把標點、符號與連續空白換成單一空白（中日韓文字視為文字保留）"""
+    return _TITLE_SEPARATOR_RE.sub(" ", str(title).lower()).strip()
+
+
+class AdviceTitleIndex:
+    """建議類別標題 → 類別鍵值（ADVICE_KEYS）的分類索引
+
+    先查正規化後的完整標題（正式標題與常見翻譯變體），找不到時以標題中出現的
+    關鍵字投票，票數相同時依 ADVICE_KEYS 的順序決定，結果與字典順序無關。
+    只收錄屬於單一類別的英文字（例如 suggestions 同時出現在多個類別，不列入）。
+    """
+
+    def __init__(self, language):
+        self.exact = {}
+        # 目前語言的正式標題優先，另一種語言的標題也收錄（模型偶爾會回覆另一種語言）
+        for title_language in (language, "中文", "English"):
+            for key, title in get_advice_titles(title_language).items():
+                self.exact.setdefault(_normalize_title(title), key)
+        for key, aliases in _ADVICE_TITLE_ALIASES.items():
+            for alias in aliases:
+                self.exact.setdefault(_normalize_title(alias), key)
+
+        word_keys = {}
+        for title, key in self.exact.items():
+            for word in _LATIN_WORD_RE.findall(title):
+                word_keys.setdefault(word, set()).add(key)
+        self.words = {word: keys.pop() for word, keys in word_keys.items() if len(keys) == 1}
+        self.cjk_keywords = {}
+        for key, keywords in _ADVICE_CJK_KEYWORDS.items():
+            for keyword in keywords:
+                self.cjk_keywords[keyword] = key
+        self._cjk_re = re.compile("|".join(sorted(map(re.escape, self.cjk_keywords), key=len, reverse=True)))
+
+    def classify(self, title):
+        """回傳類別鍵值，無法判斷時回傳 None"""
+        normalized = _normalize_title(title)
+        key = self.exact.get(normalized)
+        if key is not None:
+            return key
+        votes = {}
+        for word in _LATIN_WORD_RE.findall(normalized):
+            key = self.words.get(word)
+            if key is not None:
+                votes[key] = votes.get(key, 0) + 1
+        for keyword in self._cjk_re.findall(normalized):
+            key = self.cjk_keywords[keyword]
+            votes[key] = votes.get(key, 0) + 1
+        if not votes:
+            return None
+        return min(votes, key=lambda key: (-votes[key], ADVICE_KEYS.index(key)))
+
+
+@functools.lru_cache(maxsize=None)
+def get_advice_title_index(language):
+    """每種語言只建立一次分類索引"""
+    return AdviceTitleIndex(language)
+
+
+@functools.lru_cache(maxsize=4096)
+def classify_advice_title(title, language):
+    """建議類別標題對應的類別鍵值（結果依標題快取），無法判斷時回傳 None"""
+    return get_advice_title_index(language).classify(title)
+
+def advice_css_class(key):
+    """建議類別對應的 CSS class（例如 skill_gap → advice-skill-gap，顏色定義在 styles.py）"""
+    return f"advice-{key.replace('_', '-')}" if key else _DEFAULT_ADVICE_CSS
+
+def process_advice_dict(advice_content, texts, language):
+    """處理字典格式的建議內容"""
+    global_seen_items = set()
+    sections = []
+
+    for title, items in advice_content.items():
+        if not items:
+            continue
+        key = classify_advice_title(title, language)
+        display_title = texts.get(f"advice_{key}", title) if key else title
+
+        parts = []
+        for i, item in enumerate(items):
+            # 第一個項目完全等於主標題時跳過（避免重複）
+            if i == 0 and str(item).strip() == display_title:
+                continue
+            parse_advice_item(item, global_seen_items, parts)
+        sections.append(_ADVICE_CATEGORY_TEMPLATE(css=advice_css_class(key), title=display_title, body="".join(parts)))
+
+    return "".join(sections)
+
+
+def process_advice_string(advice_content):
+    """處理字符串格式的建議內容"""
+    return advice_content
+
+def process_advice_list(advice_content):
+    """處理列表格式的建議內容"""
+    return "<ul>" + "".join(f"<li>{item}</li>" for item in advice_content) + "</ul>"
+
+def build_advice_box_html(advice_content, texts, language):
+    """依建議內容的型別組合建議框"""
+    if isinstance(advice_content, dict):
+        advice_html = process_advice_dict(advice_content, texts, language)
+    elif isinstance(advice_content, str):
+        advice_html = process_advice_string(advice_content)
+    elif isinstance(advice_content, list):
+        advice_html = process_advice_list(advice_content)
+    else:
+        advice_html = str(advice_content)
+    return _ADVICE_BOX_TEMPLATE(advice_html)
+
+def build_advice_title_html(texts):
+    return _ADVICE_TITLE_TEMPLATE(texts['advice_title'])
+
+
+# ---- 各區塊 ----
+
+def build_score_html(result, texts):
+    """匹配度分數區塊"""
+    match_explanation = result.get('match_explanation', '')
+    explanation_html = "".join(
+        _PARAGRAPH_TEMPLATE(paragraph.strip())
+        for paragraph in (match_explanation.split('\n\n') if match_explanation else ())
+        if paragraph.strip()
+    )
+    return _SCORE_TEMPLATE(
+        score=result.get('match_score', 0),
+        label=texts['match_score_label'],
+        explanation=explanation_html,
+    )
+
+def _priority_level(weight):
+    if weight >= 0.7:
+        return "level-high"
+    if weight >= 0.5:
+        return "level-mid"
+    return "level-low"
+
+def build_priorities_html(result, texts):
+    """職缺關鍵技能區塊（沒有 priorities 時回傳空字串）"""
+    if not result.get('priorities'):
+        return ""
+    parts = [_SECTION_TITLE_TEMPLATE(texts['priorities_title'])]
+    if result.get('score_explanation'):
+        parts.append(_PRIORITIES_NOTE_TEMPLATE(result['score_explanation']))
+    for i, priority in enumerate(result['priorities'], 1):
+        if isinstance(priority, dict):
+            weight = priority.get('weight') or 0
+            parts.append(_PRIORITY_TEMPLATE(
+                level=_priority_level(weight),
+                index=i,
+                name=priority.get('name', ''),
+                weight=int(weight * 100),
+                explanation=priority.get('explanation', ''),
+            ))
+        else:
+            # 兼容舊格式
+            parts.append(_PRIORITY_LEGACY_TEMPLATE(i, priority))
+    return "".join(parts)
+
+def _build_item_html(item, css, detail_key, detail_css):
+    """符合 / 缺少的單一項目：新格式（item + evidence/action）、title + description 或純文字"""
+    if isinstance(item, dict) and 'item' in item and detail_key in item:
+        detail = item[detail_key]
+        # evidence 可能是列表，合併成一個段落
+        if isinstance(detail, list):
+            detail = " ".join(detail)
+        return _ITEM_WITH_DETAIL_TEMPLATE(css=css, title=item['item'], detail_css=detail_css, detail=detail)
+    if isinstance(item, dict) and 'title' in item and 'description' in item:
+        return _ITEM_WITH_DESCRIPTION_TEMPLATE(css=css, title=item['title'], description=item['description'])
+    return _ITEM_TEMPLATE(css=css, text=item)
+
+def _build_column_html(result, key, title, partial, css, detail_key, detail_css, empty_notice):
+    parts = [_SECTION_TITLE_TEMPLATE(title)]
+    if partial and key not in result:
+        # 串流中尚未產生的欄位只顯示標題
+        pass
+    elif result.get(key):
+        parts.extend(_build_item_html(item, css, detail_key, detail_css) for item in result[key])
+    else:
+        parts.append(empty_notice)
+    return "".join(parts)
+
+def build_matched_missing_html(result, texts, partial=False):
+    """符合和缺少的經驗，左右兩欄"""
+    matched = _build_column_html(
+        result, 'matched', texts['matched_title'], partial, "matched-item", 'evidence', "item-evidence",
+        _NOTICE_TEMPLATE(css="notice-info", text=texts['no_matched']),
+    )
+    missing = _build_column_html(
+        result, 'missing', texts['missing_title'], partial, "missing-item", 'action', "item-action",
+        _NOTICE_TEMPLATE(css="notice-success", text=texts['all_skills_met']),
+    )
+    return _COLUMNS_TEMPLATE(matched, missing)
+
+def build_results_html(result, texts, language, partial=False, include_advice=True):
+    """把整個結果頁面組合成單一 HTML 文件
+
+    partial 為串流中的部分結果，只組合已完成的區塊；include_advice 為 False 時
+    不含建議區塊（延遲產生模式由介面另外顯示）。
+    """
+    parts = [build_score_html(result, texts), build_priorities_html(result, texts)]
+    if not partial or 'matched' in result or 'missing' in result:
+        parts.append(build_matched_missing_html(result, texts, partial))
+    if include_advice and result.get('advice'):
+        parts.append(build_advice_title_html(texts))
+        parts.append(build_advice_box_html(result['advice'], texts, language))
+    return finalize_html(_RESULTS_TEMPLATE("".join(parts), css="lang-en" if language == "English" else "lang-zh"))
+
+def finalize_html(html):
+    """壓掉空行，避免 Markdown 在模型輸出的空行處結束 HTML 區塊"""
+    return _BLANK_LINES_RE.sub("\n", html)
+
+
+def result_fingerprint(result):
+    """分析結果內容的雜湊（內容相同的結果共用組合好的 HTML）"""
+    payload = json.dumps(result, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class HTMLCache:
+    """組合好的 HTML，以 (結果雜湊, 語言, 區塊) 等鍵值保存的 LRU（所有 session 共用）
+
+    Streamlit 每次互動都會重新執行整個腳本，結果沒有改變時直接取用，不必重新組合。
+    """
+
+    def __init__(self, max_entries=DEFAULT_HTML_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key, build):
+        """命中時回傳保存的 HTML，否則呼叫 build() 組合並保存"""
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+        html = build()
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_html_cache = HTMLCache()
+
+
+def build_results_html_cached(result, texts, language, result_hash, include_advice=True):
+    """完整結果的頁面 HTML，依結果雜湊與語言快取（串流中的部分結果請用 build_results_html）"""
+    return _html_cache.get_or_build(
+        ("results", result_hash, language, include_advice),
+        lambda: build_results_html(result, texts, language, include_advice=include_advice),
+    )
+
+
+def build_advice_box_html_cached(advice_content, texts, language):
+    """單一建議區塊的 HTML，依內容雜湊與語言快取（延遲產生模式逐一顯示的類別）
+
+    與完整結果頁面一樣壓掉空行，模型輸出的空行不會中斷 Markdown 中的 HTML 區塊。
+    """
+    return _html_cache.get_or_build(
+        ("advice", result_fingerprint(advice_content), language),
+        lambda: finalize_html(build_advice_box_html(advice_content, texts, language)),
+    )
@@ -0,0 +1,199 @@
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+import metrics
+
+try:
+    from google.api_core import exceptions as google_exceptions
+except ImportError:  # google-api-core 隨 google-generativeai 安裝，這裡只是保險
+    google_exceptions = None
+
+try:
+    # REST 傳輸層的連線錯誤與逾時不是內建 ConnectionError / TimeoutError 的子類別
+    from requests import exceptions as requests_exceptions
+except ImportError:
+    requests_exceptions = None
+
+
+# 會重試的 HTTP 狀態碼：限流與伺服器端錯誤
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """上游持續失敗，斷路器開啟中，直接拒絕呼叫"""
+
+
+class DeadlineExceededError(Exception):
+    """重試已用完整體時限"""
+
+
+def is_retryable(error):
+    """判斷錯誤是否為暫時性（限流、5xx、逾時、連線中斷）"""
+    if google_exceptions is not None and isinstance(error, google_exceptions.GoogleAPICallError):
+        return getattr(error, "code", None) in RETRYABLE_STATUS_CODES
+    if requests_exceptions is not None and isinstance(
+        error, (requests_exceptions.ConnectionError, requests_exceptions.Timeout)
+    ):
+        return True
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+class RetryPolicy:
+    """單次呼叫時限、整體時限與帶抖動的指數退避"""
+
+    def __init__(self, attempt_timeout=60.0, deadline=120.0, max_attempts=4, base_delay=0.5, max_delay=8.0):
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt):
+        """第 attempt 次失敗後的等待秒數（full jitter）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            attempt_timeout=float(os.getenv("JOBMATCH_CALL_TIMEOUT", 60)),
+            deadline=float(os.getenv("JOBMATCH_CALL_DEADLINE", 120)),
+            max_attempts=int(os.getenv("JOBMATCH_MAX_ATTEMPTS", 4)),
+        )
+
+
+class CircuitBreaker:
+    """連續失敗達門檻後開啟，冷卻時間過後只放行一個試探呼叫"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """呼叫前檢查；斷路器開啟時拋出 CircuitOpenError"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.OPEN:
+                raise CircuitOpenError("upstream circuit is open")
+            if state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitOpenError("upstream circuit is half-open, probe in flight")
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release(self):
+        """呼叫因非上游原因失敗時，釋放試探名額但不改變狀態"""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+def call_with_resilience(call, policy=None, breaker=None, admit=None):
+    """以重試、時限與斷路器包裝上游呼叫
+
+    call(timeout) 會收到本次嘗試可用的秒數，應將其傳給 SDK 的 request_options。
+    暫時性錯誤以指數退避重試，直到次數或整體時限用完；其他錯誤直接拋出。
+    admit() 不為 None 時應回傳取得呼叫名額的 context manager：每次嘗試各自排隊，
+    重試也計入速率限制，退避等待期間則不佔用名額。整體時限從第一次取得名額時起算。
+    """
+    policy = policy or get_retry_policy()
+    breaker = breaker or get_circuit_breaker()
+    start = None
+    attempt = 0
+    while True:
+        with admit() if admit is not None else nullcontext():
+            if start is None:
+                start = time.monotonic()
+            remaining = policy.deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                breaker.record_failure()
+                raise DeadlineExceededError(f"deadline of {policy.deadline}s exceeded after {attempt} attempts")
+            breaker.before_call()
+            settled = False
+            try:
+                result = call(min(policy.attempt_timeout, remaining))
+                breaker.record_success()
+                settled = True
+                return result
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                attempt += 1
+                delay = policy.backoff(attempt - 1)
+                if attempt >= policy.max_attempts or time.monotonic() - start + delay >= policy.deadline:
+                    # 每次邏輯呼叫只計一次失敗，避免單一請求的重試就把共用的斷路器推到門檻
+                    breaker.record_failure()
+                    settled = True
+                    raise
+                metrics.RETRIES.inc()
+                print(f"Gemini 呼叫失敗（第 {attempt} 次），{delay:.1f} 秒後重試: {e}", file=sys.stderr)
+            finally:
+                # 非上游原因的失敗、準備重試，或 BaseException（Streamlit 重新執行、中斷）
+                # 都只釋放試探名額，不改變斷路器狀態
+                if not settled:
+                    breaker.release()
+        # 退避期間已釋放名額，讓其他請求先使用
+        time.sleep(delay)
+
+
+_retry_policy = None
+_circuit_breaker = None
+_singleton_lock = threading.Lock()
+
+
+def get_retry_policy():
+    """取得行程內共用的重試設定"""
+    global _retry_policy
+    if _retry_policy is None:
+        with _singleton_lock:
+            if _retry_policy is None:
+                _retry_policy = RetryPolicy.from_env()
+    return _retry_policy
+
+
+def get_circuit_breaker():
+    """取得行程內共用的斷路器（所有 session 共同反映上游狀態）"""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        with _singleton_lock:
+            if _circuit_breaker is None:
+                _circuit_breaker = CircuitBreaker(
+                    failure_threshold=int(os.getenv("JOBMATCH_BREAKER_THRESHOLD", 5)),
+                    reset_timeout=float(os.getenv("JOBMATCH_BREAKER_RESET_SECONDS", 30)),
+                )
+    return _circuit_breaker
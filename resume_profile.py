@@ -0,0 +1,177 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from cache import normalize_text
+from compaction import estimate_tokens
+
+
+# 履歷摘要的提示詞、格式或儲存內容改變時遞增，讓舊的摘要失效
+PROFILE_VERSION = 2
+
+# 摘要中各列表保留的上限（避免模型回覆過長時抵銷節省的 token）
+_LIST_LIMITS = {"roles": 12, "skills": 60, "education": 5, "certifications": 10, "highlights": 8}
+_MAX_DOMAINS = 15
+
+_LABELS = {
+    "中文": {
+        "summary": "概述",
+        "roles": "經歷",
+        "experience_years": "各領域年資",
+        "years": "{years} 年",
+        "skills": "技能",
+        "education": "學歷",
+        "certifications": "證照與語言",
+        "highlights": "重點成果",
+        "separator": "、",
+        "detail_separator": "｜",
+        "colon": "：",
+    },
+    "English": {
+        "summary": "Summary",
+        "roles": "Roles",
+        "experience_years": "Years by domain",
+        "years": "{years} yrs",
+        "skills": "Skills",
+        "education": "Education",
+        "certifications": "Certifications & languages",
+        "highlights": "Highlights",
+        "separator": ", ",
+        "detail_separator": " | ",
+        "colon": ": ",
+    },
+}
+
+
+def make_profile_key(resume_text, model_name):
+    """以正規化後的履歷、模型與摘要版本產生快取鍵值
+
+    摘要存在自己的記憶體快取（get_profile_cache），但持久化儲存與分析結果共用，前綴避免衝突。
+    """
+    payload = "\x1f".join(["resume-profile", normalize_text(resume_text), model_name, str(PROFILE_VERSION)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _clean_strings(values, limit):
+    if not isinstance(values, list):
+        return []
+    cleaned = []
+    for value in values:
+        text = str(value).strip() if value is not None else ""
+        if text and text not in cleaned:
+            cleaned.append(text)
+    return cleaned[:limit]
+
+
+def _format_years(value):
+    try:
+        years = round(float(value), 1)
+    except (TypeError, ValueError):
+        return None
+    if years <= 0:
+        return None
+    return int(years) if years.is_integer() else years
+
+
+def normalize_profile(raw):
+    """整理模型回覆的摘要：只保留已知欄位並修正型別；沒有任何經歷與技能時回傳 None"""
+    if not isinstance(raw, dict):
+        return None
+    roles = []
+    for role in raw.get("roles") if isinstance(raw.get("roles"), list) else []:
+        if not isinstance(role, dict) or not str(role.get("title") or "").strip():
+            continue
+        roles.append({
+            "title": str(role.get("title")).strip(),
+            "organization": str(role.get("organization") or "").strip(),
+            "period": str(role.get("period") or "").strip(),
+            "years": _format_years(role.get("years")),
+        })
+    experience_years = {}
+    if isinstance(raw.get("experience_years"), dict):
+        for domain, value in raw["experience_years"].items():
+            years = _format_years(value)
+            if str(domain).strip() and years is not None:
+                experience_years[str(domain).strip()] = years
+    profile = {
+        "summary": str(raw.get("summary") or "").strip(),
+        "roles": roles[:_LIST_LIMITS["roles"]],
+        "experience_years": dict(list(experience_years.items())[:_MAX_DOMAINS]),
+    }
+    for key in ("skills", "education", "certifications", "highlights"):
+        profile[key] = _clean_strings(raw.get(key), _LIST_LIMITS[key])
+    if not profile["roles"] and not profile["skills"]:
+        return None
+    return profile
+
+
+def format_profile(profile, language="中文"):
+    """把摘要轉成精簡的純文字，放進分析提示詞取代履歷全文"""
+    labels = _LABELS["English" if language == "English" else "中文"]
+    separator, detail_separator, colon = labels["separator"], labels["detail_separator"], labels["colon"]
+    lines = []
+    if profile.get("summary"):
+        lines.append(f"{labels['summary']}{colon}{profile['summary']}")
+    if profile.get("roles"):
+        lines.append(f"{labels['roles']}{colon}".rstrip())
+        for role in profile["roles"]:
+            details = [part for part in (role.get("organization"), role.get("period")) if part]
+            if role.get("years") is not None:
+                details.append(labels["years"].format(years=role["years"]))
+            lines.append(detail_separator.join([f"- {role['title']}", *details]))
+    if profile.get("experience_years"):
+        domains = separator.join(
+            f"{domain} {labels['years'].format(years=years)}" for domain, years in profile["experience_years"].items()
+        )
+        lines.append(f"{labels['experience_years']}{colon}{domains}")
+    for key in ("skills", "education", "certifications"):
+        if profile.get(key):
+            lines.append(f"{labels[key]}{colon}{separator.join(profile[key])}")
+    if profile.get("highlights"):
+        lines.append(f"{labels['highlights']}{colon}".rstrip())
+        lines.extend(f"- {highlight}" for highlight in profile["highlights"])
+    return "\n".join(lines)
+
+
+def make_profile_record(profile, resume_tokens):
+    """快取與儲存用的摘要紀錄：摘要本身，以及各語言的摘要文字比壓縮後的履歷少多少 token
+
+    節省的 token 數在產生摘要時算一次，之後每次送出摘要只需查表，不必再壓縮履歷全文。
+    """
+    return {
+        "profile": profile,
+        "saved_tokens": {
+            language: max(0, resume_tokens - estimate_tokens(format_profile(profile, language)))
+            for language in _LABELS
+        },
+    }
+
+
+class ResumeUsageTracker:
+    """記錄每份履歷搭配過幾份不同的職缺（LRU，只保存雜湊）
+
+    自動模式下同一份履歷第二次搭配不同職缺時才產生摘要，只比對一次的履歷不多花一次呼叫。
+    """
+
+    def __init__(self, max_resumes=1024, max_jobs_per_resume=64):
+        self.max_resumes = max_resumes
+        self.max_jobs_per_resume = max_jobs_per_resume
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def note(self, profile_key, input_hash):
+        """記錄一次使用，回傳這份履歷目前搭配過的不同職缺數"""
+        with self._lock:
+            jobs = self._jobs.get(profile_key)
+            if jobs is None:
+                jobs = self._jobs[profile_key] = set()
+            self._jobs.move_to_end(profile_key)
+            if len(jobs) < self.max_jobs_per_resume:
+                jobs.add(input_hash)
+            while len(self._jobs) > self.max_resumes:
+                self._jobs.popitem(last=False)
+            return len(jobs)
+
+    def clear(self):
+        with self._lock:
+            self._jobs.clear()
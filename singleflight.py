@@ -0,0 +1,64 @@
+import threading
+from concurrent.futures import CancelledError, Future
+
+
+class SingleFlight:
+    """合併相同鍵值、同時進行中的呼叫：只有第一個呼叫端真正執行，其餘等待其結果
+
+    - 執行成功：所有等待者取得同一個結果
+    - 拋出 Exception：所有等待者收到同一個例外
+    - 執行端被中斷（KeyboardInterrupt、Streamlit 重新執行頁面等 BaseException）：
+      這次呼叫視為取消，等待者會改由其中一人重新執行，不會收到不屬於自己的中斷
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """執行 fn() 或等待進行中的相同呼叫；回傳 (結果, 是否為共用結果)"""
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                if future is None:
+                    future = Future()
+                    self._calls[key] = future
+                    self.executions += 1
+                    leader = True
+                else:
+                    self.coalesced += 1
+                    leader = False
+
+            if not leader:
+                try:
+                    return future.result(), True
+                except CancelledError:
+                    # 執行端被中斷，重新嘗試（可能由自己接手執行）
+                    continue
+
+            try:
+                result = fn()
+            except Exception as e:
+                self._forget(key, future)
+                future.set_exception(e)
+                raise
+            except BaseException:
+                self._forget(key, future)
+                future.cancel()
+                raise
+            self._forget(key, future)
+            future.set_result(result)
+            return result, False
+
+    def _forget(self, key, future):
+        # 先移除再通知等待者，之後的新呼叫會重新執行而不是拿到已結束的呼叫
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def in_flight(self):
+        """目前進行中的呼叫數量"""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,251 @@
+import threading
+from collections import deque
+
+
+# 技能分類：標準名稱 → 中英文別名（比對時不分大小寫）
+# 單一字母或常見英文單字（如 C、R、Go）誤判率太高，只收錄較明確的寫法
+SKILL_TAXONOMY = {
+    # 程式語言
+    "Python": ["python", "py3"],
+    "JavaScript": ["javascript", "js", "ecmascript", "es6"],
+    "TypeScript": ["typescript", "ts"],
+    "Java": ["java"],
+    "Kotlin": ["kotlin"],
+    "Swift": ["swiftui", "swift語言"],
+    "Go": ["golang", "go語言"],
+    "Rust": ["rust"],
+    "C++": ["c++", "cpp"],
+    "C#": ["c#", "csharp"],
+    "PHP": ["php"],
+    "Ruby": ["ruby"],
+    "Scala": ["scala"],
+    "SQL": ["sql", "t-sql", "pl/sql"],
+    "Shell": ["shell script", "bash", "shell腳本"],
+    # 前端
+    "HTML/CSS": ["html", "css", "html5", "css3", "sass", "scss"],
+    "React": ["react", "react.js", "reactjs"],
+    "Vue": ["vue", "vue.js", "vuejs"],
+    "Angular": ["angular", "angularjs"],
+    "Next.js": ["next.js", "nextjs"],
+    "Tailwind CSS": ["tailwind", "tailwindcss"],
+    # 後端與框架
+    "Node.js": ["node.js", "nodejs"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi"],
+    "Spring": ["spring boot", "springboot", "spring framework", "spring mvc", "spring cloud"],
+    "Express": ["express.js", "expressjs"],
+    ".NET": [".net", "asp.net", "dotnet"],
+    "GraphQL": ["graphql"],
+    "RESTful API": ["restful", "rest api", "restful api"],
+    "Microservices": ["microservices", "microservice", "微服務"],
+    # 資料庫與資料
+    "PostgreSQL": ["postgresql", "postgres"],
+    "MySQL": ["mysql"],
+    "MongoDB": ["mongodb", "mongo"],
+    "Redis": ["redis"],
+    "Elasticsearch": ["elasticsearch", "elastic search"],
+    "Kafka": ["kafka"],
+    "Spark": ["apache spark", "pyspark", "spark sql", "spark streaming"],
+    "Hadoop": ["hadoop"],
+    "Data Analysis": ["data analysis", "資料分析", "數據分析"],
+    "Data Engineering": ["data engineering", "資料工程", "數據工程", "etl"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "Tableau": ["tableau"],
+    "Power BI": ["power bi", "powerbi"],
+    "Excel": ["ms excel", "microsoft excel", "excel vba"],
+    # AI / 機器學習
+    "Machine Learning": ["machine learning", "機器學習"],
+    "Deep Learning": ["deep learning", "深度學習"],
+    "NLP": ["nlp", "natural language processing", "自然語言處理"],
+    "Computer Vision": ["computer vision", "電腦視覺", "影像辨識"],
+    "LLM": ["llm", "llms", "large language model", "大型語言模型", "大語言模型"],
+    "PyTorch": ["pytorch", "torch"],
+    "TensorFlow": ["tensorflow", "keras"],
+    "scikit-learn": ["scikit-learn", "sklearn"],
+    # 雲端與維運
+    "AWS": ["aws", "amazon web services"],
+    "GCP": ["gcp", "google cloud"],
+    "Azure": ["azure"],
+    "Docker": ["docker", "容器化"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "Terraform": ["terraform"],
+    "CI/CD": ["ci/cd", "cicd", "持續整合", "持續部署", "jenkins", "github actions", "gitlab ci"],
+    "Linux": ["linux"],
+    "Git": ["git", "版本控制"],
+    # 測試與方法論
+    "Unit Testing": ["unit test", "unit testing", "單元測試", "pytest", "jest", "junit"],
+    "Agile": ["agile development", "agile methodology", "scrum", "敏捷開發", "敏捷式開發"],
+    # 設計與產品
+    "UI/UX": ["ui/ux", "ux", "使用者體驗", "用戶體驗", "介面設計"],
+    "Figma": ["figma"],
+    "Product Management": ["product management", "產品管理", "產品規劃"],
+    "Project Management": ["project management", "專案管理", "項目管理", "pmp"],
+    # 商業與行銷
+    "Digital Marketing": ["digital marketing", "數位行銷", "網路行銷"],
+    "SEO": ["seo", "搜尋引擎優化"],
+    "Accounting": ["accounting", "會計"],
+    # 軟技能
+    "Communication": ["communication", "溝通能力", "溝通協調"],
+    "Leadership": ["leadership", "領導能力", "團隊管理"],
+    "English": ["english", "英文", "英語", "toeic", "ielts", "toefl"],
+    "Japanese": ["japanese", "日文", "日語", "jlpt"],
+}
+
+# 同時是常見英文單字或單位的別名（excel at、node in a network、swift delivery、spark ideas、
+# agile team、5 ml）只比對大小寫完全相同的寫法
+CASE_SENSITIVE_ALIASES = {
+    "Node.js": ["Node", "NodeJS"],
+    "Excel": ["Excel", "EXCEL"],
+    "Swift": ["Swift"],
+    "Spark": ["Spark"],
+    "Agile": ["Agile", "AGILE"],
+    "Machine Learning": ["ML"],
+}
+
+
+def _is_word_char(char):
+    """英數字視為單字的一部分；中文字不算，因此「熟悉Python」仍可比對"""
+    return char.isascii() and char.isalnum()
+
+
+class SkillMatcher:
+    """以 Aho–Corasick 自動機一次線性掃描找出文字中所有技能
+
+    英文別名要求前後不能緊接英數字（避免 js 比對到 json），
+    重疊的結果保留最左、最長者（node.js 不會再算成 js）。
+    """
+
+    def __init__(self, taxonomy=None, case_sensitive_aliases=None):
+        taxonomy = SKILL_TAXONOMY if taxonomy is None else taxonomy
+        if case_sensitive_aliases is None:
+            case_sensitive_aliases = CASE_SENSITIVE_ALIASES if taxonomy is SKILL_TAXONOMY else {}
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+        for canonical, aliases in taxonomy.items():
+            for alias in {alias.lower() for alias in aliases}:
+                self._add(alias, canonical)
+        for canonical, aliases in case_sensitive_aliases.items():
+            for alias in set(aliases):
+                self._add(alias.lower(), canonical, exact=alias)
+        self._build_failure_links()
+
+    def _add(self, alias, canonical, exact=None):
+        node = 0
+        for char in alias:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = next_node
+        check_start = _is_word_char(alias[0])
+        check_end = _is_word_char(alias[-1])
+        self._outputs[node].append((len(alias), canonical, check_start, check_end, exact))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                if node:
+                    fallback = self._fail[node]
+                    while fallback and char not in self._goto[fallback]:
+                        fallback = self._fail[fallback]
+                    self._fail[child] = self._goto[fallback].get(char, 0)
+                # 沿失敗鏈可達的輸出一併合併，掃描時不必再回溯
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+    def find(self, text):
+        """回傳 (開始位置, 結束位置, 標準名稱) 列表，位置以小寫後的文字為準"""
+        original = text
+        text = text.lower()
+        # 少數非 ASCII 字元小寫後長度會改變，此時無法對回原文，略過大小寫相符的別名
+        same_length = len(text) == len(original)
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        matches = []
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, canonical, check_start, check_end, exact in outputs[node]:
+                start = end - length
+                if exact is not None and (not same_length or original[start:end] != exact):
+                    continue
+                if check_start and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if check_end and end < len(text) and _is_word_char(text[end]):
+                    continue
+                matches.append((start, end, canonical))
+
+        # 保留最左、最長且互不重疊的結果
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+        selected = []
+        last_end = 0
+        for match in matches:
+            if match[0] >= last_end:
+                selected.append(match)
+                last_end = match[1]
+        return selected
+
+    def extract(self, text):
+        """依首次出現順序回傳文字中提到的技能（標準名稱，不重複）"""
+        return list(dict.fromkeys(canonical for _, _, canonical in self.find(text)))
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_skill_matcher():
+    """取得行程內共用的技能比對器（第一次使用時才建立自動機）"""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = SkillMatcher()
+    return _matcher
+
+
+def extract_skills(text):
+    """找出文字中提到的技能"""
+    return get_skill_matcher().extract(text)
+
+
+def skill_overlap(resume_text, job_description):
+    """比較履歷與職缺的技能，不呼叫 AI
+
+    回傳 {"matched": 兩者皆有, "missing": 職缺要求但履歷沒有, "coverage": 0-1 或 None}；
+    職缺中找不到任何已知技能時 coverage 為 None。
+    """
+    resume_skills = set(extract_skills(resume_text))
+    job_skills = extract_skills(job_description)
+    matched = [skill for skill in job_skills if skill in resume_skills]
+    missing = [skill for skill in job_skills if skill not in resume_skills]
+    coverage = len(matched) / len(job_skills) if job_skills else None
+    return {"matched": matched, "missing": missing, "coverage": coverage}
+
+
+def find_unsupported_items(items, job_description):
+    """檢查 AI 列出的項目（例如 priorities）是否出自職缺描述
+
+    items 可為字串或含 name / item 的字典。回傳提到了已知技能、但其中沒有任何一項
+    出現在職缺描述中的項目名稱；沒有提到已知技能的項目無法判斷，不會列入。
+    """
+    job_skills = set(extract_skills(job_description))
+    unsupported = []
+    for item in items or []:
+        if isinstance(item, dict):
+            item = item.get("name") or item.get("item") or ""
+        if not isinstance(item, str):
+            continue
+        item_skills = extract_skills(item)
+        if item_skills and not job_skills.intersection(item_skills):
+            unsupported.append(item)
+    return unsupported
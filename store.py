@@ -0,0 +1,189 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import metrics
+
+
+# 預設上限：256 MB、保存 30 天，每寫入 200 次在背景執行一次壓縮
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 60 * 60
+DEFAULT_COMPACT_EVERY = 200
+
+
+class AnalysisStore:
+    """以 SQLite 保存分析結果，重啟或重新部署後仍可命中"""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, max_age_seconds=DEFAULT_MAX_AGE_SECONDS,
+                 compact_every=DEFAULT_COMPACT_EVERY):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.compact_every = compact_every
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._writes_since_compact = 0
+        self._compacting = False
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analyses (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_accessed ON analyses (accessed_at)")
+        conn.commit()
+
+    def _connection(self):
+        """每個執行緒使用自己的連線（WAL 模式下讀取互不阻塞）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """讀取結果，不存在、已過期或資料庫無法讀取時回傳 None（視為未命中）"""
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT result, created_at FROM analyses WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._report_error("讀取", e)
+            return None
+        if row is None:
+            return None
+        payload, created_at = row
+        now = time.time()
+        if self.max_age_seconds and created_at + self.max_age_seconds <= now:
+            return None
+        # 壓縮期間或其他執行緒正在寫入時略過存取時間更新，不讓讀取等待
+        if not self._compacting and self._write_lock.acquire(blocking=False):
+            try:
+                conn.execute("UPDATE analyses SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+            except sqlite3.Error:
+                # 資料庫忙碌時略過存取時間更新，不影響讀取
+                pass
+            finally:
+                self._write_lock.release()
+        return json.loads(payload)
+
+    def set(self, key, value):
+        """寫入結果並視需要刪除最久未存取的結果；資料庫無法寫入時（磁碟已滿、鎖定逾時）略過
+
+        累積 compact_every 次寫入後在背景執行緒壓縮，不佔用呼叫端的執行緒。
+        """
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        now = time.time()
+        try:
+            conn = self._connection()
+            with self._write_lock:
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO analyses (key, result, size, created_at, accessed_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, payload, size, now, now),
+                    )
+                    self._enforce_max_size(conn)
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    raise
+                self._writes_since_compact += 1
+                should_compact = (
+                    self.compact_every and self._writes_since_compact >= self.compact_every and not self._compacting
+                )
+                if should_compact:
+                    self._writes_since_compact = 0
+                    self._compacting = True
+        except sqlite3.Error as e:
+            self._report_error("寫入", e)
+            return
+        if should_compact:
+            threading.Thread(target=self._compact_in_background, name="jobmatch-store-compact", daemon=True).start()
+
+    def _report_error(self, action, error):
+        metrics.ERRORS.inc(stage="store")
+        print(f"持久化儲存{action}失敗，已略過: {error}", file=sys.stderr)
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except sqlite3.Error as e:
+            self._report_error("壓縮", e)
+        finally:
+            self._compacting = False
+
+    def _enforce_max_size(self, conn):
+        """超過容量上限時，從最久未存取的結果開始刪除"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM analyses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT key, size FROM analyses ORDER BY accessed_at ASC").fetchall()
+        stale_keys = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale_keys.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM analyses WHERE key = ?", stale_keys)
+
+    def compact(self):
+        """刪除過期結果並回收檔案空間
+
+        只有刪除時持有寫入鎖；checkpoint 與 VACUUM 在鎖外執行（WAL 模式下讀取不受影響），
+        期間其他執行緒的寫入由 SQLite 的忙碌等待處理，逾時時該次寫入略過。
+        """
+        conn = self._connection()
+        with self._write_lock:
+            if self.max_age_seconds:
+                cutoff = time.time() - self.max_age_seconds
+                conn.execute("DELETE FROM analyses WHERE created_at <= ?", (cutoff,))
+            self._enforce_max_size(conn)
+            conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+
+    def stats(self):
+        """回傳筆數與總大小"""
+        row = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analyses"
+        ).fetchone()
+        return {"entries": row[0], "bytes": row[1], "max_bytes": self.max_bytes}
+
+
+_analysis_store = None
+_analysis_store_lock = threading.Lock()
+
+
+def get_analysis_store():
+    """取得持久化儲存；未設定 JOBMATCH_STORE_PATH 時回傳 None（停用）"""
+    global _analysis_store
+    path = os.getenv("JOBMATCH_STORE_PATH")
+    if not path:
+        return None
+    if _analysis_store is None:
+        with _analysis_store_lock:
+            if _analysis_store is None:
+                _analysis_store = AnalysisStore(
+                    path,
+                    max_bytes=int(os.getenv("JOBMATCH_STORE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                    max_age_seconds=float(os.getenv("JOBMATCH_STORE_MAX_AGE_SECONDS", DEFAULT_MAX_AGE_SECONDS)),
+                )
+    return _analysis_store
@@ -1,8 +1,20 @@
+import re
+
 import streamlit as st
 
-def apply_global_styles():
-    """應用全域 CSS 樣式"""
-    st.markdown("""
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_CSS_SPACE_RE = re.compile(r"\s+")
+_CSS_PUNCTUATION_RE = re.compile(r"\s*([{};:,>])\s*")
+
+
+def _minify_css(css):
+    """移除註解與多餘空白（模組載入時執行一次）"""
+    css = _CSS_COMMENT_RE.sub("", css)
+    css = _CSS_SPACE_RE.sub(" ", css)
+    return _CSS_PUNCTUATION_RE.sub(r"\1", css).strip()
+
+
+_GLOBAL_CSS = """
     <style>
         /* 整體頁面樣式 */
         .main .block-container {
@@ -117,6 +129,165 @@ def apply_global_styles():
             font-weight: 600;
         }
         
+        /* 分析結果頁面（由 rendering.py 組合） */
+        .results-title {
+            font-size: 1.5rem;
+            margin: 1.5rem 0 0.8rem 0;
+        }
+        
+        .score-explanation {
+            font-size: 0.9rem;
+            margin: 0.5rem 0;
+            opacity: 0.8;
+            line-height: 1.6;
+        }
+        
+        .priorities-note {
+            font-size: 0.9rem;
+            color: #666;
+            margin-bottom: 1rem;
+        }
+        
+        .priority-card {
+            background: #f8f9fa;
+            padding: 0.8rem;
+            margin: 0.3rem 0;
+            border-radius: 6px;
+            border-left: 3px solid var(--priority-color);
+        }
+        
+        .priority-card.level-high { --priority-color: #28a745; }
+        .priority-card.level-mid { --priority-color: #ffc107; }
+        .priority-card.level-low { --priority-color: #dc3545; }
+        
+        .priority-card-header {
+            display: flex;
+            justify-content: space-between;
+            margin-bottom: 0.3rem;
+        }
+        
+        .priority-name {
+            font-weight: 500;
+        }
+        
+        .priority-weight {
+            font-weight: bold;
+            color: var(--priority-color);
+        }
+        
+        .priority-explanation {
+            color: #666;
+            font-size: 0.85rem;
+        }
+        
+        .lang-en .priorities-note {
+            font-size: 1rem;
+        }
+        
+        .lang-en .priority-explanation {
+            font-size: 0.9rem;
+        }
+        
+        .results-columns {
+            display: grid;
+            grid-template-columns: 1fr 1fr;
+            gap: 1rem;
+        }
+        
+        @media (max-width: 640px) {
+            .results-columns {
+                grid-template-columns: 1fr;
+            }
+        }
+        
+        .item-evidence {
+            color: #666;
+            font-size: 0.9rem;
+            line-height: 1.5;
+        }
+        
+        .item-action {
+            color: #666;
+        }
+        
+        .results-notice {
+            padding: 1rem;
+            border-radius: 0.5rem;
+            margin: 0.5rem 0;
+        }
+        
+        .notice-info {
+            background: rgba(28, 131, 225, 0.1);
+            color: #004280;
+        }
+        
+        .notice-success {
+            background: rgba(33, 195, 84, 0.1);
+            color: #177233;
+        }
+        
+        /* AI 建議：各類別的顏色以 --advice-color 設定 */
+        .advice-title {
+            font-size: 1.5rem;
+            font-weight: 600;
+            margin: 1.5rem 0 1rem 0;
+            color: #1a1a1a;
+        }
+        
+        .advice-category { --advice-color: #666; }
+        .advice-resume-optimization { --advice-color: #dc3545; }
+        .advice-cover-letter { --advice-color: #007bff; }
+        .advice-skill-gap { --advice-color: #28a745; }
+        .advice-interview { --advice-color: #6f42c1; }
+        .advice-portfolio { --advice-color: #fd7e14; }
+        
+        .advice-category-title {
+            color: var(--advice-color);
+            margin-top: 0.8rem;
+            margin-bottom: 0.5rem;
+            font-size: 1.5rem;
+            font-weight: 600;
+        }
+        
+        .advice-subtitle,
+        .advice-heading,
+        .advice-subheading {
+            font-weight: 600;
+            color: #333;
+            font-size: 1rem;
+            border-left: 3px solid var(--advice-color);
+            padding-left: 0.8rem;
+        }
+        
+        .advice-subtitle {
+            margin: 1.2rem 0 0.8rem 0;
+        }
+        
+        .advice-heading {
+            margin: 1.2rem 0 0.5rem 0;
+        }
+        
+        .advice-subheading {
+            margin: 1rem 0 0.5rem 0;
+            font-size: 0.95rem;
+            border-left-width: 2px;
+            padding-left: 0.6rem;
+        }
+        
+        .advice-bullet {
+            margin: 0.3rem 0;
+            padding-left: 1.5rem;
+            line-height: 1.6;
+            font-size: 0.9rem;
+        }
+        
+        .advice-bullet::before {
+            content: "•";
+            color: var(--advice-color);
+            font-weight: bold;
+            margin-right: 0.5rem;
+        }
+        
         /* 語言選擇器樣式 */
         .stSelectbox > div > div {
             width: 120px !important;
@@ -141,7 +312,8 @@ def apply_global_styles():
         }
         
         /* 按鈕樣式 */
-        .stButton > button {
+        .stButton > button,
+        .stFormSubmitButton > button {
             background-color: #007bff;
             color: white;
             border: none;
@@ -150,7 +322,8 @@ def apply_global_styles():
             transition: background-color 0.2s;
         }
         
-        .stButton > button:hover {
+        .stButton > button:hover,
+        .stFormSubmitButton > button:hover {
             background-color: #0056b3;
         }
         
@@ -170,9 +343,23 @@ def apply_global_styles():
             background-color: #ffffff;
         }
         
+        /* 輸入表單不顯示外框 */
+        [data-testid="stForm"] {
+            border: none;
+            padding: 0;
+        }
+        
         /* 簡化表格樣式 */
         .stDataFrame {
             border: none;
         }
     </style>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+"""
+
+# 每次整頁重新執行都要送出樣式，預先壓縮成單行，避免重複處理與傳送註解、縮排
+GLOBAL_CSS = _minify_css(_GLOBAL_CSS)
+
+
+def apply_global_styles():
+    """應用全域 CSS 樣式"""
+    st.markdown(GLOBAL_CSS, unsafe_allow_html=True)
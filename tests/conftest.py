@@ -0,0 +1,25 @@
+"""測試共用設定：以 benchmarks/fake_gemini.py 的假後端取代 Gemini，不需要網路與 API 金鑰"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import fake_gemini  # noqa: E402
+
+
+@pytest.fixture
+def fake_backend():
+    """安裝沒有延遲的假後端，並清空行程內共用的結果與履歷摘要快取"""
+    backend = fake_gemini.install(fake_gemini.FakeBackend(latency=0, tokens_per_second=1e9))
+
+    from cache import get_profile_cache, get_result_cache
+
+    get_result_cache().clear()
+    get_profile_cache().clear()
+    yield backend
+    get_result_cache().clear()
+    get_profile_cache().clear()
@@ -0,0 +1,41 @@
+import fake_gemini
+
+import analyzer
+from prompts import ADVICE_KEYS, get_advice_titles
+
+RESUME = "React developer with 2 years of JavaScript experience"
+JOB = "Frontend engineer. Requirements: React, TypeScript, testing"
+
+
+def test_identical_analysis_is_served_from_cache(fake_backend):
+    first = analyzer.analyze_resume_job_match(RESUME, JOB)
+    calls = fake_backend.calls
+    second = analyzer.analyze_resume_job_match(RESUME, JOB)
+    assert second == first
+    assert fake_backend.calls == calls
+    assert list(first["advice"]) == list(get_advice_titles("中文").values())
+
+
+def test_score_only_then_lazy_advice_section(fake_backend):
+    result = analyzer.analyze_resume_job_match(RESUME, JOB, include_advice=False)
+    assert not result.get("advice")
+    result = analyzer.analyze_resume_job_match(RESUME, JOB, include_advice=["skill_gap"])
+    assert list(result["advice"]) == [get_advice_titles("中文")["skill_gap"]]
+    assert analyzer.missing_advice_sections(result, "中文") == [key for key in ADVICE_KEYS if key != "skill_gap"]
+
+
+class RelabellingBackend(fake_gemini.FakeBackend):
+    """建議類別的標題與標準標題略有不同（例如少了「分析」兩字）"""
+
+    def response_text(self, prompt):
+        return super().response_text(prompt).replace('"技能差距分析"', '"技能差距"')
+
+
+def test_mislabelled_advice_category_is_stored_under_its_canonical_title(fake_backend):
+    backend = fake_gemini.install(RelabellingBackend(latency=0, tokens_per_second=1e9))
+    result = analyzer.analyze_resume_job_match(RESUME, JOB)
+    assert "技能差距" not in result["advice"]
+    assert analyzer.missing_advice_sections(result, "中文") == []
+    calls = backend.calls
+    analyzer.analyze_resume_job_match(RESUME, JOB)
+    assert backend.calls == calls
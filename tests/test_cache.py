@@ -0,0 +1,81 @@
+import time
+
+from cache import ResultCache, make_cache_key
+
+
+def entry_size(cache, key):
+    return cache._entries[key][1]
+
+
+def test_evicts_least_recently_used_when_over_byte_budget():
+    probe = ResultCache()
+    probe.set("a", {"v": "x" * 100})
+    cache = ResultCache(max_bytes=entry_size(probe, "a") * 2)
+
+    cache.set("a", {"v": "x" * 100})
+    cache.set("b", {"v": "y" * 100})
+    assert cache.get("a") is not None  # a 變成最近使用
+    cache.set("c", {"v": "z" * 100})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": "x" * 100}
+    assert cache.get("c") == {"v": "z" * 100}
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+def test_value_larger_than_budget_is_not_stored():
+    cache = ResultCache(max_bytes=10)
+    cache.set("big", {"v": "x" * 100})
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_replacing_a_key_does_not_double_count_bytes():
+    cache = ResultCache()
+    cache.set("a", {"v": "x" * 100})
+    first = cache.stats()["bytes"]
+    cache.set("a", {"v": "x" * 100})
+    assert cache.stats()["bytes"] == first
+    assert cache.stats()["entries"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = ResultCache(ttl_seconds=0.05)
+    cache.set("a", {"v": 1})
+    assert cache.get("a") == {"v": 1}
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 0
+    assert stats["bytes"] == 0
+
+
+def test_zero_ttl_never_expires():
+    cache = ResultCache(ttl_seconds=0)
+    cache.set("a", {"v": 1})
+    assert cache._entries["a"][2] is None
+
+
+def test_get_returns_independent_copies():
+    cache = ResultCache()
+    cache.set("a", {"advice": {"x": 1}})
+    cache.get("a")["advice"]["x"] = 2
+    assert cache.get("a") == {"advice": {"x": 1}}
+
+
+def test_hit_rate_counts_hits_and_misses():
+    cache = ResultCache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_cache_key_ignores_whitespace_differences():
+    first = make_cache_key("Python  developer\r\n\n\n\nRemote", "JD", "中文", "model", 1)
+    second = make_cache_key("Python developer\n\nRemote ", "JD", "中文", "model", 1)
+    assert first == second
+    assert first != make_cache_key("Python developer\n\nRemote", "JD", "English", "model", 1)
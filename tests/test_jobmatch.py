@@ -0,0 +1,56 @@
+import io
+import json
+
+from jobmatch import iter_pairs, score_file, score_pair
+
+
+def pairs(*lines, default_language="中文"):
+    return list(iter_pairs(io.StringIO("\n".join(lines) + "\n"), default_language))
+
+
+def test_valid_lines_use_defaults_for_missing_fields():
+    assert pairs(
+        json.dumps({"id": "a", "resume": "R", "job_description": "J", "language": "English"}),
+        "",
+        json.dumps({"resume_text": "R", "jd": "J"}),
+    ) == [("a", "R", "J", "English", None), ("3", "R", "J", "中文", None)]
+
+
+def test_malformed_lines_become_error_records():
+    result = pairs(
+        "not json",
+        json.dumps(["a", "list"]),
+        json.dumps({"id": "b", "resume": 1, "job_description": "J"}),
+        json.dumps({"id": "c", "resume": "R", "job_description": "J", "language": "fr"}),
+    )
+    assert [(pair_id, language) for pair_id, _, _, language, _ in result] == [
+        ("1", "中文"), ("2", "中文"), ("b", "中文"), ("c", "中文"),
+    ]
+    assert all(error for *_, error in result)
+
+
+def test_score_pair_reports_input_errors_without_analyzing():
+    record = score_pair("1", "", "", "中文", error="輸入行不是有效的 JSON")
+    assert record["status"] == "error"
+    assert record["error"] == "輸入行不是有效的 JSON"
+    assert score_pair("2", "  ", "JD", "中文")["status"] == "error"
+
+
+def test_score_file_writes_one_record_per_line(tmp_path, fake_backend):
+    input_path = tmp_path / "pairs.jsonl"
+    output_path = tmp_path / "results.jsonl"
+    input_path.write_text("\n".join([
+        json.dumps({"id": "ok", "resume": "React developer, 2 years", "job_description": "Frontend engineer, React"}),
+        "{broken",
+    ]) + "\n", encoding="utf-8")
+
+    assert score_file(str(input_path), str(output_path), workers=2) == (1, 1)
+    records = {record["id"]: record for record in map(json.loads, output_path.read_text(encoding="utf-8").splitlines())}
+    assert records["ok"]["status"] == "ok"
+    assert records["ok"]["result"]["match_score"] == fake_backend.expected_result("中文")["match_score"]
+    assert records["2"] == {**records["2"], "status": "error", "error": "輸入行不是有效的 JSON"}
+
+    # 接續執行時略過已成功的 id，只重試失敗的行
+    calls = fake_backend.calls
+    assert score_file(str(input_path), str(output_path), workers=2) == (0, 1)
+    assert fake_backend.calls == calls
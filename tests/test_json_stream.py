@@ -0,0 +1,86 @@
+import json
+
+from json_stream import IncrementalJSONParser, extract_json_text, parse_complete_response
+
+RESPONSE = {
+    "match_score": 72,
+    "priorities": [
+        {"name": "React", "weight": 0.8, "explanation": "兩年經驗"},
+        {"name": "TypeScript", "weight": 0.2, "explanation": "未提及"},
+    ],
+    "advice": {"履歷優化": ["量化成果", "補上測試經驗"]},
+}
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJSONParser()
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return parser, completed
+
+
+def test_streamed_chunks_give_the_complete_result():
+    text = "```json\n" + json.dumps(RESPONSE, ensure_ascii=False, indent=2) + "\n```"
+    parser, completed = feed_in_chunks(text, 7)
+    assert parser.complete
+    assert completed == ["match_score", "priorities", "advice"]
+    assert parser.finish() == (RESPONSE, False)
+
+
+def test_truncation_recovers_the_last_complete_value():
+    text = json.dumps(RESPONSE, ensure_ascii=False)
+    cut = text.index('"TypeScript"') + 5
+    parser, completed = feed_in_chunks(text[:cut], 11)
+    result, truncated = parser.finish()
+    assert truncated
+    assert completed == ["match_score"]
+    assert result["match_score"] == 72
+    # 截斷處只剩部分欄位的紀錄被移除，只保留完整的第一筆
+    assert result["priorities"] == [RESPONSE["priorities"][0]]
+    assert "advice" not in result
+
+
+def test_truncation_inside_a_string_keeps_earlier_items():
+    text = json.dumps(RESPONSE, ensure_ascii=False)
+    cut = text.index("補上測試")
+    result, truncated = feed_in_chunks(text[:cut], 5)[0].finish()
+    assert truncated
+    assert result["advice"] == {"履歷優化": ["量化成果"]}
+
+
+def test_nothing_to_recover_before_the_object_starts():
+    parser = IncrementalJSONParser()
+    parser.feed("Here is the analysis you asked for")
+    assert parser.finish() == (None, True)
+
+
+def test_tolerates_raw_newlines_and_trailing_commas():
+    parser = IncrementalJSONParser()
+    parser.feed('{"summary": "line one\nline two", "items": [1, 2,],}')
+    assert parser.finish() == ({"summary": "line one\nline two", "items": [1, 2]}, False)
+    assert parser.error is None
+
+
+def test_malformed_scalar_sets_an_error():
+    parser = IncrementalJSONParser()
+    parser.feed('{"match_score": 7x2, "confidence": 0.8}')
+    assert parser.error is not None
+    assert parse_complete_response('{"match_score": 7x2}')[3] is not None
+
+
+def test_prose_with_braces_before_the_fenced_block():
+    text = 'Use the {role} placeholder.\n```json\n{"match_score": 80}\n```'
+    assert extract_json_text(text).strip() == '{"match_score": 80}'
+    assert parse_complete_response(text) == ({"match_score": 80}, ["match_score"], False, None)
+    parser, _ = feed_in_chunks(text, 3)
+    assert parser.finish() == ({"match_score": 80}, False)
+
+
+def test_truncated_fenced_block_without_closing_marker():
+    text = '```json\n{"match_score": 80, "priorities": [{"name": "A", "weight": 1}, {"name": "B"'
+    result, completed, truncated, error = parse_complete_response(text)
+    assert truncated
+    assert error is None
+    assert completed == ["match_score"]
+    assert result == {"match_score": 80, "priorities": [{"name": "A", "weight": 1}]}
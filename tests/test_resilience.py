@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_resilience
+
+
+def no_delay_policy(max_attempts=3):
+    return RetryPolicy(attempt_timeout=1, deadline=10, max_attempts=max_attempts, base_delay=0, max_delay=0)
+
+
+def test_breaker_opens_after_threshold_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.1)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_released_probe_can_be_retried():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+    breaker.before_call()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+
+
+def test_retries_transient_errors_until_success():
+    breaker = CircuitBreaker(failure_threshold=1)
+    outcomes = [ConnectionError("reset"), TimeoutError("slow"), "ok"]
+
+    def call(timeout):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert call_with_resilience(call, policy=no_delay_policy(), breaker=breaker) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_exhausted_retries_count_one_breaker_failure():
+    breaker = CircuitBreaker(failure_threshold=2)
+    calls = []
+
+    def call(timeout):
+        calls.append(timeout)
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        call_with_resilience(call, policy=no_delay_policy(max_attempts=3), breaker=breaker)
+    assert len(calls) == 3
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker._failures == 1
+
+
+def test_non_retryable_error_releases_the_probe_without_failing():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+
+    def call(timeout):
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        call_with_resilience(call, policy=no_delay_policy(), breaker=breaker)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+
+
+def test_open_breaker_rejects_without_calling():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        call_with_resilience(lambda timeout: pytest.fail("should not be called"), breaker=breaker)
@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def start_leader(single_flight, key, fn):
+    """在背景執行緒以 fn 執行 key，回傳 future；等到 fn 真正開始後才返回"""
+    started = threading.Event()
+
+    def run():
+        started.set()
+        return fn()
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(single_flight.do, key, run)
+    started.wait(1)
+    executor.shutdown(wait=False)
+    return future
+
+
+def wait_for_followers(single_flight, count):
+    for _ in range(200):
+        if single_flight.coalesced >= count:
+            return
+        threading.Event().wait(0.005)
+    pytest.fail("followers did not join the in-flight call")
+
+
+def test_concurrent_callers_share_one_execution():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    leader = start_leader(single_flight, "k", lambda: release.wait(1) and {"score": 1})
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        followers = [executor.submit(single_flight.do, "k", lambda: pytest.fail("ran twice")) for _ in range(3)]
+        wait_for_followers(single_flight, 3)
+        assert single_flight.in_flight() == 1
+        release.set()
+        assert leader.result(1) == ({"score": 1}, False)
+        assert [future.result(1) for future in followers] == [({"score": 1}, True)] * 3
+    assert single_flight.executions == 1
+    assert single_flight.in_flight() == 0
+
+
+def test_different_keys_run_separately():
+    single_flight = SingleFlight()
+    assert single_flight.do("a", lambda: 1) == (1, False)
+    assert single_flight.do("b", lambda: 2) == (2, False)
+    assert single_flight.executions == 2
+
+
+def test_exception_is_shared_and_the_key_is_released():
+    single_flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(1)
+        raise RuntimeError("upstream failed")
+
+    leader = start_leader(single_flight, "k", fail)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        follower = executor.submit(single_flight.do, "k", lambda: pytest.fail("ran twice"))
+        wait_for_followers(single_flight, 1)
+        release.set()
+        with pytest.raises(RuntimeError):
+            leader.result(1)
+        with pytest.raises(RuntimeError):
+            follower.result(1)
+    # 失敗的呼叫不保留，之後的呼叫重新執行
+    assert single_flight.do("k", lambda: "retry") == ("retry", False)
+
+
+class Interrupted(BaseException):
+    """模擬 Streamlit 重新執行頁面時拋出的 BaseException"""
+
+
+def test_interrupted_leader_hands_over_to_a_waiting_caller():
+    single_flight = SingleFlight()
+    release = threading.Event()
+
+    def interrupted():
+        release.wait(1)
+        raise Interrupted()
+
+    leader = start_leader(single_flight, "k", interrupted)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        follower = executor.submit(single_flight.do, "k", lambda: "own result")
+        wait_for_followers(single_flight, 1)
+        release.set()
+        with pytest.raises(Interrupted):
+            leader.result(1)
+        assert follower.result(1) == ("own result", False)
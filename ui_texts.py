@@ -1,93 +1,154 @@
+# 介面文字（模組載入時建立一次，呼叫端只讀取，請勿修改）
+UI_TEXTS = {
+    "中文": {
+        "app_title": "JobMatch.AI",
+        "app_subtitle": "看見你的強項，精準補齊差距：30 秒搞懂這份職缺適不適合你",
+        "settings_title": "設置",
+        "language_label": "分析語言",
+        "instructions_title": "使用說明",
+        "instructions": [
+            "在左側貼上你的履歷內容",
+            "在右側貼上職缺描述",
+            "點擊「開始分析」",
+            "查看匹配度結果和建議"
+        ],
+        "privacy_title": "隱私保護",
+        "privacy": [
+            "不保存任何履歷內容",
+            "分析完成後自動清除",
+            "完全免費使用"
+        ],
+        "resume_title": "履歷內容",
+        "resume_placeholder": "請貼上你的履歷內容（支援中英文）",
+        "resume_example": "例如：\n姓名：張小明\n學歷：台灣大學資訊工程系\n工作經驗：\n- 2020-2022 軟體工程師，負責前端開發\n- 具備 React, JavaScript, Python 經驗\n...",
+        "job_title": "職缺描述",
+        "job_placeholder": "請貼上職缺描述（Job Description）",
+        "job_example": "例如：\n職位：前端工程師\n要求：\n- 3年以上 React 開發經驗\n- 熟悉 JavaScript, TypeScript\n- 具備團隊協作能力\n- 有產品思維\n...",
+        "analyze_button": "開始分析",
+        "analyze_another": "分析另一份職缺",
+        "match_score_label": "總體匹配度",
+        "priorities_title": "職缺關鍵經驗/技能",
+        "matched_title": "我符合的經驗",
+        "missing_title": "我缺少的經驗",
+        "advice_title": "AI 建議",
+        "advice_generating": "正在產生建議...",
+        "advice_resume_optimization": "履歷優化",
+        "advice_cover_letter": "求職信建議",
+        "advice_skill_gap": "技能差距分析",
+        "advice_interview": "面試準備建議",
+        "advice_portfolio": "作品集建議",
+        "no_matched": "暫無符合的經驗",
+        "all_skills_met": "所有關鍵技能都已具備！",
+        "copy_advice": "複製建議文字",
+        "analyzing": "AI 正在分析中，請稍候...",
+        "queue_position": "⏳ 目前使用人數較多，排隊中：前面還有 {position} 個請求",
+        "analysis_complete": "分析完成！",
+        "analysis_failed": "分析失敗，請檢查 API 設置或稍後再試",
+        "fill_required": "請填寫履歷內容和職缺描述",
+        "resume_upload_label": "或上傳履歷檔案（PDF、Word、HTML、TXT，上傳後取代上方內容）",
+        "job_upload_label": "或上傳職缺描述檔案（PDF、Word、HTML、TXT，上傳後取代上方內容）",
+        "extracting_files": "正在讀取上傳的檔案...",
+        "file_extract_failed": "無法讀取 {name}：{error}",
+        "file_empty": "{name} 中沒有可讀取的文字（掃描的 PDF 請改貼上文字）",
+        "mode_label": "分析模式",
+        "mode_single": "單一職缺",
+        "mode_batch": "批次比較多份職缺",
+        "batch_jobs_title": "多份職缺描述",
+        "batch_jobs_placeholder": "貼上多份職缺描述，每份之間以單獨一行 --- 分隔",
+        "batch_jobs_example": "例如：\n前端工程師\n- 3年以上 React 開發經驗\n---\n全端工程師\n- 熟悉 Node.js 與 React\n...",
+        "batch_upload_label": "或上傳職缺描述檔案（PDF、Word、HTML、TXT，可多選）",
+        "batch_top_k_label": "送 AI 詳細分析的職缺數（其餘僅以本地演算法估計）",
+        "batch_analyze_button": "開始批次分析",
+        "batch_ranking_title": "職缺匹配度排名",
+        "batch_column_rank": "排名",
+        "batch_column_job": "職缺",
+        "batch_column_score": "匹配度",
+        "batch_column_prescore": "初步估計",
+        "batch_column_missing_skills": "缺少的技能",
+        "batch_column_status": "狀態",
+        "batch_status_pending": "分析中",
+        "batch_status_done": "完成",
+        "batch_status_failed": "失敗",
+        "batch_status_skipped": "未送 AI 分析",
+        "batch_detail_label": "查看詳細分析",
+        "batch_fill_required": "請填寫履歷內容並提供至少一份職缺描述"
+    },
+    "English": {
+        "app_title": "JobMatch.AI",
+        "app_subtitle": "See your strengths, bridge the gaps: 30 seconds to know if this job fits you",
+        "settings_title": "Settings",
+        "language_label": "Analysis Language",
+        "instructions_title": "Instructions",
+        "instructions": [
+            "Paste your resume content on the left",
+            "Paste job description on the right",
+            "Click 'Start Analysis'",
+            "View matching results and recommendations"
+        ],
+        "privacy_title": "Privacy Protection",
+        "privacy": [
+            "No resume content is saved",
+            "Automatically cleared after analysis",
+            "Completely free to use"
+        ],
+        "resume_title": "Resume Content",
+        "resume_placeholder": "Please paste your resume content",
+        "resume_example": "Example:\nName: John Smith\nEducation: Computer Science, MIT\nExperience:\n- 2020-2022 Software Engineer, Frontend Development\n- Proficient in React, JavaScript, Python\n...",
+        "job_title": "Job Description",
+        "job_placeholder": "Please paste job description",
+        "job_example": "Example:\nPosition: Frontend Engineer\nRequirements:\n- 3+ years React development experience\n- Familiar with JavaScript, TypeScript\n- Team collaboration skills\n- Product mindset\n...",
+        "analyze_button": "Start Analysis",
+        "analyze_another": "Analyze Another Job",
+        "match_score_label": "Overall Match Score",
+        "priorities_title": "Job Key Experience/Skills",
+        "matched_title": "My Matching Experience",
+        "missing_title": "Missing Experience",
+        "advice_title": "AI Recommendations",
+        "advice_generating": "Generating recommendations...",
+        "advice_resume_optimization": "Resume Optimization",
+        "advice_cover_letter": "Cover Letter Suggestions",
+        "advice_skill_gap": "Skill Gap Analysis",
+        "advice_interview": "Interview Preparation",
+        "advice_portfolio": "Portfolio Suggestions",
+        "no_matched": "No matching experience found",
+        "all_skills_met": "All key skills are met!",
+        "copy_advice": "Copy Recommendations",
+        "analyzing": "AI is analyzing, please wait...",
+        "queue_position": "⏳ High demand right now. You are in the queue: {position} request(s) ahead of you",
+        "analysis_complete": "Analysis complete!",
+        "analysis_failed": "Analysis failed, please check API settings or try again later",
+        "fill_required": "Please fill in resume content and job description",
+        "resume_upload_label": "Or upload your resume (PDF, Word, HTML, TXT; replaces the text above)",
+        "job_upload_label": "Or upload the job description (PDF, Word, HTML, TXT; replaces the text above)",
+        "extracting_files": "Reading uploaded files...",
+        "file_extract_failed": "Could not read {name}: {error}",
+        "file_empty": "No readable text found in {name} (for scanned PDFs, please paste the text instead)",
+        "mode_label": "Analysis Mode",
+        "mode_single": "Single job",
+        "mode_batch": "Compare multiple jobs",
+        "batch_jobs_title": "Job Descriptions",
+        "batch_jobs_placeholder": "Paste several job descriptions, separated by a line containing only ---",
+        "batch_jobs_example": "Example:\nFrontend Engineer\n- 3+ years React experience\n---\nFull-stack Engineer\n- Familiar with Node.js and React\n...",
+        "batch_upload_label": "Or upload job description files (PDF, Word, HTML, TXT; multiple allowed)",
+        "batch_top_k_label": "Jobs sent for AI analysis (the rest are only estimated locally)",
+        "batch_analyze_button": "Start Batch Analysis",
+        "batch_ranking_title": "Job Match Ranking",
+        "batch_column_rank": "Rank",
+        "batch_column_job": "Job",
+        "batch_column_score": "Match",
+        "batch_column_prescore": "Estimate",
+        "batch_column_missing_skills": "Missing skills",
+        "batch_column_status": "Status",
+        "batch_status_pending": "Analyzing",
+        "batch_status_done": "Done",
+        "batch_status_failed": "Failed",
+        "batch_status_skipped": "Not analyzed",
+        "batch_detail_label": "View detailed analysis",
+        "batch_fill_required": "Please fill in your resume and provide at least one job description"
+    },
+}
+
+
 def get_ui_texts(language):
-    """根據語言返回界面文字"""
-    texts = {
-        "中文": {
-            "app_title": "JobMatch.AI",
-            "app_subtitle": "看見你的強項，精準補齊差距：30 秒搞懂這份職缺適不適合你",
-            "settings_title": "設置",
-            "language_label": "分析語言",
-            "instructions_title": "使用說明",
-            "instructions": [
-                "在左側貼上你的履歷內容",
-                "在右側貼上職缺描述",
-                "點擊「開始分析」",
-                "查看匹配度結果和建議"
-            ],
-            "privacy_title": "隱私保護",
-            "privacy": [
-                "不保存任何履歷內容",
-                "分析完成後自動清除",
-                "完全免費使用"
-            ],
-            "resume_title": "履歷內容",
-            "resume_placeholder": "請貼上你的履歷內容（支援中英文）",
-            "resume_example": "例如：\n姓名：張小明\n學歷：台灣大學資訊工程系\n工作經驗：\n- 2020-2022 軟體工程師，負責前端開發\n- 具備 React, JavaScript, Python 經驗\n...",
-            "job_title": "職缺描述",
-            "job_placeholder": "請貼上職缺描述（Job Description）",
-            "job_example": "例如：\n職位：前端工程師\n要求：\n- 3年以上 React 開發經驗\n- 熟悉 JavaScript, TypeScript\n- 具備團隊協作能力\n- 有產品思維\n...",
-            "analyze_button": "開始分析",
-            "analyze_another": "分析另一份職缺",
-            "match_score_label": "總體匹配度",
-            "priorities_title": "職缺關鍵經驗/技能",
-            "matched_title": "我符合的經驗",
-            "missing_title": "我缺少的經驗",
-            "advice_title": "AI 建議",
-            "advice_resume_optimization": "履歷優化",
-            "advice_cover_letter": "求職信建議",
-            "advice_skill_gap": "技能差距分析",
-            "advice_interview": "面試準備建議",
-            "advice_portfolio": "作品集建議",
-            "no_matched": "暫無符合的經驗",
-            "all_skills_met": "所有關鍵技能都已具備！",
-            "copy_advice": "複製建議文字",
-            "analyzing": "AI 正在分析中，請稍候...",
-            "analysis_complete": "分析完成！",
-            "analysis_failed": "分析失敗，請檢查 API 設置或稍後再試",
-            "fill_required": "請填寫履歷內容和職缺描述"
-        },
-        "English": {
-            "app_title": "JobMatch.AI",
-            "app_subtitle": "See your strengths, bridge the gaps: 30 seconds to know if this job fits you",
-            "settings_title": "Settings",
-            "language_label": "Analysis Language",
-            "instructions_title": "Instructions",
-            "instructions": [
-                "Paste your resume content on the left",
-                "Paste job description on the right",
-                "Click 'Start Analysis'",
-                "View matching results and recommendations"
-            ],
-            "privacy_title": "Privacy Protection",
-            "privacy": [
-                "No resume content is saved",
-                "Automatically cleared after analysis",
-                "Completely free to use"
-            ],
-            "resume_title": "Resume Content",
-            "resume_placeholder": "Please paste your resume content",
-            "resume_example": "Example:\nName: John Smith\nEducation: Computer Science, MIT\nExperience:\n- 2020-2022 Software Engineer, Frontend Development\n- Proficient in React, JavaScript, Python\n...",
-            "job_title": "Job Description",
-            "job_placeholder": "Please paste job description",
-            "job_example": "Example:\nPosition: Frontend Engineer\nRequirements:\n- 3+ years React development experience\n- Familiar with JavaScript, TypeScript\n- Team collaboration skills\n- Product mindset\n...",
-            "analyze_button": "Start Analysis",
-            "analyze_another": "Analyze Another Job",
-            "match_score_label": "Overall Match Score",
-            "priorities_title": "Job Key Experience/Skills",
-            "matched_title": "My Matching Experience",
-            "missing_title": "Missing Experience",
-            "advice_title": "AI Recommendations",
-            "advice_resume_optimization": "Resume Optimization",
-            "advice_cover_letter": "Cover Letter Suggestions",
-            "advice_skill_gap": "Skill Gap Analysis",
-            "advice_interview": "Interview Preparation",
-            "advice_portfolio": "Portfolio Suggestions",
-            "no_matched": "No matching experience found",
-            "all_skills_met": "All key skills are met!",
-            "copy_advice": "Copy Recommendations",
-            "analyzing": "AI is analyzing, please wait...",
-            "analysis_complete": "Analysis complete!",
-            "analysis_failed": "Analysis failed, please check API settings or try again later",
-            "fill_required": "Please fill in resume content and job description"
-        },
-    }
-    return texts.get(language, texts["中文"])
\ No newline at end of file
+    """根據語言返回界面文字（未支援的語言使用中文）"""
+    return UI_TEXTS.get(language, UI_TEXTS["中文"])
\ No newline at end of file